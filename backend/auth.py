@@ -10,6 +10,7 @@ from config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -63,6 +64,15 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Optional[User]:
+    if token is None:
+        return None
+    return await get_current_active_user(await get_current_user(token, db))
+
+
 def require_role(required_role: str):
     def role_checker(current_user: User = Depends(get_current_active_user)):
         if current_user.is_superuser:
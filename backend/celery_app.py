@@ -1,3 +1,4 @@
+import asyncio
 from celery import Celery
 from datetime import datetime
 from config import settings
@@ -36,24 +37,30 @@ def run_scheduled_scan(scan_id: int):
         
         if scan_type == "dependency":
             analyzer = DependencyAnalyzer()
-            result = analyzer.analyze_package(
+            result = asyncio.run(analyzer.analyze_package(
                 package_name=config.get("package_name"),
                 version=config.get("version", "latest"),
                 ecosystem=config.get("ecosystem", "npm")
-            )
+            ))
         elif scan_type == "container":
             scanner = ContainerScanner()
-            result = scanner.scan_image(
+            result = asyncio.run(scanner.scan_image(
                 image_name=config.get("image_name"),
                 image_tag=config.get("image_tag", "latest")
-            )
+            ))
         elif scan_type == "infrastructure":
             scanner = InfrastructureScanner()
-            result = scanner.scan(
+            result = asyncio.run(scanner.scan(
                 scan_type=config.get("scan_type"),
                 target=config.get("target"),
                 config=config
-            )
+            ))
+        elif scan_type == "compliance":
+            from modules.scheduled_compliance import run_scheduled_compliance
+            try:
+                result = run_scheduled_compliance(db, scan)
+            except (ValueError, LookupError) as e:
+                result = {"status": "error", "message": str(e)}
         
         scan.last_run = datetime.utcnow()
         from croniter import croniter
@@ -65,3 +72,27 @@ def run_scheduled_scan(scan_id: int):
     finally:
         db.close()
 
+
+
+@celery_app.task
+def run_fuzz_shard(campaign_id: int, shard_index: int):
+    from database import SessionLocal
+    from modules.fuzz_campaigns import run_shard
+    
+    db = SessionLocal()
+    try:
+        return run_shard(db, campaign_id, shard_index)
+    finally:
+        db.close()
+
+
+@celery_app.task(ignore_result=True)
+def run_scan_job(job_id: str):
+    from database import SessionLocal
+    from modules.scan_jobs import run_job
+    
+    db = SessionLocal()
+    try:
+        return run_job(db, job_id)
+    finally:
+        db.close()
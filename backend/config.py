@@ -14,13 +14,80 @@ class Settings(BaseSettings):
     # External API endpoints
     NVD_API_URL: str = "https://services.nvd.nist.gov/rest/json/cves/2.0"
     OSV_API_URL: str = "https://api.osv.dev/v1/query"
+    VULN_LOOKUP_CONCURRENCY: int = 10
+    
+    # Artifact storage
+    BLOB_STORE_PATH: str = "data/blobs"
+    SBOM_MERGE_MAX_INPUTS: int = 1000
+    SBOM_MERGE_MAX_OPEN_STREAMS: int = 128
+    
+    # SBOM attestations
+    ATTESTATION_KEYSTORE_PATH: str = "data/keys"
+    ATTESTATION_KEY_ID: str = ""
+    ATTESTATION_KEY_PASSWORD: str = ""
+    ATTESTATION_BATCH_LIMIT: int = 500
+    
+    # VEX suppressions
+    VEX_REFRESH_SECONDS: int = 60
+    
+    # Compliance engine
+    COMPLIANCE_RULE_CACHE_SIZE: int = 4096
+    COMPLIANCE_POLICY_CACHE_SIZE: int = 256
+    LICENSE_VERDICT_CACHE_SIZE: int = 4096
+    COMPLIANCE_BATCH_CHUNK_SIZE: int = 1000
+    COMPLIANCE_BATCH_MAX_LINE_BYTES: int = 1048576
+    COMPLIANCE_COLUMNAR_MIN_ROWS: int = 500
+    COMPLIANCE_INVENTORY_ROOT: str = "data/inventory"
+    COMPLIANCE_INVENTORY_HOSTS: List[str] = ["localhost", "127.0.0.1"]
+    COMPLIANCE_INVENTORY_TIMEOUT: int = 60
+    COMPLIANCE_NOTIFICATION_LIMIT: int = 20
     
     # Rate limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
+    # API security testing
+    API_TEST_MAX_CONNECTIONS: int = 100
+    CONTRACT_MAX_SAMPLES: int = 1000
+    CONTRACT_MAX_CONCURRENCY: int = 50
+    CONTRACT_VALIDATOR_CACHE_SIZE: int = 256
+    RESPONSE_SCAN_MAX_BYTES: int = 10485760
+    RESPONSE_SCAN_MAX_FINDINGS: int = 50
+    LOAD_TEST_MAX_RPS: int = 500
+    LOAD_TEST_MAX_DURATION_SECONDS: int = 120
+    LOAD_TEST_MAX_REQUESTS: int = 20000
+    LOAD_TEST_MAX_IN_FLIGHT: int = 200
+    LOAD_TEST_DEFAULT_DURATION_SECONDS: int = 10
+    LOAD_TEST_PROBE_SECONDS: int = 3
+    LOAD_TEST_PROBE_COOLDOWN_SECONDS: int = 2
+    FUZZ_CONCURRENCY_PER_TARGET: int = 20
+    FUZZ_MAX_CASES: int = 500
+    FUZZ_MAX_STRING_LENGTH: int = 65536
+    FUZZ_MAX_ARRAY_LENGTH: int = 10000
+    FUZZ_MAX_NESTING_DEPTH: int = 200
+    FUZZ_CAMPAIGN_MAX_CASES: int = 100000
+    FUZZ_CAMPAIGN_SHARD_SIZE: int = 250
+    FUZZ_CAMPAIGN_DEFAULT_RPS: int = 50
+    FUZZ_CAMPAIGN_MAX_RPS: int = 500
+    FUZZ_CAMPAIGN_SHARD_STALE_SECONDS: int = 1800
+    OPENAPI_SPEC_ROOT: str = "data/openapi"
+    OPENAPI_SPEC_HOSTS: List[str] = ["localhost", "127.0.0.1"]
+    OPENAPI_SCAN_MAX_OPERATIONS: int = 1000
+    OPENAPI_SCAN_WORKERS: int = 16
+    OPENAPI_SCAN_HOST_CONNECTIONS: int = 10
+    OPENAPI_SCAN_HOST_QPS: int = 50
+    OPENAPI_SCAN_FUZZ_CASES: int = 50
+    
+    # Container scanning
+    CONTAINER_SCAN_MAX_CONCURRENT: int = 4
+    CONTAINER_SCAN_MAX_QUEUED: int = 100
+    CONTAINER_SCAN_TIMEOUT_SECONDS: int = 300
+    
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
+    JOB_EVENT_POLL_SECONDS: float = 0.5
+    JOB_EVENT_HEARTBEAT_SECONDS: int = 15
+    JOB_EVENT_STREAM_MAX_SECONDS: int = 3600
     
     class Config:
         env_file = ".env"
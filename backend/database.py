@@ -1,9 +1,16 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, JSON, Boolean, Float, ForeignKey, Table
+from sqlalchemy import create_engine, inspect, or_, text, Column, Integer, String, DateTime, Text, JSON, Boolean, Float, ForeignKey, Table, UniqueConstraint
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred, undefer_group
 from datetime import datetime
+from typing import Dict, List
+import hashlib
+import json
+import logging
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -78,6 +85,43 @@ class APISecurityTest(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class FuzzCampaign(Base):
+    __tablename__ = "fuzz_campaigns"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    test_id = Column(Integer, ForeignKey("api_security_tests.id"), nullable=False, index=True)
+    endpoint = Column(String, nullable=False)
+    method = Column(String, nullable=False)
+    headers = Column(JSON)
+    body = Column(JSON)
+    contract_schema = Column(JSON)
+    total_cases = Column(Integer, nullable=False)
+    shard_size = Column(Integer, nullable=False)
+    shard_count = Column(Integer, nullable=False)
+    rate_limit_rps = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="running")
+    user_id = Column(Integer, ForeignKey("users.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+
+
+class FuzzCampaignShard(Base):
+    __tablename__ = "fuzz_campaign_shards"
+    __table_args__ = (UniqueConstraint("campaign_id", "shard_index", name="uq_fuzz_campaign_shard"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("fuzz_campaigns.id"), nullable=False, index=True)
+    shard_index = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, default=0)
+    corpus = deferred(Column(JSON))
+    results = Column(JSON)
+    error = Column(Text)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+
+
 class ComplianceCheck(Base):
     __tablename__ = "compliance_checks"
     
@@ -87,10 +131,71 @@ class ComplianceCheck(Base):
     status = Column(String, nullable=False)
     details = Column(JSON)
     evidence = Column(JSON)
+    evidence_hash = Column(String, ForeignKey("evidence_blobs.hash"))
+    fingerprint = Column(String, index=True)
+    resource_id = Column(String, index=True)
+    run_id = Column(Integer, ForeignKey("compliance_runs.id"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     project_id = Column(Integer, ForeignKey("projects.id"))
     scheduled = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    last_checked_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ComplianceResourceState(Base):
+    __tablename__ = "compliance_resource_states"
+    __table_args__ = (UniqueConstraint("resource_id", "framework", name="uq_compliance_resource_framework"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    resource_id = Column(String, nullable=False, index=True)
+    framework = Column(String, nullable=False, index=True)
+    resource_type = Column(String)
+    resource_data = Column(JSON, nullable=False)
+    verdicts = Column(JSON, nullable=False)
+    status = Column(String, nullable=False)
+    policy_set_version = Column(String)
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ComplianceRollup(Base):
+    __tablename__ = "compliance_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    framework = Column(String, nullable=False, unique=True)
+    resource_count = Column(Integer, default=0)
+    passed_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    policy_counts = Column(JSON, default=dict)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EvidenceBlob(Base):
+    __tablename__ = "evidence_blobs"
+    
+    hash = Column(String, primary_key=True)
+    content = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ComplianceRun(Base):
+    __tablename__ = "compliance_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    framework = Column(String, nullable=False)
+    policy_name = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="running")
+    resource_count = Column(Integer, default=0)
+    passed_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    summary = Column(JSON)
+    detail_key = Column(String)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    scheduled = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
 
 
 class DependencyScan(Base):
@@ -115,8 +220,12 @@ class SBOMDocument(Base):
     project_name = Column(String, nullable=False)
     version = Column(String, nullable=False)
     format = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
-    attestation = Column(Text)
+    content = deferred(Column(Text, nullable=False), group="blobs")
+    attestation = deferred(Column(Text), group="blobs")
+    content_hash = Column(String, index=True)
+    size_bytes = Column(Integer)
+    component_count = Column(Integer)
+    has_attestation = Column(Boolean, default=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     project_id = Column(Integer, ForeignKey("projects.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -178,6 +287,17 @@ class ScheduledScan(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class ComplianceScanState(Base):
+    __tablename__ = "compliance_scan_states"
+    __table_args__ = (UniqueConstraint("scan_id", "resource_id", name="uq_compliance_scan_state"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scan_id = Column(Integer, ForeignKey("scheduled_scans.id"), nullable=False, index=True)
+    resource_id = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Webhook(Base):
     __tablename__ = "webhooks"
     
@@ -218,6 +338,27 @@ class InfrastructureScan(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class ScanJob(Base):
+    __tablename__ = "scan_jobs"
+    
+    id = Column(String, primary_key=True, index=True)
+    job_type = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")
+    params = Column(JSON)
+    progress = Column(Float, default=0.0)
+    stage = Column(String)
+    partial_results = Column(JSON)
+    sequence = Column(Integer, default=0)
+    result = Column(JSON)
+    result_id = Column(Integer)
+    error = Column(Text)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+
+
 class PolicyTemplate(Base):
     __tablename__ = "policy_templates"
     
@@ -226,9 +367,27 @@ class PolicyTemplate(Base):
     framework = Column(String, nullable=False)
     description = Column(Text)
     policy_content = Column(JSON, nullable=False)
+    version = Column(Integer, default=1, nullable=False)
     is_public = Column(Boolean, default=False)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class VEXSuppression(Base):
+    __tablename__ = "vex_suppressions"
+    __table_args__ = (UniqueConstraint("vuln_id", "purl", name="uq_vex_vuln_purl"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    vuln_id = Column(String, nullable=False, index=True)
+    purl = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False)
+    justification = Column(String)
+    detail = Column(Text)
+    source = Column(String)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 def get_db():
@@ -239,3 +398,112 @@ def get_db():
         db.close()
 
 
+SBOM_METADATA_COLUMNS = {
+    "content_hash": "VARCHAR",
+    "size_bytes": "INTEGER",
+    "component_count": "INTEGER",
+    "has_attestation": "BOOLEAN"
+}
+
+
+COMPLIANCE_CHECK_COLUMNS = {
+    "evidence_hash": "VARCHAR REFERENCES evidence_blobs (hash)",
+    "fingerprint": "VARCHAR",
+    "resource_id": "VARCHAR",
+    "run_id": "INTEGER REFERENCES compliance_runs (id)",
+    "last_checked_at": "TIMESTAMP"
+}
+
+
+def _add_missing_columns(table: str, columns: Dict[str, str], indexed: List[str]) -> List[str]:
+    existing = {column["name"] for column in inspect(engine).get_columns(table)}
+    added = []
+    for name, column_type in columns.items():
+        if name in existing:
+            continue
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+            logger.warning(f"Added missing column {table}.{name}")
+            added.append(name)
+        except DBAPIError:
+            if name not in {column["name"] for column in inspect(engine).get_columns(table)}:
+                raise
+    with engine.begin() as connection:
+        for name in indexed:
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{name} ON {table} ({name})"))
+    return added
+
+
+def upgrade_compliance_checks():
+    added = _add_missing_columns("compliance_checks", COMPLIANCE_CHECK_COLUMNS, ["fingerprint", "resource_id", "run_id"])
+    if "last_checked_at" in added:
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE compliance_checks SET last_checked_at = created_at WHERE last_checked_at IS NULL"))
+
+
+POLICY_TEMPLATE_COLUMNS = {
+    "version": "INTEGER NOT NULL DEFAULT 1",
+    "updated_at": "TIMESTAMP"
+}
+
+
+def upgrade_policy_templates():
+    added = _add_missing_columns("policy_templates", POLICY_TEMPLATE_COLUMNS, [])
+    if "updated_at" in added:
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE policy_templates SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+def upgrade_sbom_documents(batch_size: int = 200) -> int:
+    _add_missing_columns("sbom_documents", SBOM_METADATA_COLUMNS, ["content_hash"])
+    
+    db = SessionLocal()
+    backfilled = 0
+    last_id = 0
+    try:
+        while True:
+            sboms = (
+                db.query(SBOMDocument)
+                .options(undefer_group("blobs"))
+                .filter(
+                    SBOMDocument.id > last_id,
+                    or_(
+                        SBOMDocument.content_hash.is_(None),
+                        SBOMDocument.size_bytes.is_(None),
+                        SBOMDocument.component_count.is_(None),
+                        SBOMDocument.has_attestation.is_(None)
+                    )
+                )
+                .order_by(SBOMDocument.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not sboms:
+                break
+            
+            for sbom in sboms:
+                content = (sbom.content or "").encode()
+                if sbom.content_hash is None:
+                    sbom.content_hash = hashlib.sha256(content).hexdigest()
+                if sbom.size_bytes is None:
+                    sbom.size_bytes = len(content)
+                if sbom.component_count is None:
+                    try:
+                        document = json.loads(content)
+                    except ValueError:
+                        document = None
+                    components = (document.get("components") or document.get("packages") or []) if isinstance(document, dict) else []
+                    sbom.component_count = len(components)
+                if sbom.has_attestation is None:
+                    sbom.has_attestation = bool(sbom.attestation)
+            
+            last_id = sboms[-1].id
+            backfilled += len(sboms)
+            db.commit()
+    finally:
+        db.close()
+    
+    if backfilled:
+        logger.info(f"Backfilled metadata for {backfilled} SBOM documents")
+    return backfilled
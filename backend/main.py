@@ -4,14 +4,16 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import logging
 
-from database import engine, Base, get_db
+from database import engine, Base, get_db, upgrade_compliance_checks, upgrade_policy_templates, upgrade_sbom_documents
 from routers import (
     api_security, compliance, dependencies, sbom, health,
     auth, users, teams, notifications, projects, webhooks,
     containers, infrastructure, scheduled_scans, reports,
-    sbom_comparison, policy_templates, audit
+    sbom_comparison, policy_templates, audit, vex, jobs
 )
 from middleware.audit import AuditLogMiddleware
+from modules.attestation import get_attestation_signer
+from modules.policy_templates import get_template_registry
 from config import settings
 
 logging.basicConfig(level=logging.INFO)
@@ -21,8 +23,14 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    upgrade_sbom_documents()
+    upgrade_compliance_checks()
+    upgrade_policy_templates()
     logger.info("Database tables created")
+    get_attestation_signer()
+    get_template_registry().start_listener()
     yield
+    get_template_registry().stop_listener()
     logger.info("Application shutdown")
 
 
@@ -71,6 +79,8 @@ app.include_router(reports.router, prefix="/api/v1", tags=["Reports"])
 app.include_router(sbom_comparison.router, prefix="/api/v1", tags=["SBOM"])
 app.include_router(policy_templates.router, prefix="/api/v1", tags=["Policy Templates"])
 app.include_router(audit.router, prefix="/api/v1", tags=["Audit"])
+app.include_router(vex.router, prefix="/api/v1", tags=["VEX"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["Jobs"])
 
 
 @app.get("/")
@@ -1,10 +1,62 @@
 import httpx
-from typing import Dict, Any, List
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 import logging
 
+from config import settings
+from modules.response_scanner import Detector, ResponseScanner, sensitive_data_detectors
+
 logger = logging.getLogger(__name__)
 
 
+class BaselineResponse:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        method: str,
+        headers: Dict[str, str],
+        body: Optional[Dict[str, Any]],
+        scanner: ResponseScanner
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.method = method
+        self.headers = headers
+        self.body = body
+        self.scanner = scanner
+        self._request: Optional[asyncio.Future] = None
+    
+    async def _fetch(self) -> Tuple[httpx.Response, Dict[str, Any]]:
+        request = self.client.build_request(
+            method=self.method,
+            url=self.endpoint,
+            headers=self.headers,
+            json=self.body
+        )
+        response = await self.client.send(request, stream=True)
+        try:
+            scan = await self.scanner.scan_stream(response.aiter_bytes())
+        finally:
+            await response.aclose()
+        return response, scan
+    
+    async def _result(self) -> Tuple[httpx.Response, Dict[str, Any]]:
+        if self._request is None:
+            self._request = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._request)
+    
+    async def get(self) -> httpx.Response:
+        response, _ = await self._result()
+        return response
+    
+    async def scan(self) -> Dict[str, Any]:
+        _, scan = await self._result()
+        return scan
+
+
 class AdvancedAPISecurityTester:
     OWASP_TOP_10 = [
         "injection",
@@ -19,27 +71,50 @@ class AdvancedAPISecurityTester:
         "insufficient_logging"
     ]
     
+    XSS_PAYLOADS = [
+        "<script>alert('XSS')</script>",
+        "<img src=x onerror=alert('XSS')>",
+        "javascript:alert('XSS')",
+        "<svg onload=alert('XSS')>"
+    ]
+    
     def __init__(self):
         self.timeout = 30.0
+        self.limits = httpx.Limits(
+            max_connections=settings.API_TEST_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.API_TEST_MAX_CONNECTIONS
+        )
+        self.sensitive_scanner = ResponseScanner(sensitive_data_detectors())
+        self.xss_scanner = ResponseScanner([
+            Detector.literal(payload, payload) for payload in self.XSS_PAYLOADS
+        ])
+    
+    @asynccontextmanager
+    async def client_scope(self, client: Optional[httpx.AsyncClient] = None) -> AsyncIterator[httpx.AsyncClient]:
+        if client is not None:
+            yield client
+            return
+        async with httpx.AsyncClient(timeout=self.timeout, limits=self.limits) as owned_client:
+            yield owned_client
     
     async def test_owasp_top_10(
         self,
         endpoint: str,
         method: str = "GET",
         headers: Dict[str, str] = None,
-        body: Dict[str, Any] = None
+        body: Dict[str, Any] = None,
+        client: Optional[httpx.AsyncClient] = None
     ) -> Dict[str, Any]:
-        results = {}
+        started = time.perf_counter()
+        vulnerabilities = [name for name in self.OWASP_TOP_10 if hasattr(self, f"_test_{name}")]
         
-        for vulnerability in self.OWASP_TOP_10:
-            test_func = getattr(self, f"_test_{vulnerability}", None)
-            if test_func:
-                try:
-                    result = await test_func(endpoint, method, headers, body)
-                    results[vulnerability] = result
-                except Exception as e:
-                    logger.error(f"Test {vulnerability} failed: {e}")
-                    results[vulnerability] = {"passed": False, "error": str(e)}
+        async with self.client_scope(client) as client:
+            baseline = BaselineResponse(client, endpoint, method, headers or {}, body, self.sensitive_scanner)
+            outcomes = await asyncio.gather(*(
+                self._run_test(vulnerability, endpoint, method, headers, body, client, baseline)
+                for vulnerability in vulnerabilities
+            ))
+        results = dict(zip(vulnerabilities, outcomes))
         
         overall_status = "passed" if all(r.get("passed", True) for r in results.values()) else "failed"
         
@@ -49,16 +124,80 @@ class AdvancedAPISecurityTester:
             "summary": {
                 "total": len(results),
                 "passed": sum(1 for r in results.values() if r.get("passed", False)),
-                "failed": sum(1 for r in results.values() if not r.get("passed", False))
+                "failed": sum(1 for r in results.values() if not r.get("passed", False)),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
             }
         }
     
+    async def _run_test(
+        self,
+        vulnerability: str,
+        endpoint: str,
+        method: str,
+        headers: Dict[str, str],
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: BaselineResponse
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = await getattr(self, f"_test_{vulnerability}")(endpoint, method, headers, body, client, baseline)
+        except Exception as e:
+            logger.error(f"Test {vulnerability} failed: {e}")
+            result = {"passed": False, "error": str(e)}
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+    
+    def _payload_request(
+        self,
+        endpoint: str,
+        method: str,
+        headers: Dict[str, str],
+        body: Dict[str, Any],
+        payload: str
+    ) -> Dict[str, Any]:
+        if method.upper() in ["GET", "DELETE"]:
+            return {"method": method, "url": f"{endpoint}?input={payload}", "headers": headers or {}}
+        test_body = {**body, "input": payload} if body else {"input": payload}
+        return {"method": method, "url": endpoint, "headers": headers or {}, "json": test_body}
+    
+    async def _send_payload(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        method: str,
+        headers: Dict[str, str],
+        body: Dict[str, Any],
+        payload: str
+    ) -> Optional[httpx.Response]:
+        try:
+            return await client.request(**self._payload_request(endpoint, method, headers, body, payload))
+        except Exception:
+            return None
+    
+    async def _scan_payload(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        method: str,
+        headers: Dict[str, str],
+        body: Dict[str, Any],
+        payload: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            async with client.stream(**self._payload_request(endpoint, method, headers, body, payload)) as response:
+                return await self.xss_scanner.scan_stream(response.aiter_bytes())
+        except Exception:
+            return None
+    
     async def _test_injection(
         self,
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         injection_payloads = [
             "' OR '1'='1",
@@ -68,33 +207,19 @@ class AdvancedAPISecurityTester:
             "<script>alert('xss')</script>"
         ]
         
+        responses = await asyncio.gather(*(
+            self._send_payload(client, endpoint, method, headers, body, payload)
+            for payload in injection_payloads
+        ))
+        
         issues = []
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            for payload in injection_payloads:
-                try:
-                    if method.upper() in ["GET", "DELETE"]:
-                        response = await client.request(
-                            method=method,
-                            url=f"{endpoint}?input={payload}",
-                            headers=headers or {}
-                        )
-                    else:
-                        test_body = {**body, "input": payload} if body else {"input": payload}
-                        response = await client.request(
-                            method=method,
-                            url=endpoint,
-                            headers=headers or {},
-                            json=test_body
-                        )
-                    
-                    if response.status_code == 500 or "error" in response.text.lower():
-                        issues.append({
-                            "payload": payload,
-                            "status_code": response.status_code,
-                            "vulnerable": True
-                        })
-                except Exception:
-                    pass
+        for payload, response in zip(injection_payloads, responses):
+            if response is not None and (response.status_code == 500 or "error" in response.text.lower()):
+                issues.append({
+                    "payload": payload,
+                    "status_code": response.status_code,
+                    "vulnerable": True
+                })
         
         return {
             "passed": len(issues) == 0,
@@ -107,39 +232,35 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         issues = []
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            no_auth_headers = {k: v for k, v in (headers or {}).items() if k.lower() != "authorization"}
-            
-            response = await client.request(
-                method=method,
-                url=endpoint,
-                headers=no_auth_headers,
-                json=body
-            )
-            
-            if response.status_code == 200:
-                issues.append({
-                    "issue": "Endpoint accessible without authentication",
-                    "status_code": 200
-                })
-            
-            weak_auth_headers = {**(headers or {}), "Authorization": "Bearer weak_token"}
-            response2 = await client.request(
-                method=method,
-                url=endpoint,
-                headers=weak_auth_headers,
-                json=body
-            )
-            
-            if response2.status_code == 200:
-                issues.append({
-                    "issue": "Weak authentication accepted",
-                    "status_code": 200
-                })
+        no_auth_headers = {k: v for k, v in (headers or {}).items() if k.lower() != "authorization"}
+        weak_auth_headers = {**no_auth_headers, "Authorization": "Bearer weak_token"}
+        
+        if len(no_auth_headers) == len(headers or {}):
+            unauthenticated = baseline.get()
+        else:
+            unauthenticated = client.request(method=method, url=endpoint, headers=no_auth_headers, json=body)
+        response, response2 = await asyncio.gather(
+            unauthenticated,
+            client.request(method=method, url=endpoint, headers=weak_auth_headers, json=body)
+        )
+        
+        if response.status_code == 200:
+            issues.append({
+                "issue": "Endpoint accessible without authentication",
+                "status_code": 200
+            })
+        
+        if response2.status_code == 200:
+            issues.append({
+                "issue": "Weak authentication accepted",
+                "status_code": 200
+            })
         
         return {
             "passed": len(issues) == 0,
@@ -151,33 +272,28 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
-        sensitive_patterns = [
-            "password", "secret", "token", "api_key",
-            "credit_card", "ssn", "social_security"
-        ]
+        scan = await baseline.scan()
         
-        issues = []
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.request(
-                method=method,
-                url=endpoint,
-                headers=headers or {},
-                json=body
-            )
-            
-            response_text = response.text.lower()
-            for pattern in sensitive_patterns:
-                if pattern in response_text:
-                    issues.append({
-                        "pattern": pattern,
-                        "issue": f"Sensitive data pattern '{pattern}' found in response"
-                    })
+        issues = [
+            {
+                "pattern": finding["detector"],
+                "severity": finding["severity"],
+                "match": finding["match"],
+                "occurrences": finding["occurrences"],
+                "issue": f"Sensitive data pattern '{finding['detector']}' found in response"
+            }
+            for finding in scan["findings"]
+        ]
         
         return {
             "passed": len(issues) == 0,
-            "issues": issues
+            "issues": issues,
+            "bytes_scanned": scan["bytes_scanned"],
+            "truncated": scan["truncated"]
         }
     
     async def _test_xss(
@@ -185,41 +301,22 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
-        xss_payloads = [
-            "<script>alert('XSS')</script>",
-            "<img src=x onerror=alert('XSS')>",
-            "javascript:alert('XSS')",
-            "<svg onload=alert('XSS')>"
-        ]
+        scans = await asyncio.gather(*(
+            self._scan_payload(client, endpoint, method, headers, body, payload)
+            for payload in self.XSS_PAYLOADS
+        ))
         
         issues = []
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            for payload in xss_payloads:
-                try:
-                    if method.upper() in ["GET", "DELETE"]:
-                        response = await client.request(
-                            method=method,
-                            url=f"{endpoint}?input={payload}",
-                            headers=headers or {}
-                        )
-                    else:
-                        test_body = {**body, "input": payload} if body else {"input": payload}
-                        response = await client.request(
-                            method=method,
-                            url=endpoint,
-                            headers=headers or {},
-                            json=test_body
-                        )
-                    
-                    if payload in response.text:
-                        issues.append({
-                            "payload": payload,
-                            "issue": "XSS payload reflected in response"
-                        })
-                except Exception:
-                    pass
+        for payload, scan in zip(self.XSS_PAYLOADS, scans):
+            if scan is not None and any(finding["detector"] == payload for finding in scan["findings"]):
+                issues.append({
+                    "payload": payload,
+                    "issue": "XSS payload reflected in response"
+                })
         
         return {
             "passed": len(issues) == 0,
@@ -231,23 +328,19 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         issues = []
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.request(
-                method=method,
-                url=endpoint,
-                headers=headers or {},
-                json=body
-            )
-            
-            if response.status_code == 200:
-                if "admin" in endpoint.lower() or "user" in endpoint.lower():
-                    issues.append({
-                        "issue": "Potential unauthorized access to restricted endpoint"
-                    })
+        response = await baseline.get()
+        
+        if response.status_code == 200:
+            if "admin" in endpoint.lower() or "user" in endpoint.lower():
+                issues.append({
+                    "issue": "Potential unauthorized access to restricted endpoint"
+                })
         
         return {
             "passed": len(issues) == 0,
@@ -259,28 +352,24 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         issues = []
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.request(
-                method=method,
-                url=endpoint,
-                headers=headers or {},
-                json=body
-            )
-            
-            server_header = response.headers.get("Server", "")
-            if server_header:
-                issues.append({
-                    "issue": f"Server information leaked: {server_header}"
-                })
-            
-            if "X-Powered-By" in response.headers:
-                issues.append({
-                    "issue": "X-Powered-By header exposes technology stack"
-                })
+        response = await baseline.get()
+        
+        server_header = response.headers.get("Server", "")
+        if server_header:
+            issues.append({
+                "issue": f"Server information leaked: {server_header}"
+            })
+        
+        if "X-Powered-By" in response.headers:
+            issues.append({
+                "issue": "X-Powered-By header exposes technology stack"
+            })
         
         return {
             "passed": len(issues) == 0,
@@ -292,7 +381,9 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         return {"passed": True, "note": "XXE testing requires XML endpoints"}
     
@@ -301,7 +392,9 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         return {"passed": True, "note": "Deserialization testing requires specific formats"}
     
@@ -310,7 +403,9 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         return {"passed": True, "note": "Vulnerability scanning integrated in dependency module"}
     
@@ -319,7 +414,9 @@ class AdvancedAPISecurityTester:
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Dict[str, Any]
+        body: Dict[str, Any],
+        client: httpx.AsyncClient,
+        baseline: "BaselineResponse"
     ) -> Dict[str, Any]:
         return {"passed": True, "note": "Logging verification requires server-side access"}
 
@@ -1,18 +1,93 @@
 import httpx
 import asyncio
+import hashlib
 import json
+import math
 import time
-from typing import Dict, Any, List, Optional
-from jsonschema import validate, ValidationError
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional
+from jsonschema import validators
+from jsonschema.exceptions import best_match
 import logging
 
+from config import settings
+from modules.fuzzing import FuzzCase, FuzzingEngine, MutationGenerator
+from modules.load_generator import LatencyHistogram, LoadProfile, OpenLoopLoadGenerator
+from utils.cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
+SLO_METRICS = {
+    "p50_ms": "p50",
+    "p90_ms": "p90",
+    "p95_ms": "p95",
+    "p99_ms": "p99",
+    "p999_ms": "p999",
+    "max_ms": "max",
+    "mean_ms": "mean",
+    "error_rate": None
+}
+
+_validators = LRUCache(settings.CONTRACT_VALIDATOR_CACHE_SIZE)
+
+
+def validator_for(schema: Dict[str, Any]) -> Any:
+    key = hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+    validator = _validators.get(key)
+    if validator is None:
+        validator_class = validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+        _validators.put(key, validator)
+    return validator
+
+
+def validate_slo(slo: Optional[Dict[str, Any]]):
+    for metric, threshold in (slo or {}).items():
+        if metric not in SLO_METRICS:
+            raise ValueError(f"Unsupported SLO metric '{metric}'. Supported: {', '.join(SLO_METRICS)}")
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or threshold < 0:
+            raise ValueError(f"SLO threshold for '{metric}' must be a non-negative number")
+
+
+def evaluate_slo(slo: Dict[str, Any], latency: Dict[str, Any], error_rate: float) -> Dict[str, Any]:
+    violations = []
+    for metric, threshold in slo.items():
+        actual = error_rate if metric == "error_rate" else latency.get(SLO_METRICS[metric])
+        if actual is None or actual > threshold:
+            violations.append({"metric": metric, "threshold": threshold, "actual": actual})
+    return {"passed": not violations, "thresholds": slo, "violations": violations}
+
 
 class APISecurityTester:
     def __init__(self):
         self.timeout = 30.0
         self.max_retries = 3
+        self.limits = httpx.Limits(
+            max_connections=settings.API_TEST_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.API_TEST_MAX_CONNECTIONS
+        )
+    
+    @asynccontextmanager
+    async def client_scope(self, client: Optional[httpx.AsyncClient] = None) -> AsyncIterator[httpx.AsyncClient]:
+        if client is not None:
+            yield client
+            return
+        async with httpx.AsyncClient(timeout=self.timeout, limits=self.limits) as owned_client:
+            yield owned_client
+    
+    async def _timed(
+        self,
+        name: str,
+        test: Awaitable[Dict[str, Any]],
+        on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await test
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if on_result is not None:
+            on_result(name, result)
+        return result
     
     async def run_tests(
         self,
@@ -22,27 +97,41 @@ class APISecurityTester:
         body: Optional[Dict[str, Any]] = None,
         test_types: List[str] = None,
         contract_schema: Optional[Dict[str, Any]] = None,
-        rate_limit_threshold: Optional[int] = 100
+        rate_limit_threshold: Optional[int] = 100,
+        load_profile: Optional[Dict[str, Any]] = None,
+        find_rate_limit: bool = False,
+        contract_samples: int = 1,
+        contract_concurrency: int = 1,
+        contract_slo: Optional[Dict[str, Any]] = None,
+        on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         if test_types is None:
             test_types = ["contract", "fuzzing", "rate_limit"]
         
         results = {}
         
-        if "contract" in test_types:
-            results["contract"] = await self.test_contract(
-                endpoint, method, headers, body, contract_schema
-            )
-        
-        if "fuzzing" in test_types:
-            results["fuzzing"] = await self.test_fuzzing(
-                endpoint, method, headers, body
-            )
-        
-        if "rate_limit" in test_types:
-            results["rate_limit"] = await self.test_rate_limiting(
-                endpoint, method, headers, body, rate_limit_threshold
-            )
+        async with self.client_scope() as client:
+            concurrent = {}
+            if "contract" in test_types:
+                concurrent["contract"] = self.test_contract(
+                    endpoint, method, headers, body, contract_schema, client=client,
+                    samples=contract_samples, concurrency=contract_concurrency, slo=contract_slo
+                )
+            if "fuzzing" in test_types:
+                concurrent["fuzzing"] = self.test_fuzzing(
+                    endpoint, method, headers, body, client=client, schema=contract_schema
+                )
+            
+            completed = await asyncio.gather(*(
+                self._timed(name, test, on_result) for name, test in concurrent.items()
+            ))
+            results.update(zip(concurrent, completed))
+            
+            if "rate_limit" in test_types:
+                results["rate_limit"] = await self._timed("rate_limit", self.test_rate_limiting(
+                    endpoint, method, headers, body, rate_limit_threshold, client=client,
+                    load_profile=load_profile, find_limit=find_rate_limit
+                ), on_result)
         
         return results
     
@@ -52,126 +141,178 @@ class APISecurityTester:
         method: str,
         headers: Dict[str, str],
         body: Optional[Dict[str, Any]],
-        schema: Optional[Dict[str, Any]]
+        schema: Optional[Dict[str, Any]],
+        client: Optional[httpx.AsyncClient] = None,
+        samples: int = 1,
+        concurrency: int = 1,
+        slo: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
+        validate_slo(slo)
+        samples = max(1, min(samples or 1, settings.CONTRACT_MAX_SAMPLES))
+        concurrency = max(1, min(concurrency or 1, settings.CONTRACT_MAX_CONCURRENCY, samples))
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.request(
-                    method=method,
-                    url=endpoint,
-                    headers=headers or {},
-                    json=body
-                )
-                
-                result = {
-                    "passed": True,
-                    "status_code": response.status_code,
-                    "response_time_ms": response.elapsed.total_seconds() * 1000,
-                    "issues": []
-                }
-                
-                if schema:
-                    try:
-                        response_data = response.json()
-                        validate(instance=response_data, schema=schema)
-                        result["contract_validation"] = "passed"
-                    except ValidationError as e:
-                        result["passed"] = False
-                        result["contract_validation"] = "failed"
-                        result["issues"].append({
-                            "type": "contract_violation",
-                            "message": str(e.message),
-                            "path": ".".join(str(p) for p in e.path)
-                        })
-                    except json.JSONDecodeError:
-                        result["passed"] = False
-                        result["issues"].append({
-                            "type": "invalid_json",
-                            "message": "Response is not valid JSON"
-                        })
-                
-                if response.status_code >= 400:
-                    result["passed"] = False
-                    result["issues"].append({
-                        "type": "http_error",
-                        "message": f"HTTP {response.status_code} error"
-                    })
-                
-                return result
-        except httpx.TimeoutException:
+            validator = validator_for(schema) if schema else None
+        except Exception as e:
             return {
                 "passed": False,
-                "issues": [{"type": "timeout", "message": "Request timed out"}]
+                "issues": [{"type": "invalid_schema", "message": str(e)}]
             }
+        
+        async with self.client_scope(client) as client:
+            if samples == 1:
+                outcomes = [await self._contract_sample(client, endpoint, method, headers, body, validator)]
+            else:
+                remaining = iter(range(samples))
+                outcomes = []
+                
+                async def worker():
+                    for _ in remaining:
+                        outcomes.append(await self._contract_sample(client, endpoint, method, headers, body, validator))
+                
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+        
+        if samples == 1:
+            result = outcomes[0]
+            result["passed"] = not result["issues"]
+            if slo:
+                latency = {key: result.get("response_time_ms") for key in ("p50", "p90", "p95", "p99", "p999", "max", "mean")}
+                result["slo"] = evaluate_slo(slo, latency, 0.0 if result["passed"] else 1.0)
+                result["passed"] = result["passed"] and result["slo"]["passed"]
+            return result
+        
+        return self._aggregate_samples(outcomes, concurrency, validator is not None, slo)
+    
+    async def _contract_sample(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        method: str,
+        headers: Dict[str, str],
+        body: Optional[Dict[str, Any]],
+        validator: Optional[Any]
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(
+                method=method,
+                url=endpoint,
+                headers=headers or {},
+                json=body
+            )
+        except httpx.TimeoutException:
+            return {"issues": [{"type": "timeout", "message": "Request timed out"}]}
         except Exception as e:
             logger.error(f"Contract test failed: {e}")
-            return {
-                "passed": False,
-                "issues": [{"type": "error", "message": str(e)}]
-            }
+            return {"issues": [{"type": "error", "message": str(e)}]}
+        
+        result = {
+            "status_code": response.status_code,
+            "response_time_ms": round((time.perf_counter() - started) * 1000, 3),
+            "issues": []
+        }
+        
+        if validator is not None:
+            try:
+                error = best_match(validator.iter_errors(response.json()))
+            except json.JSONDecodeError:
+                error = None
+                result["issues"].append({
+                    "type": "invalid_json",
+                    "message": "Response is not valid JSON"
+                })
+            if error is not None:
+                result["issues"].append({
+                    "type": "contract_violation",
+                    "message": str(error.message),
+                    "path": ".".join(str(p) for p in error.path)
+                })
+            result["contract_validation"] = "failed" if result["issues"] else "passed"
+        
+        if response.status_code >= 400:
+            result["issues"].append({
+                "type": "http_error",
+                "message": f"HTTP {response.status_code} error"
+            })
+        
+        return result
+    
+    def _aggregate_samples(
+        self,
+        outcomes: List[Dict[str, Any]],
+        concurrency: int,
+        validated: bool,
+        slo: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        histogram = LatencyHistogram()
+        status_counts: Dict[str, int] = {}
+        issues: Dict[tuple, Dict[str, Any]] = {}
+        failed_samples = 0
+        contract_failures = 0
+        
+        for outcome in outcomes:
+            if "response_time_ms" in outcome:
+                histogram.record(outcome["response_time_ms"])
+            code = str(outcome.get("status_code", "error"))
+            status_counts[code] = status_counts.get(code, 0) + 1
+            failed_samples += bool(outcome["issues"])
+            contract_failures += outcome.get("contract_validation") == "failed"
+            for issue in outcome["issues"]:
+                key = (issue["type"], issue["message"], issue.get("path"))
+                if key in issues:
+                    issues[key]["occurrences"] += 1
+                else:
+                    issues[key] = {**issue, "occurrences": 1}
+        
+        error_rate = round(failed_samples / len(outcomes), 4)
+        latency = histogram.summary()
+        result = {
+            "passed": not issues,
+            "samples": len(outcomes),
+            "concurrency": concurrency,
+            "status_counts": status_counts,
+            "error_rate": error_rate,
+            "latency_ms": latency,
+            "issues": list(issues.values())
+        }
+        if validated:
+            result["contract_validation"] = "failed" if contract_failures else "passed"
+            result["contract_failures"] = contract_failures
+        if slo:
+            result["slo"] = evaluate_slo(slo, latency, error_rate)
+            if "error_rate" in slo:
+                result["passed"] = not contract_failures
+            result["passed"] = result["passed"] and result["slo"]["passed"]
+        return result
     
     async def test_fuzzing(
         self,
         endpoint: str,
         method: str,
         headers: Dict[str, str],
-        body: Optional[Dict[str, Any]]
+        body: Optional[Dict[str, Any]],
+        client: Optional[httpx.AsyncClient] = None,
+        schema: Optional[Dict[str, Any]] = None,
+        max_cases: Optional[int] = None
     ) -> Dict[str, Any]:
-        fuzz_payloads = [
-            None,
-            "",
-            "null",
-            "undefined",
-            "<script>alert('xss')</script>",
-            "../../../etc/passwd",
-            "'; DROP TABLE users; --",
-            "\x00\x01\x02",
-            "A" * 10000,
-            {"nested": {"deep": {"value": "test"}}}
-        ]
-        
-        issues = []
-        passed = True
-        
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            for payload in fuzz_payloads:
-                try:
-                    if method.upper() in ["GET", "DELETE"]:
-                        response = await client.request(
-                            method=method,
-                            url=endpoint,
-                            headers=headers or {}
-                        )
-                    else:
-                        response = await client.request(
-                            method=method,
-                            url=endpoint,
-                            headers=headers or {},
-                            json=payload if payload is not None else body
-                        )
-                    
-                    if response.status_code == 500:
-                        issues.append({
-                            "type": "server_error",
-                            "payload": str(payload)[:100],
-                            "status_code": 500
-                        })
-                        passed = False
-                    elif response.status_code == 400 and payload is None:
-                        pass
-                except Exception as e:
-                    issues.append({
-                        "type": "exception",
-                        "payload": str(payload)[:100],
-                        "message": str(e)
-                    })
-        
-        return {
-            "passed": passed,
-            "payloads_tested": len(fuzz_payloads),
-            "issues_found": len(issues),
-            "issues": issues[:10]
-        }
+        cases = self.fuzz_cases(method, body, schema, max_cases)
+        
+        async with self.client_scope(client) as client:
+            engine = FuzzingEngine(client, endpoint, method, headers)
+            result = await engine.run(cases)
+        
+        result["issues"] = result["issues"][:10]
+        return result
+    
+    def fuzz_cases(
+        self,
+        method: str,
+        body: Optional[Dict[str, Any]],
+        schema: Optional[Dict[str, Any]] = None,
+        max_cases: Optional[int] = None
+    ) -> List[FuzzCase]:
+        location = "query" if method.upper() in ["GET", "DELETE"] else "json"
+        return MutationGenerator(body, schema, location, max_cases).cases()
     
     async def test_rate_limiting(
         self,
@@ -179,45 +320,36 @@ class APISecurityTester:
         method: str,
         headers: Dict[str, str],
         body: Optional[Dict[str, Any]],
-        threshold: int = 100
+        threshold: int = 100,
+        client: Optional[httpx.AsyncClient] = None,
+        load_profile: Optional[Dict[str, Any]] = None,
+        find_limit: bool = False
     ) -> Dict[str, Any]:
-        requests_sent = 0
-        rate_limited = False
-        start_time = time.time()
-        
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            tasks = []
-            for i in range(min(threshold + 10, 150)):
-                if method.upper() in ["GET", "DELETE"]:
-                    task = client.request(method=method, url=endpoint, headers=headers or {})
-                else:
-                    task = client.request(
-                        method=method,
-                        url=endpoint,
-                        headers=headers or {},
-                        json=body
-                    )
-                tasks.append(task)
-                requests_sent += 1
-            
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for response in responses:
-                if isinstance(response, httpx.Response):
-                    if response.status_code == 429:
-                        rate_limited = True
-                        break
+        profile = self.rate_limit_profile(threshold, load_profile)
         
-        elapsed = time.time() - start_time
-        requests_per_second = requests_sent / elapsed if elapsed > 0 else 0
+        async with self.client_scope(client) as client:
+            generator = OpenLoopLoadGenerator(client, endpoint, method, headers, body)
+            load = await generator.run(profile)
+            limit_search = None
+            if find_limit:
+                await asyncio.sleep(settings.LOAD_TEST_PROBE_COOLDOWN_SECONDS)
+                limit_search = await generator.find_rate_limit(start_rps=max(1.0, load["target_rps"] / 2))
         
-        return {
+        rate_limited = load["limited_responses"] > 0
+        result = {
             "passed": rate_limited,
-            "requests_sent": requests_sent,
-            "requests_per_second": round(requests_per_second, 2),
             "rate_limited": rate_limited,
             "threshold": threshold,
-            "elapsed_seconds": round(elapsed, 2)
+            "requests_per_second": load["achieved_rps"],
+            **load
         }
-
-
+        if limit_search is not None:
+            result["limit_search"] = limit_search
+        return result
+    
+    def rate_limit_profile(self, threshold: int, load_profile: Optional[Dict[str, Any]] = None) -> LoadProfile:
+        if load_profile:
+            return LoadProfile.from_config(load_profile)
+        burst = (threshold or 100) + 10
+        rps = min(burst, settings.LOAD_TEST_MAX_RPS)
+        return LoadProfile.constant(rps, math.ceil(burst / rps))
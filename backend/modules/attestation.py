@@ -0,0 +1,213 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DSSE_PAYLOAD_TYPE = "application/vnd.in-toto+json"
+IN_TOTO_STATEMENT_TYPE = "https://in-toto.io/Statement/v1"
+
+
+def pae(payload_type: str, payload: bytes) -> bytes:
+    payload_type_bytes = payload_type.encode()
+    return b"DSSEv1 %d %s %d %s" % (
+        len(payload_type_bytes), payload_type_bytes, len(payload), payload
+    )
+
+
+class AttestationSigner:
+    def __init__(self, keystore_path: Optional[str] = None):
+        self.keystore_path = keystore_path or settings.ATTESTATION_KEYSTORE_PATH
+        self.private_keys: Dict[str, Any] = {}
+        self.public_keys: Dict[str, Any] = {}
+        self.default_key_id: Optional[str] = None
+        self._load_keys()
+    
+    def _load_keys(self):
+        os.makedirs(self.keystore_path, exist_ok=True)
+        password = settings.ATTESTATION_KEY_PASSWORD.encode() if settings.ATTESTATION_KEY_PASSWORD else None
+        
+        for filename in sorted(os.listdir(self.keystore_path)):
+            if not filename.endswith(".pem"):
+                continue
+            
+            with open(os.path.join(self.keystore_path, filename), "rb") as f:
+                pem = f.read()
+            
+            try:
+                if b"PRIVATE KEY" in pem:
+                    private_key = serialization.load_pem_private_key(pem, password=password)
+                    self._add_key(private_key.public_key(), private_key)
+                else:
+                    self._add_key(serialization.load_pem_public_key(pem))
+            except (ValueError, TypeError) as e:
+                logger.error(f"Skipping unreadable key {filename}: {e}")
+        
+        if not self.private_keys:
+            logger.warning(
+                f"No signing key found in {self.keystore_path}, generating an Ed25519 key. "
+                "Provision a managed key for production."
+            )
+            private_key = self._create_fallback_key(os.path.join(self.keystore_path, "attestation-ed25519.pem"))
+            self._add_key(private_key.public_key(), private_key)
+        
+        configured = settings.ATTESTATION_KEY_ID
+        if configured and configured not in self.private_keys:
+            raise ValueError(f"Configured attestation key '{configured}' not found in keystore")
+        self.default_key_id = configured or next(iter(self.private_keys))
+        
+        logger.info(f"Loaded {len(self.public_keys)} attestation keys, signing with {self.default_key_id}")
+    
+    def _create_fallback_key(self, key_path: str):
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        fd, temp_path = tempfile.mkstemp(dir=self.keystore_path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(private_key.private_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PrivateFormat.PKCS8,
+                    encryption_algorithm=serialization.NoEncryption()
+                ))
+            try:
+                os.link(temp_path, key_path)
+            except FileExistsError:
+                logger.info(f"Another worker created {key_path} first, loading it")
+                with open(key_path, "rb") as f:
+                    return serialization.load_pem_private_key(f.read(), password=None)
+        finally:
+            os.unlink(temp_path)
+        return private_key
+    
+    def _add_key(self, public_key, private_key=None):
+        if not isinstance(public_key, (ed25519.Ed25519PublicKey, rsa.RSAPublicKey)):
+            raise ValueError("Only Ed25519 and RSA keys are supported")
+        
+        der = public_key.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        key_id = hashlib.sha256(der).hexdigest()
+        self.public_keys[key_id] = public_key
+        if private_key is not None:
+            self.private_keys[key_id] = private_key
+    
+    def _rsa_padding(self):
+        return padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.DIGEST_LENGTH)
+    
+    def sign(self, statement: Dict[str, Any], key_id: Optional[str] = None) -> Dict[str, Any]:
+        key_id = key_id or self.default_key_id
+        private_key = self.private_keys.get(key_id)
+        if private_key is None:
+            raise ValueError(f"Signing key '{key_id}' not available")
+        
+        payload = json.dumps(statement, sort_keys=True, separators=(",", ":")).encode()
+        message = pae(DSSE_PAYLOAD_TYPE, payload)
+        
+        if isinstance(private_key, rsa.RSAPrivateKey):
+            signature = private_key.sign(message, self._rsa_padding(), hashes.SHA256())
+        else:
+            signature = private_key.sign(message)
+        
+        return {
+            "payloadType": DSSE_PAYLOAD_TYPE,
+            "payload": base64.b64encode(payload).decode(),
+            "signatures": [
+                {
+                    "keyid": key_id,
+                    "sig": base64.b64encode(signature).decode()
+                }
+            ]
+        }
+    
+    def sign_many(
+        self,
+        statements: List[Dict[str, Any]],
+        key_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return [self.sign(statement, key_id) for statement in statements]
+    
+    def verify(self, envelope: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            payload_type = envelope["payloadType"]
+            payload = base64.b64decode(envelope["payload"])
+            signatures = envelope.get("signatures", [])
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return {"verified": False, "error": f"Malformed envelope: {e}"}
+        if not isinstance(signatures, list):
+            return {"verified": False, "error": "Malformed envelope: signatures must be a list"}
+        
+        message = pae(payload_type, payload)
+        
+        for signature in signatures:
+            if not isinstance(signature, dict):
+                continue
+            try:
+                sig = base64.b64decode(signature.get("sig", ""))
+            except (TypeError, ValueError):
+                continue
+            
+            candidates = (
+                [signature["keyid"]] if signature.get("keyid") in self.public_keys
+                else list(self.public_keys)
+            )
+            for key_id in candidates:
+                if self._verify_signature(self.public_keys[key_id], sig, message):
+                    try:
+                        statement = json.loads(payload)
+                    except ValueError:
+                        statement = None
+                    return {
+                        "verified": True,
+                        "key_id": key_id,
+                        "payload_type": payload_type,
+                        "statement": statement
+                    }
+        
+        return {"verified": False, "error": "No valid signature from a trusted key"}
+    
+    def _verify_signature(self, public_key, signature: bytes, message: bytes) -> bool:
+        try:
+            if isinstance(public_key, rsa.RSAPublicKey):
+                public_key.verify(signature, message, self._rsa_padding(), hashes.SHA256())
+            else:
+                public_key.verify(signature, message)
+            return True
+        except InvalidSignature:
+            return False
+    
+    def export_public_keys(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "key_id": key_id,
+                "algorithm": "rsa-pss-sha256" if isinstance(public_key, rsa.RSAPublicKey) else "ed25519",
+                "public_key": public_key.public_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PublicFormat.SubjectPublicKeyInfo
+                ).decode(),
+                "can_sign": key_id in self.private_keys
+            }
+            for key_id, public_key in self.public_keys.items()
+        ]
+
+
+_signer: Optional[AttestationSigner] = None
+_signer_lock = threading.Lock()
+
+
+def get_attestation_signer() -> AttestationSigner:
+    global _signer
+    if _signer is None:
+        with _signer_lock:
+            if _signer is None:
+                _signer = AttestationSigner()
+    return _signer
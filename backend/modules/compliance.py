@@ -1,15 +1,75 @@
-import re
 import json
-from typing import Dict, Any, Optional
+import hashlib
+import threading
+from typing import Dict, Any, Iterable, List, Optional
 from datetime import datetime
+import numpy as np
 import logging
 
+from config import settings
+from modules.license_policy import CompiledLicensePolicy, LicensePolicyEngine
+from modules.rule_dsl import CompiledRule, RuleSyntaxError, compile_rule_or_legacy
+from modules.rule_vectorizer import ColumnFrame, vectorize_rule
+from utils.cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
 
+def normalize_framework(framework: str) -> str:
+    return framework.lower().replace("-", "").replace("_", "")
+
+
+def canonical_json(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def content_hash(data: Any) -> str:
+    return hashlib.sha256(canonical_json(data).encode()).hexdigest()
+
+
+class CompiledPolicy:
+    def __init__(self, name: str, description: str, rule: str, compiled: Optional[CompiledRule], error: Optional[str] = None):
+        self.name = name
+        self.description = description
+        self.rule = rule
+        self.compiled = compiled
+        self.error = error
+        self.reads = compiled.reads if compiled else frozenset()
+        self.keys = compiled.keys if compiled else frozenset()
+        self.vectorized = vectorize_rule(compiled.tree) if compiled else None
+    
+    def evaluate(self, resource_data: Dict[str, Any]) -> bool:
+        if self.compiled is None:
+            return False
+        try:
+            return self.compiled(resource_data)
+        except Exception as e:
+            logger.error(f"Rule evaluation error in {self.name}: {e}")
+            return False
+    
+    def evaluate_frame(self, frame: ColumnFrame) -> np.ndarray:
+        if self.compiled is None:
+            return np.zeros(frame.size, dtype=bool)
+        if self.vectorized is not None:
+            try:
+                verdicts = self.vectorized(frame)
+                if verdicts is not None:
+                    return verdicts
+            except Exception as e:
+                logger.error(f"Vectorized evaluation error in {self.name}, using row engine: {e}")
+        return np.fromiter((self.evaluate(resource_data) for resource_data in frame.resources), dtype=bool, count=frame.size)
+
+
 class ComplianceEngine:
     def __init__(self):
         self.policies = self._load_default_policies()
+        self.license_engine = LicensePolicyEngine()
+        self._rule_cache = LRUCache(settings.COMPLIANCE_RULE_CACHE_SIZE)
+        self._policy_cache = LRUCache(settings.COMPLIANCE_POLICY_CACHE_SIZE)
+        self.compiled_frameworks = {
+            normalize_framework(framework): self.compile_policy_set(framework_policies)
+            for framework, framework_policies in self.policies.items()
+        }
     
     def _load_default_policies(self) -> Dict[str, Dict[str, Any]]:
         return {
@@ -75,52 +135,30 @@ class ComplianceEngine:
         policy_name: Optional[str],
         resource_type: str,
         resource_data: Dict[str, Any],
-        custom_policy: Optional[str] = None
+        custom_policy: Optional[str] = None,
+        policies: Optional[Dict[str, CompiledPolicy]] = None
     ) -> Dict[str, Any]:
-        framework_lower = framework.lower().replace("-", "").replace("_", "")
+        framework_lower = normalize_framework(framework)
+        
+        if framework_lower == "license":
+            return self.check_licenses(resource_data, policy_name, custom_policy)
         
         if custom_policy:
             return self._evaluate_custom_policy(custom_policy, resource_data)
         
-        if framework_lower not in self.policies:
-            return {
-                "status": "error",
-                "message": f"Framework '{framework}' not supported",
-                "supported_frameworks": list(self.policies.keys())
-            }
-        
-        framework_policies = self.policies[framework_lower]
-        
-        if policy_name:
-            if policy_name not in framework_policies:
+        if policies is not None:
+            policies_to_check = policies
+        else:
+            try:
+                policies_to_check = self.get_policy_set(framework, policy_name)
+            except ValueError as e:
                 return {
                     "status": "error",
-                    "message": f"Policy '{policy_name}' not found in framework '{framework}'"
+                    "message": str(e),
+                    "supported_frameworks": list(self.policies.keys())
                 }
-            policies_to_check = {policy_name: framework_policies[policy_name]}
-        else:
-            policies_to_check = framework_policies
-        
-        results = {}
-        all_passed = True
         
-        for policy, policy_def in policies_to_check.items():
-            try:
-                passed = self._evaluate_rule(policy_def["rule"], resource_data)
-                results[policy] = {
-                    "passed": passed,
-                    "description": policy_def["description"],
-                    "rule": policy_def["rule"]
-                }
-                if not passed:
-                    all_passed = False
-            except Exception as e:
-                logger.error(f"Error evaluating policy {policy}: {e}")
-                results[policy] = {
-                    "passed": False,
-                    "error": str(e)
-                }
-                all_passed = False
+        results, all_passed = self._evaluate_policy_set(policies_to_check, resource_data)
         
         return {
             "status": "passed" if all_passed else "failed",
@@ -134,30 +172,143 @@ class ComplianceEngine:
             }
         }
     
-    def _evaluate_rule(self, rule: str, resource_data: Dict[str, Any]) -> bool:
+    def check_licenses(
+        self,
+        sbom_content: Dict[str, Any],
+        policy_name: Optional[str] = None,
+        custom_policy: Optional[str] = None,
+        compiled_policy: Optional[CompiledLicensePolicy] = None
+    ) -> Dict[str, Any]:
         try:
-            safe_dict = {"resource_data": resource_data}
-            return eval(rule, {"__builtins__": {}}, safe_dict)
+            policy_dict = json.loads(custom_policy) if isinstance(custom_policy, str) else custom_policy
+            return self.license_engine.evaluate_sbom(sbom_content, policy_name, policy_dict, compiled_policy)
         except Exception as e:
-            logger.error(f"Rule evaluation error: {e}")
-            return False
+            return {
+                "status": "error",
+                "message": f"License policy evaluation failed: {str(e)}",
+                "supported_policies": list(self.license_engine.policies.keys())
+            }
+    
+    def resolve_policies(
+        self,
+        framework: str,
+        policy_name: Optional[str] = None,
+        custom_policy: Optional[Any] = None
+    ) -> Dict[str, CompiledPolicy]:
+        if custom_policy:
+            return self.get_custom_policy(custom_policy)
+        return self.get_policy_set(framework, policy_name)
+    
+    def policy_set_version(self, policies: Dict[str, CompiledPolicy]) -> str:
+        return hashlib.sha256(
+            "\n".join(f"{name}\x00{policies[name].rule}" for name in sorted(policies)).encode()
+        ).hexdigest()
+    
+    def fingerprint(self, framework: str, policy_set_version: str, evidence_hash: str) -> str:
+        return hashlib.sha256(
+            f"{normalize_framework(framework)}\x00{policy_set_version}\x00{evidence_hash}".encode()
+        ).hexdigest()
+    
+    def get_policy_set(self, framework: str, policy_name: Optional[str] = None) -> Dict[str, CompiledPolicy]:
+        framework_policies = self.compiled_frameworks.get(normalize_framework(framework))
+        if framework_policies is None:
+            raise ValueError(f"Framework '{framework}' not supported")
+        
+        if not policy_name:
+            return framework_policies
+        if policy_name not in framework_policies:
+            raise ValueError(f"Policy '{policy_name}' not found in framework '{framework}'")
+        return {policy_name: framework_policies[policy_name]}
+    
+    def evaluate_batch(
+        self,
+        policies: Dict[str, CompiledPolicy],
+        resources: List[Dict[str, Any]],
+        mode: str = "row"
+    ) -> List[Dict[str, bool]]:
+        if mode == "auto":
+            mode = "columnar" if len(resources) >= settings.COMPLIANCE_COLUMNAR_MIN_ROWS else "row"
+        
+        if mode == "columnar":
+            columns = self.evaluate_columnar(policies, resources)
+            names = list(columns)
+            if not names:
+                return [{} for _ in resources]
+            return [dict(zip(names, row)) for row in zip(*(columns[name].tolist() for name in names))]
+        
+        return [
+            {name: policy.evaluate(resource_data) for name, policy in policies.items()}
+            for resource_data in resources
+        ]
+    
+    def evaluate_columnar(
+        self,
+        policies: Dict[str, CompiledPolicy],
+        resources: List[Dict[str, Any]]
+    ) -> Dict[str, np.ndarray]:
+        frame = ColumnFrame(resources)
+        return {name: policy.evaluate_frame(frame) for name, policy in policies.items()}
+    
+    def compile_policy_set(self, policy_dict: Dict[str, Dict[str, Any]]) -> Dict[str, CompiledPolicy]:
+        compiled_policies = {}
+        for name, policy_def in policy_dict.items():
+            rule = policy_def.get("rule", "")
+            try:
+                compiled, error = self._compile_rule(rule), None
+            except RuleSyntaxError as e:
+                logger.error(f"Rule compilation error in {name}: {e}")
+                compiled, error = None, str(e)
+            compiled_policies[name] = CompiledPolicy(name, policy_def.get("description", ""), rule, compiled, error)
+        return compiled_policies
+    
+    def policies_reading(self, policies: Dict[str, CompiledPolicy], keys: Iterable[str]) -> Dict[str, CompiledPolicy]:
+        keys = set(keys)
+        return {name: policy for name, policy in policies.items() if policy.keys & keys}
+    
+    def get_custom_policy(self, policy: Any) -> Dict[str, CompiledPolicy]:
+        policy_text = policy if isinstance(policy, str) else json.dumps(policy, sort_keys=True)
+        cache_key = hashlib.sha256(policy_text.encode()).hexdigest()
+        
+        compiled = self._policy_cache.get(cache_key)
+        if compiled is None:
+            policy_dict = json.loads(policy_text)
+            compiled = self.compile_policy_set(policy_dict)
+            self._policy_cache.put(cache_key, compiled)
+        return compiled
+    
+    def _compile_rule(self, rule: str) -> CompiledRule:
+        cache_key = hashlib.sha256(rule.encode()).hexdigest()
+        compiled = self._rule_cache.get(cache_key)
+        if compiled is None:
+            compiled = compile_rule_or_legacy(rule)
+            self._rule_cache.put(cache_key, compiled)
+        return compiled
+    
+    def _evaluate_policy_set(
+        self,
+        policies: Dict[str, CompiledPolicy],
+        resource_data: Dict[str, Any]
+    ) -> tuple:
+        results = {}
+        all_passed = True
+        
+        for name, policy in policies.items():
+            passed = policy.evaluate(resource_data)
+            results[name] = {
+                "passed": passed,
+                "description": policy.description,
+                "rule": policy.rule
+            }
+            if policy.error:
+                results[name]["error"] = policy.error
+            if not passed:
+                all_passed = False
+        
+        return results, all_passed
     
     def _evaluate_custom_policy(self, policy: str, resource_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            policy_dict = json.loads(policy) if isinstance(policy, str) else policy
-            results = {}
-            all_passed = True
-            
-            for rule_name, rule_def in policy_dict.items():
-                rule = rule_def.get("rule", "")
-                passed = self._evaluate_rule(rule, resource_data)
-                results[rule_name] = {
-                    "passed": passed,
-                    "description": rule_def.get("description", ""),
-                    "rule": rule
-                }
-                if not passed:
-                    all_passed = False
+            results, all_passed = self._evaluate_policy_set(self.get_custom_policy(policy), resource_data)
             
             return {
                 "status": "passed" if all_passed else "failed",
@@ -175,3 +326,15 @@ class ComplianceEngine:
                 "message": f"Custom policy evaluation failed: {str(e)}"
             }
 
+
+_engine: Optional[ComplianceEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_compliance_engine() -> ComplianceEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ComplianceEngine()
+    return _engine
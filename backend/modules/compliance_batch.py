@@ -0,0 +1,310 @@
+import json
+import time
+from typing import Dict, Any, AsyncIterator, BinaryIO, Callable, Iterable, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+import hashlib
+import logging
+
+from config import settings
+from database import ComplianceCheck, ComplianceRun
+from modules.compliance import CompiledPolicy, ComplianceEngine, canonical_json, get_compliance_engine
+from utils.evidence import store_evidence
+
+logger = logging.getLogger(__name__)
+
+MAX_RECORDED_ERRORS = 100
+
+
+def run_detail_key(run_id: int) -> str:
+    return f"compliance-runs/{run_id}.ndjson"
+
+
+async def iter_ndjson_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    buffer = b""
+    line_number = 0
+    async for chunk in stream:
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        if len(buffer) > settings.COMPLIANCE_BATCH_MAX_LINE_BYTES:
+            raise ValueError(f"NDJSON line {line_number + len(lines) + 1} exceeds {settings.COMPLIANCE_BATCH_MAX_LINE_BYTES} bytes")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+class ComplianceBatchRun:
+    def __init__(
+        self,
+        db: Session,
+        framework: str,
+        policies: Dict[str, CompiledPolicy],
+        policy_name: Optional[str] = None,
+        resource_type: str = "resource",
+        store_results: bool = True,
+        detail_stream: Optional[BinaryIO] = None,
+        user_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        scheduled: bool = False,
+        engine: Optional[ComplianceEngine] = None,
+        chunk_size: Optional[int] = None,
+        mode: str = "auto",
+        reuse: bool = True,
+        result_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ):
+        self.db = db
+        self.framework = framework
+        self.policies = policies
+        self.policy_name = policy_name or "all"
+        self.resource_type = resource_type
+        self.store_results = store_results
+        self.detail_stream = detail_stream
+        self.user_id = user_id
+        self.project_id = project_id
+        self.scheduled = scheduled
+        self.engine = engine or get_compliance_engine()
+        self.chunk_size = chunk_size or settings.COMPLIANCE_BATCH_CHUNK_SIZE
+        self.mode = mode
+        self.reuse = reuse
+        self.result_callback = result_callback
+        self.policy_set_version = self.engine.policy_set_version(policies)
+        
+        self.resources = 0
+        self.passed = 0
+        self.failed = 0
+        self.invalid = 0
+        self.reused = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.policy_counts = {name: {"passed": 0, "failed": 0} for name in policies}
+        self._pending: List[Dict[str, Any]] = []
+        self._started = time.monotonic()
+        
+        self.run = ComplianceRun(
+            framework=framework,
+            policy_name=self.policy_name,
+            status="running",
+            user_id=user_id,
+            project_id=project_id,
+            scheduled=scheduled
+        )
+        db.add(self.run)
+        db.commit()
+        db.refresh(self.run)
+        self.run_id = self.run.id
+    
+    def add_line(self, line_number: int, line: bytes):
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self.add_error(line_number, str(e))
+            return
+        
+        if isinstance(record.get("resource_data"), dict):
+            resource_data = record["resource_data"]
+        else:
+            resource_data = record
+        resource_id = record.get("resource_id", record.get("id"))
+        
+        self.add(
+            resource_data,
+            str(resource_id) if resource_id is not None else f"line-{line_number}",
+            record.get("resource_type")
+        )
+    
+    def add(self, resource_data: Dict[str, Any], resource_id: str, resource_type: Optional[str] = None):
+        self._pending.append({
+            "resource_id": resource_id,
+            "resource_type": resource_type or self.resource_type,
+            "resource_data": resource_data
+        })
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+    
+    def add_error(self, line_number: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_RECORDED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+    
+    async def consume_ndjson(self, stream: AsyncIterator[bytes]):
+        async for line_number, line in iter_ndjson_lines(stream):
+            self.add_line(line_number, line)
+    
+    def consume(self, records: Iterable[Dict[str, Any]]):
+        for line_number, record in enumerate(records, start=1):
+            resource_id = record.get("resource_id", record.get("id"))
+            self.add(
+                record["resource_data"] if isinstance(record.get("resource_data"), dict) else record,
+                str(resource_id) if resource_id is not None else f"line-{line_number}",
+                record.get("resource_type")
+            )
+    
+    def flush(self):
+        if not self._pending:
+            return
+        
+        chunk, self._pending = self._pending, []
+        checked_at = datetime.utcnow()
+        
+        evidence = {}
+        for item in chunk:
+            item["evidence_hash"] = hashlib.sha256(canonical_json(item["resource_data"]).encode()).hexdigest()
+            item["fingerprint"] = self.engine.fingerprint(self.framework, self.policy_set_version, item["evidence_hash"])
+        
+        previous = self._previous_verdicts(chunk) if self.reuse else {}
+        to_evaluate = [item for item in chunk if (item["fingerprint"], item["resource_id"]) not in previous]
+        evaluated = self.engine.evaluate_batch(self.policies, [item["resource_data"] for item in to_evaluate], self.mode)
+        verdicts = {id(item): verdict for item, verdict in zip(to_evaluate, evaluated)}
+        
+        rows = []
+        reused_ids = []
+        results = []
+        
+        for item in chunk:
+            prior = previous.get((item["fingerprint"], item["resource_id"]))
+            if prior is not None:
+                check_id, verdict = prior
+                reused_ids.append(check_id)
+            else:
+                verdict = verdicts[id(item)]
+            
+            failed_policies = [name for name, passed in verdict.items() if not passed]
+            status = "failed" if failed_policies else "passed"
+            
+            self.resources += 1
+            if failed_policies:
+                self.failed += 1
+            else:
+                self.passed += 1
+            for name, passed in verdict.items():
+                self.policy_counts[name]["passed" if passed else "failed"] += 1
+            results.append({
+                "resource_id": item["resource_id"],
+                "status": status,
+                "failed_policies": failed_policies
+            })
+            
+            if self.store_results and prior is None:
+                evidence[item["evidence_hash"]] = item["resource_data"]
+                rows.append({
+                    "framework": self.framework,
+                    "policy_name": self.policy_name,
+                    "status": status,
+                    "details": {
+                        "resource_type": item["resource_type"],
+                        "policies": verdict
+                    },
+                    "evidence": {
+                        "run_id": self.run_id,
+                        "checked_at": str(checked_at)
+                    },
+                    "evidence_hash": item["evidence_hash"],
+                    "fingerprint": item["fingerprint"],
+                    "resource_id": item["resource_id"],
+                    "run_id": self.run_id,
+                    "user_id": self.user_id,
+                    "project_id": self.project_id,
+                    "scheduled": self.scheduled,
+                    "created_at": checked_at,
+                    "last_checked_at": checked_at
+                })
+            
+            if self.detail_stream is not None:
+                self.detail_stream.write(json.dumps({
+                    "resource_id": item["resource_id"],
+                    "resource_type": item["resource_type"],
+                    "status": status,
+                    "failed_policies": failed_policies,
+                    "reused": prior is not None
+                }).encode() + b"\n")
+        
+        self.reused += len(reused_ids)
+        
+        if self.result_callback is not None:
+            self.result_callback(results)
+        
+        if self.store_results:
+            store_evidence(self.db, evidence)
+            if reused_ids:
+                self.db.execute(
+                    update(ComplianceCheck)
+                    .where(ComplianceCheck.id.in_(reused_ids))
+                    .values(last_checked_at=checked_at)
+                )
+            if rows:
+                self.db.bulk_insert_mappings(ComplianceCheck, rows)
+            self.db.commit()
+    
+    def _previous_verdicts(self, chunk: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Tuple[int, Dict[str, bool]]]:
+        fingerprints = {item["fingerprint"] for item in chunk}
+        rows = (
+            self.db.query(ComplianceCheck.id, ComplianceCheck.fingerprint, ComplianceCheck.resource_id, ComplianceCheck.details)
+            .filter(ComplianceCheck.fingerprint.in_(fingerprints))
+            .order_by(ComplianceCheck.id)
+            .all()
+        )
+        
+        previous = {}
+        for row in rows:
+            policies = (row.details or {}).get("policies", {})
+            verdict = {
+                name: bool(value.get("passed") if isinstance(value, dict) else value)
+                for name, value in policies.items()
+            }
+            if set(verdict) == set(self.policies):
+                previous[(row.fingerprint, row.resource_id)] = (row.id, verdict)
+        return previous
+    
+    def finish(self, detail_key: Optional[str] = None) -> Dict[str, Any]:
+        self.flush()
+        
+        summary = self.summary()
+        self.run.status = summary["status"]
+        self.run.resource_count = self.resources
+        self.run.passed_count = self.passed
+        self.run.failed_count = self.failed
+        self.run.summary = summary
+        self.run.detail_key = detail_key
+        self.run.completed_at = datetime.utcnow()
+        self.db.commit()
+        
+        logger.info(f"Compliance run {self.run_id}: {self.resources} resources, {self.failed} failed in {summary['duration_ms']}ms")
+        return summary
+    
+    def abort(self, message: str):
+        self.db.rollback()
+        self.run.status = "error"
+        self.run.summary = {**self.summary(), "status": "error", "message": message}
+        self.run.completed_at = datetime.utcnow()
+        self.db.commit()
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "status": "failed" if self.failed else "passed",
+            "framework": self.framework,
+            "policy_name": self.policy_name,
+            "mode": self.mode,
+            "resources": self.resources,
+            "passed": self.passed,
+            "failed": self.failed,
+            "invalid": self.invalid,
+            "reused": self.reused,
+            "errors": self.errors,
+            "policies": {
+                name: {
+                    "description": policy.description,
+                    "passed": self.policy_counts[name]["passed"],
+                    "failed": self.policy_counts[name]["failed"],
+                    "pass_rate": round(self.policy_counts[name]["passed"] / self.resources, 4) if self.resources else None
+                }
+                for name, policy in self.policies.items()
+            },
+            "duration_ms": round((time.monotonic() - self._started) * 1000, 1)
+        }
@@ -0,0 +1,183 @@
+from typing import Dict, Any, Iterable, List, Optional, Set
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+import logging
+
+from database import ComplianceResourceState, ComplianceRollup
+from modules.compliance import ComplianceEngine, get_compliance_engine, normalize_framework
+
+logger = logging.getLogger(__name__)
+
+
+def merge_patch(target: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    result = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge_patch(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+class ComplianceStateTracker:
+    def __init__(self, db: Session, engine: Optional[ComplianceEngine] = None):
+        self.db = db
+        self.engine = engine or get_compliance_engine()
+    
+    def resolve_frameworks(self, frameworks: Optional[Iterable[str]] = None) -> List[str]:
+        known = {normalize_framework(name): name for name in self.engine.policies}
+        if not frameworks:
+            return list(known.values())
+        
+        resolved = []
+        for framework in frameworks:
+            name = known.get(normalize_framework(framework))
+            if name is None:
+                raise ValueError(f"Framework '{framework}' not supported")
+            resolved.append(name)
+        return resolved
+    
+    def apply_patch(
+        self,
+        resource_id: str,
+        patch: Dict[str, Any],
+        frameworks: Optional[Iterable[str]] = None,
+        resource_type: Optional[str] = None,
+        project_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        framework_names = self.resolve_frameworks(frameworks)
+        for attempt in range(2):
+            try:
+                return self._apply_patch(resource_id, patch, framework_names, resource_type, project_id)
+            except IntegrityError:
+                self.db.rollback()
+                if attempt:
+                    raise
+    
+    def _apply_patch(
+        self,
+        resource_id: str,
+        patch: Dict[str, Any],
+        framework_names: List[str],
+        resource_type: Optional[str],
+        project_id: Optional[int]
+    ) -> Dict[str, Any]:
+        states = {
+            state.framework: state
+            for state in self.db.query(ComplianceResourceState)
+            .filter(
+                ComplianceResourceState.resource_id == resource_id,
+                ComplianceResourceState.framework.in_(framework_names)
+            )
+            .with_for_update()
+            .all()
+        }
+        
+        results = {}
+        changed_keys: Set[str] = set()
+        
+        for framework in framework_names:
+            policies = self.engine.get_policy_set(framework)
+            version = self.engine.policy_set_version(policies)
+            state = states.get(framework)
+            
+            previous_data = state.resource_data if state else {}
+            resource_data = merge_patch(previous_data, patch)
+            framework_changed = {
+                key for key in set(previous_data) | set(resource_data)
+                if previous_data.get(key) != resource_data.get(key)
+            }
+            changed_keys |= framework_changed
+            
+            if state is None or state.policy_set_version != version:
+                to_evaluate = policies
+            else:
+                to_evaluate = self.engine.policies_reading(policies, framework_changed)
+            
+            previous_verdicts = dict(state.verdicts) if state else {}
+            verdicts = {name: previous_verdicts[name] for name in policies if name in previous_verdicts}
+            for name, policy in to_evaluate.items():
+                verdicts[name] = policy.evaluate(resource_data)
+            status = "passed" if all(verdicts.values()) else "failed"
+            
+            if state is None:
+                state = ComplianceResourceState(resource_id=resource_id, framework=framework, project_id=project_id)
+                self.db.add(state)
+            state.resource_data = resource_data
+            state.verdicts = verdicts
+            state.policy_set_version = version
+            previous_status, state.status = state.status, status
+            if resource_type:
+                state.resource_type = resource_type
+            
+            if verdicts != previous_verdicts or status != previous_status:
+                self._adjust_rollup(framework, previous_verdicts, verdicts, previous_status, status)
+            
+            results[framework] = {
+                "status": status,
+                "previous_status": previous_status,
+                "evaluated_policies": sorted(to_evaluate),
+                "changed_policies": sorted(
+                    name for name in verdicts if previous_verdicts.get(name) != verdicts[name]
+                )
+            }
+        
+        self.db.commit()
+        
+        return {
+            "resource_id": resource_id,
+            "changed_keys": sorted(changed_keys),
+            "frameworks": results
+        }
+    
+    def remove_resource(self, resource_id: str) -> int:
+        states = (
+            self.db.query(ComplianceResourceState)
+            .filter(ComplianceResourceState.resource_id == resource_id)
+            .with_for_update()
+            .all()
+        )
+        for state in states:
+            self._adjust_rollup(state.framework, state.verdicts or {}, {}, state.status, None)
+            self.db.delete(state)
+        self.db.commit()
+        return len(states)
+    
+    def _adjust_rollup(
+        self,
+        framework: str,
+        previous_verdicts: Dict[str, bool],
+        verdicts: Dict[str, bool],
+        previous_status: Optional[str],
+        status: Optional[str]
+    ):
+        rollup = (
+            self.db.query(ComplianceRollup)
+            .filter(ComplianceRollup.framework == framework)
+            .with_for_update()
+            .first()
+        )
+        if rollup is None:
+            rollup = ComplianceRollup(
+                framework=framework,
+                resource_count=0,
+                passed_count=0,
+                failed_count=0,
+                policy_counts={}
+            )
+            self.db.add(rollup)
+        
+        rollup.resource_count += (status is not None) - (previous_status is not None)
+        rollup.passed_count += (status == "passed") - (previous_status == "passed")
+        rollup.failed_count += (status == "failed") - (previous_status == "failed")
+        
+        policy_counts = {name: dict(counts) for name, counts in (rollup.policy_counts or {}).items()}
+        for name in set(previous_verdicts) | set(verdicts):
+            counts = policy_counts.setdefault(name, {"passed": 0, "failed": 0})
+            if name in previous_verdicts:
+                counts["passed" if previous_verdicts[name] else "failed"] -= 1
+            if name in verdicts:
+                counts["passed" if verdicts[name] else "failed"] += 1
+        rollup.policy_counts = policy_counts
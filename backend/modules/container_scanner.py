@@ -1,81 +1,271 @@
-import subprocess
+import asyncio
 import json
+import os
+import secrets
+import signal
+import threading
+import time
+import weakref
 import logging
-from typing import Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, List, Optional, Set, Tuple
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from config import settings
+from modules.vex import VEXIndex, get_vex_index, normalize_purl
 
 logger = logging.getLogger(__name__)
 
 
+SCAN_SLOTS_KEY = "container-scan:slots"
+SCAN_WAITERS_KEY = "container-scan:waiters"
+SLOT_POLL_SECONDS = 0.5
+SLOT_LEASE_GRACE_SECONDS = 60
+WAITER_TTL_SECONDS = 10
+
+ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+    return 1
+end
+return 0
+"""
+
+
+_active_process_groups: Set[int] = set()
+_previous_sigterm_handler: Any = None
+_sigterm_handler_installed = False
+
+
+def _kill_active_process_groups(signum, frame):
+    for pgid in list(_active_process_groups):
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    _active_process_groups.clear()
+    
+    if callable(_previous_sigterm_handler):
+        _previous_sigterm_handler(signum, frame)
+    elif _previous_sigterm_handler != signal.SIG_IGN:
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+
+def _install_sigterm_handler():
+    global _previous_sigterm_handler, _sigterm_handler_installed
+    if _sigterm_handler_installed or threading.current_thread() is not threading.main_thread():
+        return
+    _previous_sigterm_handler = signal.signal(signal.SIGTERM, _kill_active_process_groups)
+    _sigterm_handler_installed = True
+
+
+class ScanQueueFullError(ValueError):
+    pass
+
+
+class ScanLimiter:
+    def __init__(self, max_concurrent: int, max_queued: int, lease_seconds: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.waiting = 0
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrent)
+        return semaphore
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        client = aioredis.from_url(settings.REDIS_URL)
+        try:
+            token = await self._acquire_shared(client)
+        except RedisError as e:
+            logger.warning(f"Redis not available, container scan limit is per-worker: {e}")
+            await client.aclose()
+            async with self._local_slot():
+                yield
+            return
+        except BaseException:
+            await client.aclose()
+            raise
+        
+        try:
+            yield
+        finally:
+            try:
+                await client.zrem(SCAN_SLOTS_KEY, token)
+            except RedisError as e:
+                logger.warning(f"Failed to release container scan slot {token}, it expires in {self.lease_seconds}s: {e}")
+            await client.aclose()
+    
+    async def _acquire_shared(self, client: aioredis.Redis) -> str:
+        token = secrets.token_hex(16)
+        acquire = client.register_script(ACQUIRE_SLOT_SCRIPT)
+        try:
+            while True:
+                now = time.time()
+                if await acquire(keys=[SCAN_SLOTS_KEY], args=[now, self.max_concurrent, now + self.lease_seconds, token]):
+                    return token
+                
+                async with client.pipeline(transaction=True) as pipe:
+                    _, _, waiting = await (
+                        pipe.zremrangebyscore(SCAN_WAITERS_KEY, "-inf", now)
+                        .zadd(SCAN_WAITERS_KEY, {token: now + WAITER_TTL_SECONDS})
+                        .zcard(SCAN_WAITERS_KEY)
+                        .execute()
+                    )
+                if waiting > self.max_queued:
+                    raise ScanQueueFullError(f"Container scan queue is full ({self.max_queued} waiting), retry later")
+                await asyncio.sleep(SLOT_POLL_SECONDS)
+        finally:
+            try:
+                await asyncio.shield(client.zrem(SCAN_WAITERS_KEY, token))
+            except RedisError:
+                pass
+    
+    @asynccontextmanager
+    async def _local_slot(self) -> AsyncIterator[None]:
+        if self.waiting >= self.max_queued:
+            raise ScanQueueFullError(f"Container scan queue is full ({self.max_queued} waiting), retry later")
+        
+        semaphore = self._semaphore()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+_limiter: Optional[ScanLimiter] = None
+
+
+def get_scan_limiter() -> ScanLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = ScanLimiter(
+            settings.CONTAINER_SCAN_MAX_CONCURRENT,
+            settings.CONTAINER_SCAN_MAX_QUEUED,
+            settings.CONTAINER_SCAN_TIMEOUT_SECONDS + SLOT_LEASE_GRACE_SECONDS
+        )
+    return _limiter
+
+
 class ContainerScanner:
-    def __init__(self):
+    def __init__(self, vex_index: Optional[VEXIndex] = None, limiter: Optional[ScanLimiter] = None):
         self.scan_tool = "trivy"
+        self.vex_index = vex_index or get_vex_index()
+        self.limiter = limiter or get_scan_limiter()
+        self.timeout = settings.CONTAINER_SCAN_TIMEOUT_SECONDS
     
     async def scan_image(
         self,
         image_name: str,
         image_tag: str = "latest"
     ) -> Dict[str, Any]:
+        queued = time.perf_counter()
+        try:
+            async with self.limiter.slot():
+                return await self._scan_with_slot(image_name, image_tag, round(time.perf_counter() - queued, 3))
+        except ScanQueueFullError as e:
+            return self._error(image_name, image_tag, str(e))
+    
+    async def _scan_with_slot(self, image_name: str, image_tag: str, queued_seconds: float) -> Dict[str, Any]:
         full_image = f"{image_name}:{image_tag}"
-        
         try:
-            result = subprocess.run(
-                ["trivy", "image", "--format", "json", full_image],
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            try:
+                returncode, stdout, stderr = await self._run_trivy(full_image)
+            except FileNotFoundError:
+                logger.warning("Trivy not found, using fallback scanning")
+                return await self._fallback_scan(image_name, image_tag)
+            except asyncio.TimeoutError:
+                logger.error(f"Container scan of {full_image} timed out after {self.timeout}s")
+                return self._error(image_name, image_tag, f"Trivy timed out after {self.timeout}s")
+            
+            if returncode != 0:
+                return self._error(image_name, image_tag, stderr.decode("utf-8", errors="replace"))
+            
+            data = await asyncio.to_thread(json.loads, stdout)
+            vulnerabilities, suppressed = self._parse_trivy_output(data)
+            risk_score = self._calculate_risk_score(vulnerabilities)
             
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                vulnerabilities = self._parse_trivy_output(data)
-                risk_score = self._calculate_risk_score(vulnerabilities)
-                
-                return {
-                    "image_name": image_name,
-                    "image_tag": image_tag,
-                    "digest": data.get("ArtifactName", ""),
-                    "vulnerabilities": vulnerabilities,
-                    "risk_score": risk_score,
-                    "status": "completed"
-                }
-            else:
-                return {
-                    "image_name": image_name,
-                    "image_tag": image_tag,
-                    "vulnerabilities": [],
-                    "risk_score": 0.0,
-                    "status": "error",
-                    "error": result.stderr
-                }
-        except FileNotFoundError:
-            logger.warning("Trivy not found, using fallback scanning")
-            return await self._fallback_scan(image_name, image_tag)
-        except Exception as e:
-            logger.error(f"Container scan failed: {e}")
             return {
                 "image_name": image_name,
                 "image_tag": image_tag,
-                "vulnerabilities": [],
-                "risk_score": 0.0,
-                "status": "error",
-                "error": str(e)
+                "digest": data.get("ArtifactName", ""),
+                "vulnerabilities": vulnerabilities,
+                "risk_score": risk_score,
+                "suppressed_count": suppressed,
+                "queued_seconds": queued_seconds,
+                "status": "completed"
             }
+        except Exception as e:
+            logger.error(f"Container scan failed: {e}")
+            return self._error(image_name, image_tag, str(e))
+    
+    async def _run_trivy(self, full_image: str) -> Tuple[int, bytes, bytes]:
+        _install_sigterm_handler()
+        process = await asyncio.create_subprocess_exec(
+            self.scan_tool, "image", "--format", "json", full_image,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        _active_process_groups.add(process.pid)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except BaseException:
+            await self._kill(process)
+            raise
+        finally:
+            _active_process_groups.discard(process.pid)
+        return process.returncode, stdout, stderr
+    
+    async def _kill(self, process: asyncio.subprocess.Process):
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        await asyncio.shield(process.wait())
+    
+    def _error(self, image_name: str, image_tag: str, error: str) -> Dict[str, Any]:
+        return {
+            "image_name": image_name,
+            "image_tag": image_tag,
+            "vulnerabilities": [],
+            "risk_score": 0.0,
+            "status": "error",
+            "error": error
+        }
     
-    def _parse_trivy_output(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _parse_trivy_output(self, data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
         vulnerabilities = []
         
         for result in data.get("Results", []):
             for vuln in result.get("Vulnerabilities", []):
+                purl = vuln.get("PkgIdentifier", {}).get("PURL", "")
                 vulnerabilities.append({
                     "id": vuln.get("VulnerabilityID", ""),
                     "package": vuln.get("PkgName", ""),
+                    "purl": normalize_purl(purl) if purl else "",
                     "severity": vuln.get("Severity", ""),
                     "title": vuln.get("Title", ""),
                     "description": vuln.get("Description", ""),
                     "cvss_score": vuln.get("CVSS", {}).get("nvd", {}).get("V3Score", 0.0)
                 })
         
-        return vulnerabilities
+        return self.vex_index.filter(vulnerabilities)
     
     def _calculate_risk_score(self, vulnerabilities: List[Dict[str, Any]]) -> float:
         if not vulnerabilities:
@@ -6,33 +6,113 @@ import logging
 
 from config import settings
 from modules.vulnerability_cache import VulnerabilityCache
+from modules.vex import VEXIndex, get_vex_index, package_purl
 
 logger = logging.getLogger(__name__)
 
 
 class DependencyAnalyzer:
-    def __init__(self):
+    def __init__(self, vex_index: Optional[VEXIndex] = None):
         self.nvd_api_url = settings.NVD_API_URL
         self.osv_api_url = settings.OSV_API_URL
         self.timeout = 30.0
         self.cache = VulnerabilityCache()
+        self.vex_index = vex_index or get_vex_index()
     
     async def analyze_package(
         self,
         package_name: str,
         version: str,
-        ecosystem: str = "npm"
+        ecosystem: str = "npm",
+        client: Optional[httpx.AsyncClient] = None
     ) -> Dict[str, Any]:
         cached = self.cache.get(package_name, version, ecosystem)
         if cached:
-            return {**cached, "cached": True}
+            return self._apply_vex({**cached, "cached": True})
         
+        return self._apply_vex(await self._analyze_uncached(package_name, version, ecosystem, client))
+    
+    async def analyze_packages(
+        self,
+        packages: List[Dict[str, str]],
+        concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        keys = [
+            (p.get("name", ""), p.get("version", "latest"), p.get("ecosystem", "npm"))
+            for p in packages
+        ]
+        results: List[Optional[Dict[str, Any]]] = [
+            {**cached, "cached": True} if cached else None
+            for cached in self.cache.get_many(keys)
+        ]
+        
+        pending: Dict[tuple, List[int]] = {}
+        for index, key in enumerate(keys):
+            if results[index] is None:
+                pending.setdefault(key, []).append(index)
+        
+        if pending:
+            concurrency = concurrency or settings.VULN_LOOKUP_CONCURRENCY
+            semaphore = asyncio.Semaphore(concurrency)
+            limits = httpx.Limits(max_connections=concurrency)
+            
+            async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+                async def lookup(key: tuple) -> Dict[str, Any]:
+                    async with semaphore:
+                        return await self._analyze_uncached(*key, client=client)
+                
+                lookups = await asyncio.gather(
+                    *(lookup(key) for key in pending),
+                    return_exceptions=True
+                )
+            
+            for key, result in zip(pending, lookups):
+                if isinstance(result, Exception):
+                    logger.error(f"Vulnerability lookup failed for {key[0]}: {result}")
+                    result = {
+                        "package_name": key[0],
+                        "version": key[1],
+                        "ecosystem": key[2],
+                        "error": str(result)
+                    }
+                for index in pending[key]:
+                    results[index] = result
+        
+        return [self._apply_vex(result) for result in results]
+    
+    def _apply_vex(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        vulnerabilities = result.get("vulnerabilities")
+        if not vulnerabilities:
+            return result
+        
+        purl = package_purl(result["package_name"], result["version"], result["ecosystem"])
+        kept, suppressed = self.vex_index.filter(vulnerabilities, purl)
+        if not suppressed:
+            return result
+        
+        risk_score = self._calculate_risk_score(kept)
+        return {
+            **result,
+            "vulnerabilities": kept,
+            "vulnerability_count": len(kept),
+            "risk_score": risk_score,
+            "risk_level": self._get_risk_level(risk_score),
+            "suppressed_count": suppressed
+        }
+    
+    async def _analyze_uncached(
+        self,
+        package_name: str,
+        version: str,
+        ecosystem: str,
+        client: Optional[httpx.AsyncClient] = None
+    ) -> Dict[str, Any]:
         vulnerabilities = []
         
-        osv_vulns = await self._check_osv(package_name, version, ecosystem)
+        osv_vulns = await self._check_osv(package_name, version, ecosystem, client)
         vulnerabilities.extend(osv_vulns)
         
-        nvd_vulns = await self._check_nvd(package_name, version)
+        nvd_vulns = await self._check_nvd(package_name, version, client)
         vulnerabilities.extend(nvd_vulns)
         
         risk_score = self._calculate_risk_score(vulnerabilities)
@@ -56,45 +136,49 @@ class DependencyAnalyzer:
         self,
         package_name: str,
         version: str,
-        ecosystem: str
+        ecosystem: str,
+        client: Optional[httpx.AsyncClient] = None
     ) -> List[Dict[str, Any]]:
-        try:
+        if client is None:
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                payload = {
-                    "package": {
-                        "name": package_name,
-                        "ecosystem": ecosystem
-                    },
-                    "version": version
-                }
-                
-                response = await client.post(
-                    f"{self.osv_api_url}",
-                    json=payload
-                )
+                return await self._check_osv(package_name, version, ecosystem, client)
+        
+        try:
+            payload = {
+                "package": {
+                    "name": package_name,
+                    "ecosystem": ecosystem
+                },
+                "version": version
+            }
+            
+            response = await client.post(
+                f"{self.osv_api_url}",
+                json=payload
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                vulns = []
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    vulns = []
-                    
-                    for vuln in data.get("vulns", []):
-                        severity_score = 0.0
-                        if "database_specific" in vuln and "severity" in vuln["database_specific"]:
-                            severity = vuln["database_specific"]["severity"]
-                            if isinstance(severity, list) and len(severity) > 0:
-                                if "score" in severity[0]:
-                                    severity_score = float(severity[0]["score"])
-                        
-                        vulns.append({
-                            "id": vuln.get("id", ""),
-                            "summary": vuln.get("summary", ""),
-                            "severity": severity_score,
-                            "source": "OSV",
-                            "published": vuln.get("published", ""),
-                            "modified": vuln.get("modified", "")
-                        })
+                for vuln in data.get("vulns", []):
+                    severity_score = 0.0
+                    if "database_specific" in vuln and "severity" in vuln["database_specific"]:
+                        severity = vuln["database_specific"]["severity"]
+                        if isinstance(severity, list) and len(severity) > 0:
+                            if "score" in severity[0]:
+                                severity_score = float(severity[0]["score"])
                     
-                    return vulns
+                    vulns.append({
+                        "id": vuln.get("id", ""),
+                        "summary": vuln.get("summary", ""),
+                        "severity": severity_score,
+                        "source": "OSV",
+                        "published": vuln.get("published", ""),
+                        "modified": vuln.get("modified", "")
+                    })
+                
+                return vulns
         except Exception as e:
             logger.error(f"OSV check failed for {package_name}: {e}")
         
@@ -103,47 +187,51 @@ class DependencyAnalyzer:
     async def _check_nvd(
         self,
         package_name: str,
-        version: str
+        version: str,
+        client: Optional[httpx.AsyncClient] = None
     ) -> List[Dict[str, Any]]:
-        try:
+        if client is None:
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                query = f"{package_name} {version}"
-                params = {
-                    "keywordSearch": query,
-                    "resultsPerPage": 20
-                }
-                
-                response = await client.get(
-                    self.nvd_api_url,
-                    params=params
-                )
+                return await self._check_nvd(package_name, version, client)
+        
+        try:
+            query = f"{package_name} {version}"
+            params = {
+                "keywordSearch": query,
+                "resultsPerPage": 20
+            }
+            
+            response = await client.get(
+                self.nvd_api_url,
+                params=params
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                vulns = []
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    vulns = []
+                for item in data.get("vulnerabilities", []):
+                    cve = item.get("cve", {})
+                    metrics = cve.get("metrics", {})
                     
-                    for item in data.get("vulnerabilities", []):
-                        cve = item.get("cve", {})
-                        metrics = cve.get("metrics", {})
-                        
-                        cvss_score = 0.0
-                        if "cvssMetricV31" in metrics:
-                            cvss_data = metrics["cvssMetricV31"][0]
-                            cvss_score = float(cvss_data.get("cvssData", {}).get("baseScore", 0.0))
-                        elif "cvssMetricV2" in metrics:
-                            cvss_data = metrics["cvssMetricV2"][0]
-                            cvss_score = float(cvss_data.get("cvssData", {}).get("baseScore", 0.0))
-                        
-                        vulns.append({
-                            "id": cve.get("id", ""),
-                            "summary": cve.get("descriptions", [{}])[0].get("value", ""),
-                            "severity": cvss_score,
-                            "source": "NVD",
-                            "published": cve.get("published", ""),
-                            "modified": cve.get("lastModified", "")
-                        })
+                    cvss_score = 0.0
+                    if "cvssMetricV31" in metrics:
+                        cvss_data = metrics["cvssMetricV31"][0]
+                        cvss_score = float(cvss_data.get("cvssData", {}).get("baseScore", 0.0))
+                    elif "cvssMetricV2" in metrics:
+                        cvss_data = metrics["cvssMetricV2"][0]
+                        cvss_score = float(cvss_data.get("cvssData", {}).get("baseScore", 0.0))
                     
-                    return vulns
+                    vulns.append({
+                        "id": cve.get("id", ""),
+                        "summary": cve.get("descriptions", [{}])[0].get("value", ""),
+                        "severity": cvss_score,
+                        "source": "NVD",
+                        "published": cve.get("published", ""),
+                        "modified": cve.get("lastModified", "")
+                    })
+                
+                return vulns
         except Exception as e:
             logger.error(f"NVD check failed for {package_name}: {e}")
         
@@ -0,0 +1,336 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+import redis.asyncio as aioredis
+import logging
+
+from config import settings
+from database import APISecurityTest, FuzzCampaign, FuzzCampaignShard
+from modules.fuzzing import FuzzingEngine, MutationGenerator
+
+logger = logging.getLogger(__name__)
+
+RATE_BUDGET_PREFIX = "fuzz:budget"
+
+
+class TargetRateBudget:
+    def __init__(self, endpoint: str, rps: int):
+        self.host = urlparse(endpoint).netloc
+        self.rps = rps
+        self._local: Dict[int, int] = {}
+        try:
+            self.redis_client = aioredis.from_url(settings.REDIS_URL)
+        except Exception as e:
+            logger.warning(f"Redis not available, fuzz rate budget for {self.host} is per-worker: {e}")
+            self.redis_client = None
+    
+    async def acquire(self):
+        while True:
+            now = time.time()
+            window = int(now)
+            if await self._increment(window) <= self.rps:
+                return
+            await asyncio.sleep(window + 1 - now)
+    
+    async def _increment(self, window: int) -> int:
+        if self.redis_client is not None:
+            key = f"{RATE_BUDGET_PREFIX}:{self.host}:{window}"
+            try:
+                async with self.redis_client.pipeline(transaction=True) as pipe:
+                    count, _ = await pipe.incr(key).expire(key, 2).execute()
+                return count
+            except Exception as e:
+                if self.redis_client is not None:
+                    logger.warning(f"Redis not available, fuzz rate budget for {self.host} is per-worker: {e}")
+                    await self.close()
+        
+        count = self._local.get(window, 0) + 1
+        self._local = {window: count}
+        return count
+    
+    async def close(self):
+        if self.redis_client is not None:
+            client, self.redis_client = self.redis_client, None
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+
+def target_rate_limit(db: Session, campaign: FuzzCampaign) -> int:
+    host = urlparse(campaign.endpoint).netloc
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.FUZZ_CAMPAIGN_SHARD_STALE_SECONDS)
+    active = (
+        db.query(FuzzCampaign.endpoint, FuzzCampaign.rate_limit_rps)
+        .join(FuzzCampaignShard, FuzzCampaignShard.campaign_id == FuzzCampaign.id)
+        .filter(
+            FuzzCampaign.status == "running",
+            FuzzCampaignShard.status == "running",
+            FuzzCampaignShard.started_at >= stale_before
+        )
+        .distinct()
+    )
+    return min(
+        [campaign.rate_limit_rps] + [row.rate_limit_rps for row in active if urlparse(row.endpoint).netloc == host]
+    )
+
+
+def campaign_generator(
+    method: str,
+    body: Optional[Dict[str, Any]],
+    schema: Optional[Dict[str, Any]],
+    corpus: Optional[List[Any]],
+    max_cases: Optional[int] = None
+) -> MutationGenerator:
+    location = "query" if method.upper() in ["GET", "DELETE"] else "json"
+    return MutationGenerator(body, schema, location, max_cases, corpus=corpus, limit=settings.FUZZ_CAMPAIGN_MAX_CASES)
+
+
+def create_campaign(
+    db: Session,
+    endpoint: str,
+    method: str = "POST",
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[Dict[str, Any]] = None,
+    contract_schema: Optional[Dict[str, Any]] = None,
+    corpus: Optional[List[Any]] = None,
+    max_cases: Optional[int] = None,
+    shard_size: Optional[int] = None,
+    rate_limit_rps: Optional[int] = None,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None
+) -> FuzzCampaign:
+    rate_limit_rps = rate_limit_rps or settings.FUZZ_CAMPAIGN_DEFAULT_RPS
+    if rate_limit_rps < 1 or rate_limit_rps > settings.FUZZ_CAMPAIGN_MAX_RPS:
+        raise ValueError(f"rate_limit_rps must be between 1 and FUZZ_CAMPAIGN_MAX_RPS ({settings.FUZZ_CAMPAIGN_MAX_RPS})")
+    shard_size = shard_size or settings.FUZZ_CAMPAIGN_SHARD_SIZE
+    if shard_size < 1:
+        raise ValueError("shard_size must be positive")
+    
+    generator = campaign_generator(method, body, contract_schema, corpus, max_cases)
+    total_cases = generator.count()
+    generated_cases = generator.generated_count()
+    if not total_cases:
+        raise ValueError("Fuzz campaign corpus is empty")
+    
+    test = APISecurityTest(
+        endpoint=endpoint,
+        method=method,
+        test_type="fuzzing_campaign",
+        status="running",
+        results={},
+        user_id=user_id,
+        project_id=project_id
+    )
+    db.add(test)
+    db.flush()
+    
+    campaign = FuzzCampaign(
+        test_id=test.id,
+        endpoint=endpoint,
+        method=method,
+        headers=headers or {},
+        body=body,
+        contract_schema=contract_schema,
+        total_cases=total_cases,
+        shard_size=shard_size,
+        shard_count=-(-total_cases // shard_size),
+        rate_limit_rps=rate_limit_rps,
+        status="running",
+        user_id=user_id,
+        project_id=project_id
+    )
+    db.add(campaign)
+    db.flush()
+    
+    test.results = {"campaign_id": campaign.id}
+    db.bulk_insert_mappings(FuzzCampaignShard, [
+        {
+            "campaign_id": campaign.id,
+            "shard_index": index,
+            "status": "pending",
+            "attempts": 0,
+            "corpus": _shard_corpus(corpus or [], index * shard_size, min((index + 1) * shard_size, total_cases), generated_cases)
+        }
+        for index in range(campaign.shard_count)
+    ])
+    db.commit()
+    db.refresh(campaign)
+    return campaign
+
+
+def _shard_corpus(corpus: List[Any], start: int, stop: int, generated_cases: int) -> Optional[List[Any]]:
+    return corpus[max(start - generated_cases, 0):max(stop - generated_cases, 0)] or None
+
+
+def dispatch_shards(db: Session, campaign: FuzzCampaign) -> int:
+    from celery_app import run_fuzz_shard
+    
+    if campaign.status == "completed":
+        raise ValueError(f"Fuzz campaign {campaign.id} is already completed")
+    
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.FUZZ_CAMPAIGN_SHARD_STALE_SECONDS)
+    indexes = [
+        row.shard_index
+        for row in db.query(FuzzCampaignShard.shard_index)
+        .filter(
+            FuzzCampaignShard.campaign_id == campaign.id,
+            FuzzCampaignShard.status != "completed",
+            or_(
+                FuzzCampaignShard.status != "running",
+                FuzzCampaignShard.started_at.is_(None),
+                FuzzCampaignShard.started_at < stale_before
+            )
+        )
+        .order_by(FuzzCampaignShard.shard_index)
+        .all()
+    ]
+    campaign.status = "running"
+    db.commit()
+    
+    for index in indexes:
+        run_fuzz_shard.delay(campaign.id, index)
+    return len(indexes)
+
+
+async def _fuzz_shard(campaign: FuzzCampaign, shard_index: int, corpus: Optional[List[Any]], rps: int) -> Dict[str, Any]:
+    from modules.api_security import APISecurityTester
+    
+    start = shard_index * campaign.shard_size
+    generator = campaign_generator(campaign.method, campaign.body, campaign.contract_schema, None, campaign.total_cases)
+    cases = generator.cases(start, start + campaign.shard_size)
+    if corpus:
+        cases += generator.corpus_cases(corpus, max(start - generator.generated_count(), 0))
+    
+    budget = TargetRateBudget(campaign.endpoint, rps)
+    try:
+        async with APISecurityTester().client_scope() as client:
+            engine = FuzzingEngine(client, campaign.endpoint, campaign.method, campaign.headers, rate_budget=budget)
+            await engine.run(cases)
+    finally:
+        await budget.close()
+    return engine.snapshot()
+
+
+def run_shard(db: Session, campaign_id: int, shard_index: int) -> Dict[str, Any]:
+    shard = db.query(FuzzCampaignShard).filter(
+        FuzzCampaignShard.campaign_id == campaign_id,
+        FuzzCampaignShard.shard_index == shard_index
+    ).first()
+    if shard is None:
+        raise LookupError(f"Fuzz campaign {campaign_id} has no shard {shard_index}")
+    if shard.status == "completed":
+        return {"status": "skipped", "shard_index": shard_index}
+    
+    campaign = db.query(FuzzCampaign).filter(FuzzCampaign.id == campaign_id).first()
+    corpus = shard.corpus
+    shard.status = "running"
+    shard.attempts = (shard.attempts or 0) + 1
+    shard.started_at = datetime.utcnow()
+    shard.error = None
+    db.commit()
+    
+    try:
+        snapshot = asyncio.run(_fuzz_shard(campaign, shard_index, corpus, target_rate_limit(db, campaign)))
+    except Exception as e:
+        logger.error(f"Fuzz campaign {campaign_id} shard {shard_index} failed: {e}")
+        db.rollback()
+        shard.status = "failed"
+        shard.error = str(e)
+        db.commit()
+        _mark_stalled(db, campaign)
+        raise
+    
+    shard.status = "completed"
+    shard.results = snapshot
+    shard.completed_at = datetime.utcnow()
+    db.commit()
+    
+    finalize_campaign(db, campaign_id)
+    return {"status": "completed", "shard_index": shard_index, "payloads_tested": snapshot["payloads_tested"]}
+
+
+def _mark_stalled(db: Session, campaign: FuzzCampaign):
+    active = db.query(func.count(FuzzCampaignShard.id)).filter(
+        FuzzCampaignShard.campaign_id == campaign.id,
+        FuzzCampaignShard.status.in_(["pending", "running"])
+    ).scalar()
+    if not active:
+        campaign.status = "failed"
+        db.commit()
+
+
+def finalize_campaign(db: Session, campaign_id: int) -> Optional[Dict[str, Any]]:
+    remaining = db.query(func.count(FuzzCampaignShard.id)).filter(
+        FuzzCampaignShard.campaign_id == campaign_id,
+        FuzzCampaignShard.status != "completed"
+    ).scalar()
+    if remaining:
+        return None
+    
+    campaign = db.query(FuzzCampaign).filter(FuzzCampaign.id == campaign_id).populate_existing().with_for_update().first()
+    if campaign is None or campaign.status == "completed":
+        db.rollback()
+        return None
+    
+    now = datetime.utcnow()
+    engine = FuzzingEngine(None, campaign.endpoint, campaign.method)
+    worker_seconds = 0.0
+    for shard in (
+        db.query(FuzzCampaignShard.results)
+        .filter(FuzzCampaignShard.campaign_id == campaign_id)
+        .order_by(FuzzCampaignShard.shard_index)
+    ):
+        engine.merge(shard.results or {})
+        worker_seconds += (shard.results or {}).get("elapsed_seconds", 0.0)
+    engine.elapsed = (now - campaign.created_at).total_seconds()
+    
+    summary = engine.summary()
+    summary["shards"] = campaign.shard_count
+    summary["worker_seconds"] = round(worker_seconds, 2)
+    
+    test = db.query(APISecurityTest).filter(APISecurityTest.id == campaign.test_id).first()
+    test.status = "passed" if summary["passed"] else "failed"
+    test.results = {"campaign_id": campaign.id, "fuzzing": summary}
+    campaign.status = "completed"
+    campaign.completed_at = now
+    db.commit()
+    
+    logger.info(f"Fuzz campaign {campaign_id} completed: {summary['payloads_tested']} payloads, {summary['issues_found']} unique issues")
+    return summary
+
+
+def campaign_progress(db: Session, campaign: FuzzCampaign) -> Dict[str, Any]:
+    shards = {"pending": 0, "running": 0, "completed": 0, "failed": 0}
+    cases_completed = 0
+    resume_from = None
+    for shard_index, status in (
+        db.query(FuzzCampaignShard.shard_index, FuzzCampaignShard.status)
+        .filter(FuzzCampaignShard.campaign_id == campaign.id)
+        .order_by(FuzzCampaignShard.shard_index)
+    ):
+        shards[status] = shards.get(status, 0) + 1
+        if status == "completed":
+            cases_completed += min(campaign.shard_size, campaign.total_cases - shard_index * campaign.shard_size)
+        elif resume_from is None:
+            resume_from = shard_index
+    
+    return {
+        "campaign_id": campaign.id,
+        "test_id": campaign.test_id,
+        "endpoint": campaign.endpoint,
+        "method": campaign.method,
+        "status": campaign.status,
+        "rate_limit_rps": campaign.rate_limit_rps,
+        "total_cases": campaign.total_cases,
+        "cases_completed": cases_completed,
+        "percent_complete": round(cases_completed / campaign.total_cases * 100, 1),
+        "shards": {"total": campaign.shard_count, **shards},
+        "resume_from_shard": resume_from,
+        "created_at": campaign.created_at.isoformat(),
+        "completed_at": campaign.completed_at.isoformat() if campaign.completed_at else None
+    }
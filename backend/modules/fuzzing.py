@@ -0,0 +1,430 @@
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import re
+import time
+import weakref
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+import httpx
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+MAX_QUERY_VALUE_LENGTH = 8192
+
+INJECTION_STRINGS = [
+    "<script>alert('xss')</script>",
+    "../../../etc/passwd",
+    "'; DROP TABLE users; --",
+    "' OR '1'='1",
+    "%s%s%s%n",
+    "{{7*7}}",
+    "\x00\x01\x02",
+    "\u202e\ufeff"
+]
+
+VOLATILE_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|0x[0-9a-f]+|\d+",
+    re.IGNORECASE
+)
+
+_target_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def target_semaphore(endpoint: str) -> asyncio.Semaphore:
+    semaphores = _target_semaphores.setdefault(asyncio.get_running_loop(), {})
+    host = urlparse(endpoint).netloc
+    semaphore = semaphores.get(host)
+    if semaphore is None:
+        semaphore = semaphores[host] = asyncio.Semaphore(settings.FUZZ_CONCURRENCY_PER_TARGET)
+    return semaphore
+
+
+def synthesize(schema: Dict[str, Any], depth: int = 0) -> Any:
+    if not isinstance(schema, dict) or depth > 8:
+        return None
+    for key in ("example", "default", "const"):
+        if key in schema:
+            return schema[key]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), None)
+    if schema_type == "object" or (schema_type is None and "properties" in schema):
+        return {name: synthesize(prop, depth + 1) for name, prop in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        return [synthesize(schema.get("items", {}), depth + 1)]
+    if schema_type == "integer":
+        return schema.get("minimum", 1)
+    if schema_type == "number":
+        return float(schema.get("minimum", 1.5))
+    if schema_type == "boolean":
+        return True
+    if schema_type == "string":
+        return "a" * max(schema.get("minLength", 1), 1)
+    return None
+
+
+def _set_path(document: Any, path: Tuple, value: Any) -> Any:
+    if not path:
+        return value
+    head, rest = path[0], path[1:]
+    if isinstance(document, list):
+        copy = list(document)
+        copy[head] = _set_path(copy[head], rest, value)
+        return copy
+    copy = dict(document)
+    if value is MISSING and not rest:
+        copy.pop(head, None)
+    else:
+        copy[head] = _set_path(copy[head], rest, value)
+    return copy
+
+
+def _schema_at(schema: Optional[Dict[str, Any]], path: Tuple) -> Dict[str, Any]:
+    for segment in path:
+        if not isinstance(schema, dict):
+            return {}
+        if isinstance(segment, int):
+            schema = schema.get("items", {})
+        else:
+            schema = schema.get("properties", {}).get(segment, {})
+    return schema if isinstance(schema, dict) else {}
+
+
+def _leaves(document: Any, path: Tuple = ()) -> Iterator[Tuple[Tuple, Any]]:
+    if isinstance(document, dict) and document:
+        for key, value in document.items():
+            yield from _leaves(value, path + (key,))
+    elif isinstance(document, list) and document:
+        yield from _leaves(document[0], path + (0,))
+    elif path:
+        yield path, document
+
+
+def _oversized_string(length: Optional[int] = None) -> str:
+    return "A" * (settings.FUZZ_MAX_STRING_LENGTH if length is None else length)
+
+
+def _oversized_array() -> List[str]:
+    return ["A"] * settings.FUZZ_MAX_ARRAY_LENGTH
+
+
+def _nested(depth: int, container: str) -> Any:
+    value: Any = "leaf"
+    for _ in range(depth):
+        value = {"a": value} if container == "object" else [value]
+    return value
+
+
+class FuzzCase:
+    def __init__(self, strategy: str, target: str, payload: Any, location: str = "json"):
+        self.strategy = strategy
+        self.target = target
+        self.payload = payload
+        self.location = location
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "target": self.target,
+            "location": self.location,
+            "payload": json.dumps(self.payload, default=str)[:200] if self.payload is not MISSING else "<missing>"
+        }
+
+
+class MutationGenerator:
+    def __init__(
+        self,
+        body: Optional[Dict[str, Any]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+        location: str = "json",
+        max_cases: Optional[int] = None,
+        corpus: Optional[List[Any]] = None,
+        limit: Optional[int] = None
+    ):
+        self.schema = schema if isinstance(schema, dict) else None
+        if body is not None:
+            self.base = body
+        elif self.schema is not None:
+            self.base = synthesize(self.schema)
+        else:
+            self.base = None
+        self.location = location
+        self.corpus = corpus or []
+        limit = limit or settings.FUZZ_MAX_CASES
+        self.max_cases = min(max_cases or limit, limit)
+    
+    def cases(self, start: int = 0, stop: Optional[int] = None) -> List[FuzzCase]:
+        stop = self.max_cases if stop is None else min(stop, self.max_cases)
+        cases = []
+        position = 0
+        for size, build in self._segments():
+            if position >= stop:
+                break
+            for offset in range(max(start - position, 0), min(stop - position, size)):
+                cases.append(build(offset))
+            position += size
+        return cases
+    
+    def count(self) -> int:
+        return min(sum(size for size, _ in self._segments()), self.max_cases)
+    
+    def generated_count(self) -> int:
+        return min(sum(size for size, _ in self._generated_segments()), self.max_cases)
+    
+    def corpus_cases(self, corpus: List[Any], offset: int = 0) -> List[FuzzCase]:
+        return [self._corpus_case(payload, offset + index) for index, payload in enumerate(corpus)]
+    
+    def _corpus_case(self, payload: Any, index: int) -> FuzzCase:
+        if self.location == "query":
+            params = payload if isinstance(payload, dict) else {"input": payload}
+            return FuzzCase("corpus", f"corpus[{index}]", params, location="query")
+        return FuzzCase("corpus", f"corpus[{index}]", payload)
+    
+    def _segments(self) -> Iterator[Tuple[int, Callable[[int], FuzzCase]]]:
+        yield from self._generated_segments()
+        if self.corpus:
+            yield len(self.corpus), lambda index: self._corpus_case(self.corpus[index], index)
+    
+    def _generated_segments(self) -> Iterator[Tuple[int, Callable[[int], FuzzCase]]]:
+        if self.location == "query":
+            yield from self._query_segments()
+            return
+        
+        replacements = [None, "", "null", [], 0, True] + INJECTION_STRINGS
+        yield len(replacements), lambda index: FuzzCase("body_replacement", "$", replacements[index])
+        yield 1, lambda _: FuzzCase("oversized", "$", _oversized_string())
+        yield 1, lambda _: FuzzCase("nested", "$", _nested(settings.FUZZ_MAX_NESTING_DEPTH, "object"))
+        yield 1, lambda _: FuzzCase("nested", "$", _nested(settings.FUZZ_MAX_NESTING_DEPTH, "array"))
+        
+        if not isinstance(self.base, dict):
+            return
+        
+        yield 1, lambda _: FuzzCase("unexpected_field", "$.__proto__", {**self.base, "__proto__": {"admin": True}})
+        required = set(self.schema.get("required", [])) if self.schema else set()
+        keys = list(self.base)
+        yield len(keys), lambda index: FuzzCase(
+            "missing_required" if keys[index] in required else "missing_field",
+            f"$.{keys[index]}",
+            _set_path(self.base, (keys[index],), MISSING)
+        )
+        
+        for path, value in _leaves(self.base):
+            yield self._leaf_segment(path, value)
+    
+    def _leaf_segment(self, path: Tuple, value: Any) -> Tuple[int, Callable[[int], FuzzCase]]:
+        target = "$." + ".".join(str(segment) for segment in path)
+        mutations = list(self._mutations(value, _schema_at(self.schema, path)))
+        
+        def build(index: int) -> FuzzCase:
+            strategy, mutate = mutations[index]
+            return FuzzCase(strategy, target, _set_path(self.base, path, mutate()))
+        
+        return len(mutations), build
+    
+    def _query_segments(self) -> Iterator[Tuple[int, Callable[[int], FuzzCase]]]:
+        base = self.base if isinstance(self.base, dict) else {}
+        params = {key: value if isinstance(value, (str, int, float, bool)) else json.dumps(value) for key, value in base.items()}
+        if not params:
+            params = {"input": "test"}
+        
+        for key in params:
+            yield self._query_segment(params, key)
+    
+    def _query_segment(self, params: Dict[str, Any], key: str) -> Tuple[int, Callable[[int], FuzzCase]]:
+        mutations = list(self._mutations(params[key], _schema_at(self.schema, (key,))))
+        
+        def build(index: int) -> FuzzCase:
+            if index == len(mutations):
+                return FuzzCase("duplicate_parameter", f"?{key}", {**params, key: [params[key], "1"]}, location="query")
+            if index > len(mutations):
+                return FuzzCase("missing_field", f"?{key}", {k: v for k, v in params.items() if k != key}, location="query")
+            strategy, mutate = mutations[index]
+            mutated = mutate()
+            if isinstance(mutated, (dict, list)):
+                mutated = json.dumps(mutated)
+            if isinstance(mutated, str):
+                mutated = mutated[:MAX_QUERY_VALUE_LENGTH]
+            value = "" if mutated is None else mutated
+            return FuzzCase(strategy, f"?{key}", {**params, key: value}, location="query")
+        
+        return len(mutations) + 2, build
+    
+    def _mutations(self, value: Any, schema: Dict[str, Any]) -> Iterator[Tuple[str, Callable[[], Any]]]:
+        for confused in (None, True, 0, -1, 1.5, "", "true", [], {}):
+            if type(confused) is not type(value):
+                yield "type_confusion", functools.partial(copy.deepcopy, confused)
+        
+        if isinstance(value, bool):
+            return
+        if isinstance(value, (int, float)):
+            boundaries = [0, -1, 2 ** 31 - 1, 2 ** 31, -(2 ** 63), 2 ** 64, 1e308, -1e308, 5e-324]
+            for key, delta in (("minimum", -1), ("maximum", 1), ("exclusiveMinimum", 0), ("exclusiveMaximum", 0)):
+                if isinstance(schema.get(key), (int, float)) and not isinstance(schema.get(key), bool):
+                    boundaries.append(schema[key] + delta)
+            for boundary in boundaries:
+                if boundary != value:
+                    yield "boundary", functools.partial(copy.deepcopy, boundary)
+        if isinstance(value, str):
+            yield "boundary", functools.partial(copy.deepcopy, "")
+            if isinstance(schema.get("maxLength"), int):
+                yield "boundary", functools.partial(_oversized_string, schema["maxLength"] + 1)
+            if isinstance(schema.get("minLength"), int) and schema["minLength"] > 0:
+                yield "boundary", functools.partial(_oversized_string, schema["minLength"] - 1)
+            for injection in INJECTION_STRINGS:
+                yield "injection", functools.partial(copy.deepcopy, injection)
+        yield "oversized", _oversized_string
+        yield "oversized", _oversized_array
+        yield "nested", functools.partial(_nested, settings.FUZZ_MAX_NESTING_DEPTH, "object")
+        yield "nested", functools.partial(_nested, settings.FUZZ_MAX_NESTING_DEPTH, "array")
+
+
+def crash_signature(kind: str, status_code: Optional[int], detail: str) -> str:
+    normalized = VOLATILE_PATTERN.sub("#", detail[:500]).strip().lower()
+    return hashlib.sha256(f"{kind}\x00{status_code}\x00{normalized}".encode()).hexdigest()[:16]
+
+
+class FuzzingEngine:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        method: str = "POST",
+        headers: Optional[Dict[str, str]] = None,
+        concurrency: Optional[int] = None,
+        rate_budget: Optional[Any] = None
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.method = method
+        self.headers = headers or {}
+        self.concurrency = concurrency or settings.FUZZ_CONCURRENCY_PER_TARGET
+        self.rate_budget = rate_budget
+        self.signatures: Dict[str, Dict[str, Any]] = {}
+        self.status_counts: Dict[str, int] = {}
+        self.requests_sent = 0
+        self.elapsed = 0.0
+    
+    async def stream(self, cases: List[FuzzCase]) -> AsyncIterator[Dict[str, Any]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue()
+        for case in cases:
+            pending.put_nowait(case)
+        
+        async def worker():
+            while True:
+                try:
+                    case = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                finding = await self._send(case)
+                if finding is not None:
+                    await queue.put(finding)
+        
+        started = time.perf_counter()
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(cases)))]
+        done = asyncio.gather(*workers)
+        try:
+            while not (done.done() and queue.empty()):
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                yield getter.result()
+            await done
+        finally:
+            for task in workers:
+                task.cancel()
+            self.elapsed = time.perf_counter() - started
+    
+    async def _send(self, case: FuzzCase) -> Optional[Dict[str, Any]]:
+        request: Dict[str, Any] = {"method": self.method, "url": self.endpoint, "headers": self.headers}
+        if case.location == "query":
+            request["params"] = case.payload
+        elif case.payload is not MISSING:
+            request["content"] = json.dumps(case.payload).encode()
+            request["headers"] = {"Content-Type": "application/json", **self.headers}
+        
+        async with target_semaphore(self.endpoint):
+            if self.rate_budget is not None:
+                await self.rate_budget.acquire()
+            self.requests_sent += 1
+            try:
+                response = await self.client.request(**request)
+            except httpx.InvalidURL as e:
+                logger.debug(f"Skipping fuzz case {case.strategy} {case.target}: {e}")
+                return None
+            except httpx.TimeoutException:
+                return self._record(case, "timeout", None, "request timed out")
+            except httpx.HTTPError as e:
+                return self._record(case, "connection_error", None, type(e).__name__)
+        
+        code = str(response.status_code)
+        self.status_counts[code] = self.status_counts.get(code, 0) + 1
+        if response.status_code >= 500:
+            return self._record(case, "server_error", response.status_code, response.text)
+        return None
+    
+    def _record(self, case: FuzzCase, kind: str, status_code: Optional[int], detail: str) -> Optional[Dict[str, Any]]:
+        signature = crash_signature(kind, status_code, detail)
+        entry = self.signatures.get(signature)
+        if entry is not None:
+            entry["occurrences"] += 1
+            return None
+        
+        finding = {
+            "type": kind,
+            "signature": signature,
+            "status_code": status_code,
+            "detail": detail[:200],
+            **case.describe()
+        }
+        self.signatures[signature] = {"finding": finding, "occurrences": 1}
+        return finding
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "payloads_tested": self.requests_sent,
+            "elapsed_seconds": round(self.elapsed, 2),
+            "status_counts": self.status_counts,
+            "signatures": self.signatures
+        }
+    
+    def merge(self, snapshot: Dict[str, Any]):
+        self.requests_sent += snapshot.get("payloads_tested", 0)
+        for code, count in snapshot.get("status_counts", {}).items():
+            self.status_counts[code] = self.status_counts.get(code, 0) + count
+        for signature, entry in snapshot.get("signatures", {}).items():
+            if signature in self.signatures:
+                self.signatures[signature]["occurrences"] += entry["occurrences"]
+            else:
+                self.signatures[signature] = {"finding": entry["finding"], "occurrences": entry["occurrences"]}
+    
+    def summary(self) -> Dict[str, Any]:
+        findings = [{**entry["finding"], "occurrences": entry["occurrences"]} for entry in self.signatures.values()]
+        return {
+            "passed": not any(finding["type"] in ("server_error", "connection_error") for finding in findings),
+            "payloads_tested": self.requests_sent,
+            "issues_found": len(findings),
+            "duplicate_crashes": sum(entry["occurrences"] - 1 for entry in self.signatures.values()),
+            "requests_per_second": round(self.requests_sent / self.elapsed, 2) if self.elapsed > 0 else 0.0,
+            "elapsed_seconds": round(self.elapsed, 2),
+            "status_counts": self.status_counts,
+            "issues": findings
+        }
+    
+    async def run(self, cases: List[FuzzCase]) -> Dict[str, Any]:
+        async for _ in self.stream(cases):
+            pass
+        return self.summary()
@@ -0,0 +1,158 @@
+import json
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional, Union
+from urllib.parse import urlparse
+import httpx
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ErrorCallback = Callable[[int, str], None]
+
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+
+
+class InventorySourceError(ValueError):
+    pass
+
+
+def resolve_inventory_path(path: str) -> Path:
+    root = Path(settings.COMPLIANCE_INVENTORY_ROOT).resolve()
+    candidate = (root / path).resolve()
+    if candidate != root and root not in candidate.parents:
+        raise InventorySourceError(f"Inventory path '{path}' is outside {settings.COMPLIANCE_INVENTORY_ROOT}")
+    if not candidate.exists():
+        raise InventorySourceError(f"Inventory path '{path}' does not exist")
+    return candidate
+
+
+def _with_default_id(record: Dict[str, Any], resource_id: str) -> Dict[str, Any]:
+    if "resource_id" in record or "id" in record:
+        return record
+    if isinstance(record.get("resource_data"), dict):
+        return {**record, "resource_id": resource_id}
+    return {"resource_id": resource_id, "resource_data": record}
+
+
+def _iter_ndjson(
+    lines: Iterable[Union[bytes, str]],
+    on_error: ErrorCallback,
+    label: str
+) -> Iterator[Dict[str, Any]]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        if len(line) > settings.COMPLIANCE_BATCH_MAX_LINE_BYTES:
+            on_error(line_number, f"{label}: line exceeds {settings.COMPLIANCE_BATCH_MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            on_error(line_number, f"{label}: {e}")
+            continue
+        if not isinstance(record, dict):
+            on_error(line_number, f"{label}: expected a JSON object")
+            continue
+        yield _with_default_id(record, f"{label}:{line_number}")
+
+
+def _iter_document(document: Any, on_error: ErrorCallback, label: str) -> Iterator[Dict[str, Any]]:
+    if isinstance(document, dict):
+        if not isinstance(document.get("resources"), list):
+            yield _with_default_id(document, label)
+            return
+        document = document["resources"]
+    
+    if not isinstance(document, list):
+        on_error(0, f"{label}: expected a JSON object, array, or {{\"resources\": [...]}}")
+        return
+    
+    for index, record in enumerate(document, start=1):
+        if isinstance(record, dict):
+            yield _with_default_id(record, f"{label}#{index}")
+        else:
+            on_error(index, f"{label}: expected a JSON object")
+
+
+def _read_file(path: Path, on_error: ErrorCallback, label: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "rb") as handle:
+        if path.suffix.lower() in NDJSON_SUFFIXES:
+            yield from _iter_ndjson(handle, on_error, label)
+            return
+        try:
+            document = json.load(handle)
+        except ValueError as e:
+            on_error(0, f"{label}: {e}")
+            return
+    yield from _iter_document(document, on_error, label)
+
+
+class FileInventorySource:
+    def __init__(self, path: str):
+        self.path = resolve_inventory_path(path)
+        if not self.path.is_file():
+            raise InventorySourceError(f"Inventory path '{path}' is not a file")
+    
+    def records(self, on_error: ErrorCallback) -> Iterator[Dict[str, Any]]:
+        return _read_file(self.path, on_error, self.path.name)
+
+
+class DirectoryInventorySource:
+    def __init__(self, path: str, pattern: str = "*.json"):
+        self.path = resolve_inventory_path(path)
+        self.pattern = pattern
+        if not self.path.is_dir():
+            raise InventorySourceError(f"Inventory path '{path}' is not a directory")
+    
+    def records(self, on_error: ErrorCallback) -> Iterator[Dict[str, Any]]:
+        root = Path(settings.COMPLIANCE_INVENTORY_ROOT).resolve()
+        for path in sorted(self.path.rglob(self.pattern)):
+            resolved = path.resolve()
+            if not path.is_file() or root not in resolved.parents:
+                continue
+            yield from _read_file(resolved, on_error, str(path.relative_to(self.path)))
+
+
+class HTTPInventorySource:
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[int] = None):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            raise InventorySourceError(f"Unsupported inventory URL scheme '{parsed.scheme}'")
+        if parsed.hostname not in settings.COMPLIANCE_INVENTORY_HOSTS:
+            raise InventorySourceError(f"Inventory host '{parsed.hostname}' is not in COMPLIANCE_INVENTORY_HOSTS")
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout or settings.COMPLIANCE_INVENTORY_TIMEOUT
+    
+    def records(self, on_error: ErrorCallback) -> Iterator[Dict[str, Any]]:
+        label = urlparse(self.url).path or self.url
+        try:
+            with httpx.Client(timeout=self.timeout) as client:
+                with client.stream("GET", self.url, headers=self.headers) as response:
+                    response.raise_for_status()
+                    content_type = response.headers.get("content-type", "")
+                    if "ndjson" in content_type or "jsonl" in content_type or Path(label).suffix.lower() in NDJSON_SUFFIXES:
+                        yield from _iter_ndjson(response.iter_lines(), on_error, label)
+                        return
+                    document = json.loads(response.read())
+        except httpx.HTTPError as e:
+            raise InventorySourceError(f"Failed to fetch inventory from {self.url}: {e}")
+        except ValueError as e:
+            raise InventorySourceError(f"Inventory at {self.url} is not valid JSON: {e}")
+        yield from _iter_document(document, on_error, label)
+
+
+def open_inventory_source(source: Optional[Dict[str, Any]]):
+    if not isinstance(source, dict):
+        raise InventorySourceError("Scheduled compliance scans require a 'source' object in their config")
+    
+    source_type = source.get("type")
+    if source_type == "file":
+        return FileInventorySource(source.get("path", ""))
+    if source_type == "directory":
+        return DirectoryInventorySource(source.get("path", ""), source.get("pattern", "*.json"))
+    if source_type == "http":
+        return HTTPInventorySource(source.get("url", ""), source.get("headers"), source.get("timeout"))
+    raise InventorySourceError(f"Unsupported inventory source type '{source_type}'. Supported: file, directory, http")
@@ -0,0 +1,318 @@
+import re
+import fnmatch
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+import logging
+
+from config import settings
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+LICENSE_TOKEN_PATTERN = re.compile(r"\s*(\(|\)|[A-Za-z0-9.\-+:]+)")
+VERDICT_RANK = {"allowed": 0, "unknown": 1, "denied": 2}
+NO_LICENSE_VALUES = {"", "NOASSERTION", "NONE"}
+LICENSE_VERSION_PATTERN = re.compile(r"^(?P<family>.+?)-(?P<version>\d+(?:\.\d+)*)(?:-only|-or-later)?$", re.IGNORECASE)
+
+
+class LicenseExpressionError(ValueError):
+    pass
+
+
+def _license_version(license_id: str) -> Optional[Tuple[str, Tuple[int, ...]]]:
+    match = LICENSE_VERSION_PATTERN.match(license_id)
+    if not match:
+        return None
+    return match.group("family").lower(), tuple(int(part) for part in match.group("version").split("."))
+
+
+def _tokenize(expression: str) -> List[str]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = LICENSE_TOKEN_PATTERN.match(expression, position)
+        if not match:
+            raise LicenseExpressionError(f"Unexpected character at {position} in '{expression}'")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+@lru_cache(maxsize=8192)
+def parse_license_expression(expression: str) -> Tuple:
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise LicenseExpressionError("Empty license expression")
+    
+    position = 0
+    
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+    
+    def take() -> str:
+        nonlocal position
+        token = tokens[position]
+        position += 1
+        return token
+    
+    def parse_or():
+        node = parse_and()
+        while (peek() or "").upper() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+    
+    def parse_and():
+        node = parse_with()
+        while (peek() or "").upper() == "AND":
+            take()
+            node = ("and", node, parse_with())
+        return node
+    
+    def parse_with():
+        node = parse_atom()
+        if (peek() or "").upper() == "WITH":
+            take()
+            exception = peek()
+            if exception is None or exception in ("(", ")"):
+                raise LicenseExpressionError(f"Missing exception after WITH in '{expression}'")
+            if node[0] != "license":
+                raise LicenseExpressionError(f"WITH must follow a license id in '{expression}'")
+            node = ("license", node[1], node[2], take())
+        return node
+    
+    def parse_atom():
+        token = peek()
+        if token is None:
+            raise LicenseExpressionError(f"Unexpected end of '{expression}'")
+        if token == "(":
+            take()
+            node = parse_or()
+            if peek() != ")":
+                raise LicenseExpressionError(f"Unbalanced parenthesis in '{expression}'")
+            take()
+            return node
+        if token == ")" or token.upper() in ("AND", "OR", "WITH"):
+            raise LicenseExpressionError(f"Unexpected '{token}' in '{expression}'")
+        take()
+        or_later = token.endswith("+")
+        return ("license", token[:-1] if or_later else token, or_later, None)
+    
+    node = parse_or()
+    if position != len(tokens):
+        raise LicenseExpressionError(f"Unexpected '{tokens[position]}' in '{expression}'")
+    return node
+
+
+class CompiledLicensePolicy:
+    def __init__(self, name: str, policy_def: Dict[str, Any]):
+        self.name = name
+        self.description = policy_def.get("description", "")
+        self.allow = {license_id.lower() for license_id in policy_def.get("allow", [])}
+        self.deny = self._compile_patterns(policy_def.get("deny", []))
+        self.fail_on_unknown = policy_def.get("fail_on_unknown", False)
+        self._versions = self._index_versions(policy_def.get("allow", []))
+        self._verdicts = LRUCache(settings.LICENSE_VERDICT_CACHE_SIZE)
+    
+    def _index_versions(self, license_ids: List[str]) -> Dict[str, List[Tuple[Tuple[int, ...], str]]]:
+        versions: Dict[str, List[Tuple[Tuple[int, ...], str]]] = {}
+        for license_id in license_ids:
+            parsed = _license_version(license_id)
+            if parsed is not None:
+                versions.setdefault(parsed[0], []).append((parsed[1], license_id))
+        return versions
+    
+    def _compile_patterns(self, patterns: List[str]) -> Optional[re.Pattern]:
+        if not patterns:
+            return None
+        return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns), re.IGNORECASE)
+    
+    def verdict(self, expression: str) -> str:
+        cached = self._verdicts.get(expression)
+        if cached is not None:
+            return cached
+        
+        if expression.strip().upper() in NO_LICENSE_VALUES:
+            result = "unknown"
+        else:
+            try:
+                result = self._evaluate(parse_license_expression(expression))
+            except LicenseExpressionError as e:
+                logger.warning(f"Invalid license expression: {e}")
+                result = "invalid"
+        
+        self._verdicts.put(expression, result)
+        return result
+    
+    def _evaluate(self, node: Tuple) -> str:
+        kind = node[0]
+        if kind == "license":
+            if node[2] or node[1].lower().endswith("-or-later"):
+                return self._or_later_verdict(node[1], node[3])
+            return self._license_verdict(node[1], node[3])
+        
+        left = self._evaluate(node[1])
+        right = self._evaluate(node[2])
+        if kind == "or":
+            return min(left, right, key=VERDICT_RANK.get)
+        return max(left, right, key=VERDICT_RANK.get)
+    
+    def _or_later_verdict(self, license_id: str, exception: Optional[str]) -> str:
+        if license_id.lower().endswith("-or-later"):
+            license_id = license_id[:-len("-or-later")]
+        candidates = [f"{license_id}+", f"{license_id}-or-later", license_id]
+        
+        parsed = _license_version(license_id)
+        if parsed is not None:
+            family, version = parsed
+            candidates.extend(
+                allowed_id for allowed_version, allowed_id in self._versions.get(family, [])
+                if allowed_version >= version
+            )
+        
+        return min(
+            (self._license_verdict(candidate, exception) for candidate in candidates),
+            key=VERDICT_RANK.get
+        )
+    
+    def _license_verdict(self, license_id: str, exception: Optional[str]) -> str:
+        if exception:
+            with_exception = f"{license_id} WITH {exception}"
+            if with_exception.lower() in self.allow:
+                return "allowed"
+            if self.deny and self.deny.match(with_exception):
+                return "denied"
+        
+        if self.deny and self.deny.match(license_id):
+            return "denied"
+        if license_id.lower() in self.allow:
+            return "allowed"
+        return "unknown"
+
+
+class LicensePolicyEngine:
+    def __init__(self):
+        self.policies = self._load_default_policies()
+        self._compiled: Dict[str, CompiledLicensePolicy] = {}
+    
+    def _load_default_policies(self) -> Dict[str, Dict[str, Any]]:
+        permissive = [
+            "MIT", "MIT-0", "Apache-2.0", "BSD-2-Clause", "BSD-3-Clause", "ISC",
+            "0BSD", "Zlib", "Unlicense", "CC0-1.0", "Python-2.0", "PSF-2.0",
+            "BlueOak-1.0.0", "BSL-1.0"
+        ]
+        return {
+            "default": {
+                "description": "Strong copyleft and source-available licenses are not allowed",
+                "allow": permissive + [
+                    "MPL-2.0", "EPL-2.0", "LGPL-2.1-only", "LGPL-2.1-or-later",
+                    "LGPL-3.0-only", "LGPL-3.0-or-later", "GPL-2.0-only WITH Classpath-exception-2.0"
+                ],
+                "deny": ["GPL-*", "AGPL-*", "SSPL-*", "BUSL-*", "CC-BY-NC-*", "Commons-Clause"]
+            },
+            "permissive_only": {
+                "description": "Only permissive licenses are allowed",
+                "allow": permissive,
+                "deny": ["GPL-*", "LGPL-*", "AGPL-*", "MPL-*", "EPL-*", "SSPL-*", "BUSL-*", "CC-BY-NC-*", "CC-BY-SA-*"],
+                "fail_on_unknown": True
+            }
+        }
+    
+    def get_policy(
+        self,
+        policy_name: Optional[str] = None,
+        custom_policy: Optional[Dict[str, Any]] = None
+    ) -> CompiledLicensePolicy:
+        if custom_policy is not None:
+            return CompiledLicensePolicy("custom_policy", custom_policy)
+        
+        policy_name = policy_name or "default"
+        if policy_name not in self.policies:
+            raise ValueError(f"License policy '{policy_name}' not found. Available: {list(self.policies)}")
+        
+        if policy_name not in self._compiled:
+            self._compiled[policy_name] = CompiledLicensePolicy(policy_name, self.policies[policy_name])
+        return self._compiled[policy_name]
+    
+    def component_license(self, component: Dict[str, Any]) -> str:
+        if "licenses" in component:
+            expressions = []
+            for entry in component.get("licenses") or []:
+                if entry.get("expression"):
+                    expressions.append(entry["expression"])
+                else:
+                    license_info = entry.get("license", {})
+                    value = license_info.get("id") or license_info.get("name")
+                    if value:
+                        expressions.append(value)
+            if len(expressions) > 1:
+                return " AND ".join(f"({expression})" for expression in expressions)
+            return expressions[0] if expressions else ""
+        
+        for field in ("licenseConcluded", "licenseDeclared", "license"):
+            value = component.get(field)
+            if value and value not in NO_LICENSE_VALUES:
+                return value
+        return ""
+    
+    def evaluate_sbom(
+        self,
+        sbom_content: Dict[str, Any],
+        policy_name: Optional[str] = None,
+        custom_policy: Optional[Dict[str, Any]] = None,
+        compiled_policy: Optional[CompiledLicensePolicy] = None
+    ) -> Dict[str, Any]:
+        policy = compiled_policy or self.get_policy(policy_name, custom_policy)
+        components = sbom_content.get("components")
+        if components is None:
+            components = sbom_content.get("packages", [])
+        
+        counts = {"allowed": 0, "denied": 0, "unknown": 0, "invalid": 0}
+        expressions: Dict[str, Dict[str, Any]] = {}
+        violations = []
+        
+        for component in components:
+            expression = self.component_license(component)
+            verdict = policy.verdict(expression)
+            counts[verdict] += 1
+            
+            entry = expressions.get(expression)
+            if entry is None:
+                entry = expressions[expression] = {"verdict": verdict, "components": 0}
+            entry["components"] += 1
+            
+            if verdict == "denied" or (verdict != "allowed" and policy.fail_on_unknown):
+                violations.append({
+                    "component": component.get("purl") or component.get("name", ""),
+                    "license": expression or "NOASSERTION",
+                    "verdict": verdict
+                })
+        
+        passed = not violations
+        
+        return {
+            "status": "passed" if passed else "failed",
+            "framework": "license",
+            "policy_name": policy.name,
+            "resource_type": "sbom",
+            "policies": {
+                policy.name: {
+                    "passed": passed,
+                    "description": policy.description
+                }
+            },
+            "summary": {
+                "components": len(components),
+                "unique_expressions": len(expressions),
+                **counts
+            },
+            "expressions": {
+                expression or "NOASSERTION": entry for expression, entry in expressions.items()
+            },
+            "violations": violations,
+            "evidence": {
+                "checked_at": str(datetime.utcnow())
+            }
+        }
@@ -0,0 +1,322 @@
+import asyncio
+import math
+from typing import Dict, Any, Iterator, List, Optional
+import httpx
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    def __init__(self, significant_figures: int = 2, highest_trackable_ms: float = 3600000.0):
+        self.sub_bucket_bits = math.ceil(math.log2(10 ** significant_figures)) + 1
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.half_count = self.sub_bucket_count >> 1
+        self.highest_trackable = int(highest_trackable_ms * 1000)
+        self.counts = [0] * (self._index(self.highest_trackable) + 1)
+        self.total = 0
+        self.min_value: Optional[int] = None
+        self.max_value = 0
+        self.sum_value = 0
+    
+    def _index(self, value: int) -> int:
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+    
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self.sub_bucket_count:
+            return index
+        shift, offset = divmod(index - self.sub_bucket_count, self.half_count)
+        shift += 1
+        return ((offset + self.half_count + 1) << shift) - 1
+    
+    def record(self, latency_ms: float):
+        value = min(max(int(latency_ms * 1000), 0), self.highest_trackable)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum_value += value
+        self.max_value = max(self.max_value, value)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+    
+    def merge(self, other: "LatencyHistogram"):
+        if other.sub_bucket_bits != self.sub_bucket_bits or len(other.counts) != len(self.counts):
+            raise ValueError("Cannot merge histograms with different precision or range")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum_value += other.sum_value
+        self.max_value = max(self.max_value, other.max_value)
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+    
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self.total:
+            return None
+        target = max(1, math.ceil(percentile / 100 * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max_value) / 1000
+        return self.max_value / 1000
+    
+    def summary(self) -> Dict[str, Any]:
+        if not self.total:
+            return {"count": 0}
+        return {
+            "count": self.total,
+            "min": self.min_value / 1000,
+            "mean": round(self.sum_value / self.total / 1000, 3),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max_value / 1000
+        }
+
+
+class LoadStage:
+    def __init__(self, start_rps: float, end_rps: float, duration: float):
+        if start_rps < 0 or end_rps < 0 or duration <= 0:
+            raise ValueError("Load stages need non-negative rates and a positive duration")
+        self.start_rps = float(start_rps)
+        self.end_rps = float(end_rps)
+        self.duration = float(duration)
+    
+    @property
+    def expected_requests(self) -> float:
+        return (self.start_rps + self.end_rps) / 2 * self.duration
+    
+    def offsets(self) -> Iterator[float]:
+        slope = (self.end_rps - self.start_rps) / self.duration
+        for k in range(int(self.expected_requests)):
+            if slope == 0:
+                yield k / self.start_rps
+            else:
+                yield (math.sqrt(self.start_rps ** 2 + 2 * slope * k) - self.start_rps) / slope
+
+
+class LoadProfile:
+    def __init__(self, stages: List[LoadStage], name: str = "custom"):
+        if not stages:
+            raise ValueError("A load profile needs at least one stage")
+        self.stages = stages
+        self.name = name
+        
+        peak = max(max(stage.start_rps, stage.end_rps) for stage in stages)
+        if peak > settings.LOAD_TEST_MAX_RPS:
+            raise ValueError(f"Target rate {peak} rps exceeds LOAD_TEST_MAX_RPS ({settings.LOAD_TEST_MAX_RPS})")
+        if self.duration > settings.LOAD_TEST_MAX_DURATION_SECONDS:
+            raise ValueError(f"Profile duration {self.duration}s exceeds LOAD_TEST_MAX_DURATION_SECONDS ({settings.LOAD_TEST_MAX_DURATION_SECONDS})")
+        if self.expected_requests > settings.LOAD_TEST_MAX_REQUESTS:
+            raise ValueError(f"Profile would send {int(self.expected_requests)} requests, above LOAD_TEST_MAX_REQUESTS ({settings.LOAD_TEST_MAX_REQUESTS})")
+    
+    @classmethod
+    def constant(cls, rps: float, duration: float) -> "LoadProfile":
+        return cls([LoadStage(rps, rps, duration)], name="constant")
+    
+    @classmethod
+    def ramp(cls, start_rps: float, end_rps: float, duration: float) -> "LoadProfile":
+        return cls([LoadStage(start_rps, end_rps, duration)], name="ramp")
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "LoadProfile":
+        profile_type = config.get("type", "constant")
+        try:
+            if profile_type == "constant":
+                return cls.constant(config["rps"], config.get("duration", settings.LOAD_TEST_DEFAULT_DURATION_SECONDS))
+            if profile_type == "ramp":
+                return cls.ramp(config.get("start_rps", 0), config["end_rps"], config.get("duration", settings.LOAD_TEST_DEFAULT_DURATION_SECONDS))
+            if profile_type == "stages":
+                return cls([
+                    LoadStage(
+                        stage.get("start_rps", stage.get("rps", 0)),
+                        stage.get("end_rps", stage.get("rps", 0)),
+                        stage["duration"]
+                    )
+                    for stage in config["stages"]
+                ], name="stages")
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid {profile_type} load profile: missing or malformed {e}")
+        raise ValueError(f"Unsupported load profile type '{profile_type}'. Supported: constant, ramp, stages")
+    
+    @property
+    def duration(self) -> float:
+        return sum(stage.duration for stage in self.stages)
+    
+    @property
+    def expected_requests(self) -> float:
+        return sum(stage.expected_requests for stage in self.stages)
+    
+    def offsets(self) -> Iterator[float]:
+        elapsed = 0.0
+        for stage in self.stages:
+            for offset in stage.offsets():
+                yield elapsed + offset
+            elapsed += stage.duration
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "type": self.name,
+            "duration_seconds": self.duration,
+            "expected_requests": int(self.expected_requests),
+            "stages": [
+                {"start_rps": stage.start_rps, "end_rps": stage.end_rps, "duration": stage.duration}
+                for stage in self.stages
+            ]
+        }
+
+
+class OpenLoopLoadGenerator:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[Dict[str, Any]] = None,
+        max_in_flight: Optional[int] = None
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.method = method
+        self.headers = headers or {}
+        self.body = body if method.upper() not in ["GET", "DELETE"] else None
+        self.max_in_flight = max_in_flight or settings.LOAD_TEST_MAX_IN_FLIGHT
+    
+    async def run(self, profile: LoadProfile) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        histogram = LatencyHistogram()
+        status_counts: Dict[str, int] = {}
+        timeline: Dict[int, Dict[str, int]] = {}
+        state = {"sent": 0, "dropped": 0, "errors": 0, "first_limited": None}
+        in_flight = set()
+        
+        async def send(intended: float, offset: float):
+            second = timeline.setdefault(int(offset), {"sent": 0, "ok": 0, "limited": 0, "errors": 0})
+            second["sent"] += 1
+            try:
+                response = await self.client.request(
+                    method=self.method,
+                    url=self.endpoint,
+                    headers=self.headers,
+                    json=self.body
+                )
+            except Exception as e:
+                state["errors"] += 1
+                second["errors"] += 1
+                logger.debug(f"Load request to {self.endpoint} failed: {e}")
+                return
+            
+            histogram.record((loop.time() - intended) * 1000)
+            code = str(response.status_code)
+            status_counts[code] = status_counts.get(code, 0) + 1
+            if response.status_code == 429:
+                second["limited"] += 1
+                if state["first_limited"] is None or offset < state["first_limited"]:
+                    state["first_limited"] = offset
+            elif response.status_code < 400:
+                second["ok"] += 1
+        
+        started = loop.time()
+        for offset in profile.offsets():
+            delay = started + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= self.max_in_flight:
+                state["dropped"] += 1
+                continue
+            task = asyncio.create_task(send(started + offset, offset))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            state["sent"] += 1
+        
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = loop.time() - started
+        
+        limited = status_counts.get("429", 0)
+        completed = sum(status_counts.values())
+        return {
+            "profile": profile.describe(),
+            "requests_sent": state["sent"],
+            "completed": completed,
+            "dropped": state["dropped"],
+            "errors": state["errors"],
+            "limited_responses": limited,
+            "limited_ratio": round(limited / completed, 4) if completed else 0.0,
+            "first_rate_limited_at_seconds": round(state["first_limited"], 3) if state["first_limited"] is not None else None,
+            "target_rps": round(profile.expected_requests / profile.duration, 2),
+            "achieved_rps": round(state["sent"] / elapsed, 2) if elapsed > 0 else 0.0,
+            "elapsed_seconds": round(elapsed, 2),
+            "status_counts": status_counts,
+            "latency_ms": histogram.summary(),
+            "timeline": [{"second": second, **counts} for second, counts in sorted(timeline.items())]
+        }
+    
+    async def find_rate_limit(
+        self,
+        start_rps: float,
+        max_rps: Optional[float] = None,
+        probe_seconds: Optional[float] = None,
+        cooldown_seconds: Optional[float] = None,
+        limited_ratio: float = 0.01,
+        tolerance: float = 0.1
+    ) -> Dict[str, Any]:
+        max_rps = min(max_rps or settings.LOAD_TEST_MAX_RPS, settings.LOAD_TEST_MAX_RPS)
+        probe_seconds = probe_seconds or settings.LOAD_TEST_PROBE_SECONDS
+        cooldown_seconds = settings.LOAD_TEST_PROBE_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        budget = settings.LOAD_TEST_MAX_REQUESTS
+        
+        probes = []
+        highest_ok: Optional[float] = None
+        lowest_limited: Optional[float] = None
+        rate = max(1.0, min(float(start_rps), max_rps))
+        budget_exhausted = False
+        
+        while True:
+            if budget < rate * probe_seconds:
+                budget_exhausted = True
+                break
+            if probes and cooldown_seconds:
+                await asyncio.sleep(cooldown_seconds)
+            
+            result = await self.run(LoadProfile.constant(rate, probe_seconds))
+            budget -= result["requests_sent"]
+            is_limited = result["limited_ratio"] > limited_ratio
+            probes.append({
+                "rps": round(rate, 2),
+                "limited": is_limited,
+                "limited_ratio": result["limited_ratio"],
+                "first_rate_limited_at_seconds": result["first_rate_limited_at_seconds"],
+                "p95_ms": result["latency_ms"].get("p95")
+            })
+            
+            if is_limited:
+                lowest_limited = rate
+            else:
+                highest_ok = rate
+            
+            if lowest_limited is None:
+                if rate >= max_rps:
+                    break
+                rate = min(rate * 2, max_rps)
+            else:
+                low = highest_ok or 0.0
+                if lowest_limited - low <= max(1.0, tolerance * lowest_limited):
+                    break
+                rate = (low + lowest_limited) / 2
+        
+        return {
+            "limit_found": lowest_limited is not None,
+            "max_sustained_rps": round(highest_ok, 2) if highest_ok is not None else None,
+            "limited_at_rps": round(lowest_limited, 2) if lowest_limited is not None else None,
+            "budget_exhausted": budget_exhausted,
+            "probes": probes
+        }
@@ -0,0 +1,196 @@
+import json
+import threading
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+import redis
+import logging
+
+from config import settings
+from database import PolicyTemplate
+from modules.compliance import CompiledPolicy, ComplianceEngine, get_compliance_engine, normalize_framework
+from modules.license_policy import CompiledLicensePolicy
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "policy-templates:invalidate"
+RECONNECT_SECONDS = 5
+
+
+class TemplateAccessError(ValueError):
+    pass
+
+
+def check_template_access(db: Session, template_id: int, user_id: Optional[int]):
+    owner = db.query(PolicyTemplate.is_public, PolicyTemplate.created_by).filter(PolicyTemplate.id == template_id).first()
+    if owner is None:
+        raise LookupError(f"Policy template {template_id} not found")
+    if not owner.is_public and (user_id is None or owner.created_by != user_id):
+        raise TemplateAccessError(f"Policy template {template_id} is private to its owner")
+
+
+class CompiledTemplate:
+    def __init__(
+        self,
+        template: PolicyTemplate,
+        policies: Dict[str, CompiledPolicy],
+        license_policy: Optional[CompiledLicensePolicy] = None
+    ):
+        self.id = template.id
+        self.name = template.name
+        self.framework = template.framework
+        self.version = template.version
+        self.policies = policies
+        self.license_policy = license_policy
+    
+    @property
+    def is_license(self) -> bool:
+        return self.license_policy is not None
+    
+    def select(self, policy_name: Optional[str] = None) -> Dict[str, CompiledPolicy]:
+        if not policy_name:
+            return self.policies
+        if policy_name not in self.policies:
+            raise ValueError(f"Policy '{policy_name}' not found in template '{self.name}'")
+        return {policy_name: self.policies[policy_name]}
+
+
+class PolicyTemplateRegistry:
+    def __init__(self, engine: Optional[ComplianceEngine] = None):
+        self.engine = engine or get_compliance_engine()
+        self.subscribed = False
+        self._templates = LRUCache(settings.COMPLIANCE_POLICY_CACHE_SIZE)
+        self._latest_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        try:
+            self.redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+            self.redis_client.ping()
+        except Exception as e:
+            logger.warning(f"Redis not available, policy template invalidation is process-local: {e}")
+            self.redis_client = None
+    
+    def get(self, db: Session, template_id: int) -> CompiledTemplate:
+        cached = self._templates.get(template_id)
+        if cached is not None and cached.version >= self._latest_versions.get(template_id, 0):
+            if self.subscribed:
+                return cached
+            version = db.query(PolicyTemplate.version).filter(PolicyTemplate.id == template_id).scalar()
+            if version == cached.version:
+                return cached
+        
+        template = db.query(PolicyTemplate).filter(PolicyTemplate.id == template_id).first()
+        if template is None:
+            self._templates.pop(template_id)
+            raise LookupError(f"Policy template {template_id} not found")
+        
+        compiled = self.compile(template)
+        with self._lock:
+            if compiled.version >= self._latest_versions.get(template_id, 0):
+                self._templates.put(template_id, compiled)
+        return compiled
+    
+    def compile(self, template: PolicyTemplate) -> CompiledTemplate:
+        errors = self.validate(template.framework, template.policy_content)
+        if errors:
+            raise ValueError("; ".join(errors))
+        
+        if normalize_framework(template.framework) == "license":
+            return CompiledTemplate(template, {}, CompiledLicensePolicy(template.name, template.policy_content))
+        return CompiledTemplate(template, self.engine.compile_policy_set(template.policy_content))
+    
+    def validate(self, framework: str, policy_content: Any) -> List[str]:
+        if not isinstance(policy_content, dict) or not policy_content:
+            return ["policy_content must be a non-empty object"]
+        
+        if normalize_framework(framework) == "license":
+            return [
+                f"'{field}' must be a list of license identifiers"
+                for field in ("allow", "deny")
+                if not isinstance(policy_content.get(field, []), list)
+                or not all(isinstance(value, str) for value in policy_content.get(field, []))
+            ]
+        
+        errors = [
+            f"Policy '{name}' must be an object with a string 'rule'"
+            for name, policy_def in policy_content.items()
+            if not isinstance(policy_def, dict) or not isinstance(policy_def.get("rule"), str)
+        ]
+        if errors:
+            return errors
+        
+        return [
+            f"Policy '{name}': {policy.error}"
+            for name, policy in self.engine.compile_policy_set(policy_content).items()
+            if policy.error
+        ]
+    
+    def invalidate(self, template_id: int, version: Optional[int] = None):
+        with self._lock:
+            if version is not None:
+                self._latest_versions[template_id] = max(version, self._latest_versions.get(template_id, 0))
+            self._templates.pop(template_id)
+    
+    def publish_invalidation(self, template_id: int, version: int):
+        self.invalidate(template_id, version)
+        if self.redis_client is None:
+            return
+        try:
+            self.redis_client.publish(INVALIDATION_CHANNEL, json.dumps({"id": template_id, "version": version}))
+        except Exception as e:
+            logger.error(f"Failed to publish policy template invalidation for {template_id}: {e}")
+    
+    def start_listener(self):
+        if self.redis_client is None or self._listener is not None:
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="policy-template-invalidation", daemon=True)
+        self._listener.start()
+    
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=RECONNECT_SECONDS)
+            self._listener = None
+    
+    def _listen(self):
+        while not self._stop.is_set():
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                self._templates.clear()
+                self.subscribed = True
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._handle_message(message.get("data"))
+            except Exception as e:
+                logger.warning(f"Policy template invalidation listener disconnected: {e}")
+            finally:
+                self.subscribed = False
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            self._stop.wait(RECONNECT_SECONDS)
+    
+    def _handle_message(self, data: Any):
+        try:
+            payload = json.loads(data)
+            self.invalidate(int(payload["id"]), payload.get("version"))
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring malformed policy template invalidation {data!r}: {e}")
+
+
+_registry: Optional[PolicyTemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> PolicyTemplateRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PolicyTemplateRegistry()
+    return _registry
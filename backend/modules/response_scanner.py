@@ -0,0 +1,194 @@
+import re
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def luhn_valid(digits: str) -> bool:
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if index % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def _card_number(match: bytes) -> bool:
+    digits = "".join(chr(c) for c in match if 48 <= c <= 57)
+    return 13 <= len(digits) <= 19 and len(set(digits)) > 1 and luhn_valid(digits)
+
+
+def _ssn(match: bytes) -> bool:
+    area, group, serial = match.split(b"-")
+    return area not in (b"000", b"666") and not area.startswith(b"9") and group != b"00" and serial != b"0000"
+
+
+WORD_BYTES = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
+
+
+class Detector:
+    def __init__(
+        self,
+        name: str,
+        pattern: str,
+        max_length: int,
+        severity: str = "high",
+        validator: Optional[Callable[[bytes], bool]] = None,
+        redact: bool = True,
+        word_start: bool = False
+    ):
+        self.name = name
+        self.pattern = pattern
+        self.max_length = max_length
+        self.severity = severity
+        self.validator = validator
+        self.redact = redact
+        self.word_start = word_start
+    
+    @classmethod
+    def literal(cls, name: str, text: str, severity: str = "high", ignore_case: bool = False) -> "Detector":
+        head, rest = text[0], re.escape(text[1:])
+        if ignore_case and head.isalpha():
+            pattern = f"[{head.lower()}{head.upper()}](?i:{rest})"
+        else:
+            pattern = re.escape(head) + (f"(?i:{rest})" if ignore_case else rest)
+        return cls(name, pattern, len(text.encode()), severity, redact=False)
+    
+    def accepts(self, buffer: bytes, start: int, match: bytes) -> bool:
+        if self.word_start and start > 0 and buffer[start - 1] in WORD_BYTES:
+            return False
+        return self.validator is None or self.validator(match)
+    
+    def describe(self, match: bytes) -> str:
+        text = match.decode("utf-8", errors="replace")
+        if not self.redact:
+            return text
+        if len(text) <= 12:
+            return text[:2] + "***"
+        return f"{text[:4]}***{text[-4:]}"
+
+
+SECRET_DETECTORS = [
+    Detector("private_key", r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----", 64, "critical"),
+    Detector("jwt", r"eyJ[A-Za-z0-9_-]{5,2000}\.eyJ[A-Za-z0-9_-]{5,4000}\.[A-Za-z0-9_-]{0,1000}", 7010, word_start=True),
+    Detector("aws_access_key", r"A(?:KIA|SIA)[0-9A-Z]{16}\b", 20, "critical", word_start=True),
+    Detector("github_token", r"gh[pousr]_[A-Za-z0-9]{36,255}\b", 259, "critical", word_start=True),
+    Detector("slack_token", r"xox[abposr]-[A-Za-z0-9-]{10,200}", 205, "critical", word_start=True),
+    Detector("stripe_secret_key", r"[sr]k_live_[A-Za-z0-9]{24,99}\b", 107, "critical", word_start=True),
+    Detector("google_api_key", r"AIza[0-9A-Za-z_-]{35}\b", 39, word_start=True),
+    Detector("ssn", r"[0-9](?<![0-9].)[0-9]{2}-[0-9]{2}-[0-9]{4}(?![0-9])", 11, validator=_ssn),
+    Detector("credit_card_number", r"[0-9](?<![0-9].)(?:[ -]?[0-9]){12,18}(?![0-9])", 37, validator=_card_number)
+]
+
+SENSITIVE_KEYWORDS = ["password", "secret", "token", "api_key", "credit_card", "ssn", "social_security"]
+
+
+def sensitive_data_detectors() -> List[Detector]:
+    return SECRET_DETECTORS + [
+        Detector.literal(keyword, keyword, severity="low", ignore_case=True)
+        for keyword in SENSITIVE_KEYWORDS
+    ]
+
+
+class ScanSession:
+    def __init__(self, scanner: "ResponseScanner"):
+        self.scanner = scanner
+        self.bytes_scanned = 0
+        self.truncated = False
+        self.findings: Dict[tuple, Dict[str, Any]] = {}
+        self._carry = b""
+        self._carry_offset = 0
+        self._resume = 0
+    
+    def feed(self, chunk: bytes) -> bool:
+        remaining = self.scanner.max_bytes - self.bytes_scanned
+        if len(chunk) > remaining:
+            self.truncated = True
+            chunk = chunk[:remaining]
+        self.bytes_scanned += len(chunk)
+        self._scan(self._carry + chunk, final=False)
+        return not self.truncated
+    
+    def close(self) -> Dict[str, Any]:
+        self._scan(self._carry, final=True)
+        self._carry = b""
+        return {
+            "findings": list(self.findings.values()),
+            "bytes_scanned": self.bytes_scanned,
+            "truncated": self.truncated
+        }
+    
+    def _scan(self, buffer: bytes, final: bool):
+        base = self._carry_offset
+        position = self._resume - base
+        cutoff = len(buffer) if final else max(position, len(buffer) - self.scanner.overlap)
+        while True:
+            match = self.scanner.pattern.search(buffer, position)
+            if match is None or match.start() >= cutoff:
+                break
+            detector = self.scanner.detectors[match.lastgroup]
+            if not detector.accepts(buffer, match.start(), match.group()):
+                position = match.start() + 1
+                continue
+            position = match.end()
+            self._resume = base + position
+            self._record(detector, match.group(), base + match.start())
+        
+        if not final:
+            self._resume = max(self._resume, base + cutoff)
+            keep = max(0, min(cutoff, self._resume - base) - 1)
+            self._carry = buffer[keep:]
+            self._carry_offset = base + keep
+    
+    def _record(self, detector: Detector, match: bytes, offset: int):
+        key = (detector.name, match)
+        finding = self.findings.get(key)
+        if finding is not None:
+            finding["occurrences"] += 1
+        elif len(self.findings) < self.scanner.max_findings:
+            self.findings[key] = {
+                "detector": detector.name,
+                "severity": detector.severity,
+                "match": detector.describe(match),
+                "offset": offset,
+                "occurrences": 1
+            }
+
+
+class ResponseScanner:
+    def __init__(
+        self,
+        detectors: List[Detector],
+        max_bytes: Optional[int] = None,
+        max_findings: Optional[int] = None
+    ):
+        if not detectors:
+            raise ValueError("A response scanner needs at least one detector")
+        self.detectors = {f"d{index}": detector for index, detector in enumerate(detectors)}
+        self.pattern = re.compile("|".join(
+            f"{detector.pattern}(?P<{group}>)" for group, detector in self.detectors.items()
+        ).encode())
+        self.overlap = max(detector.max_length for detector in detectors)
+        self.max_bytes = max_bytes or settings.RESPONSE_SCAN_MAX_BYTES
+        self.max_findings = max_findings or settings.RESPONSE_SCAN_MAX_FINDINGS
+    
+    def session(self) -> ScanSession:
+        return ScanSession(self)
+    
+    def scan_bytes(self, content: bytes) -> Dict[str, Any]:
+        session = self.session()
+        session.feed(content)
+        return session.close()
+    
+    async def scan_stream(self, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        session = self.session()
+        async for chunk in chunks:
+            if not session.feed(chunk):
+                break
+        return session.close()
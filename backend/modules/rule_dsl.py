@@ -0,0 +1,489 @@
+import ast
+import re
+from typing import Dict, Any, Callable, FrozenSet, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|<=|>=|\?\?|[<>()\[\],.])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+KEYWORDS = {"and", "or", "not", "in", "matches", "true", "false", "null"}
+LITERAL_KEYWORDS = {"true": True, "false": False, "null": None}
+COMPARISON_OPERATORS = {"==", "!=", "<", "<=", ">", ">=", "in", "not in", "matches"}
+MAX_RULE_NODES = 1000
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+class RuleTranslationError(ValueError):
+    pass
+
+
+def tokenize(source: str) -> List[Tuple[str, Any]]:
+    tokens = []
+    position = 0
+    source = source.rstrip()
+    while position < len(source):
+        match = TOKEN_PATTERN.match(source, position)
+        if not match or match.end() == position:
+            raise RuleSyntaxError(f"Unexpected character at {position}: {source[position:position + 10]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "number":
+            tokens.append(("literal", float(text) if any(c in text for c in ".eE") else int(text)))
+        elif kind == "string":
+            tokens.append(("literal", ast.literal_eval(text)))
+        elif kind == "name" and text.lower() in LITERAL_KEYWORDS:
+            tokens.append(("literal", LITERAL_KEYWORDS[text.lower()]))
+        elif kind == "name" and text.lower() in KEYWORDS:
+            tokens.append(("keyword", text.lower()))
+        else:
+            tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.position = 0
+        self.nodes = 0
+    
+    def parse(self) -> Tuple:
+        if not self.tokens:
+            raise RuleSyntaxError("Empty rule")
+        node = self._parse_or()
+        if self.position != len(self.tokens):
+            raise RuleSyntaxError(f"Unexpected {self._peek()[1]!r} in rule {self.source!r}")
+        return node
+    
+    def _peek(self, offset: int = 0) -> Tuple[Optional[str], Any]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+    
+    def _take(self) -> Tuple[str, Any]:
+        token = self._peek()
+        if token[0] is None:
+            raise RuleSyntaxError(f"Unexpected end of rule {self.source!r}")
+        self.position += 1
+        return token
+    
+    def _expect(self, kind: str, value: Any):
+        token = self._take()
+        if token != (kind, value):
+            raise RuleSyntaxError(f"Expected {value!r} but found {token[1]!r} in rule {self.source!r}")
+    
+    def _node(self, *node) -> Tuple:
+        self.nodes += 1
+        if self.nodes > MAX_RULE_NODES:
+            raise RuleSyntaxError(f"Rule exceeds {MAX_RULE_NODES} nodes")
+        return node
+    
+    def _parse_or(self) -> Tuple:
+        children = [self._parse_and()]
+        while self._peek() == ("keyword", "or"):
+            self._take()
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else self._node("or", tuple(children))
+    
+    def _parse_and(self) -> Tuple:
+        children = [self._parse_not()]
+        while self._peek() == ("keyword", "and"):
+            self._take()
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else self._node("and", tuple(children))
+    
+    def _parse_not(self) -> Tuple:
+        if self._peek() == ("keyword", "not"):
+            self._take()
+            return self._node("not", self._parse_not())
+        return self._parse_comparison()
+    
+    def _parse_comparison(self) -> Tuple:
+        left = self._parse_operand()
+        kind, value = self._peek()
+        
+        if kind == "op" and value in COMPARISON_OPERATORS:
+            operator = self._take()[1]
+        elif (kind, value) in (("keyword", "in"), ("keyword", "matches")):
+            operator = self._take()[1]
+        elif (kind, value) == ("keyword", "not") and self._peek(1) == ("keyword", "in"):
+            self._take()
+            self._take()
+            operator = "not in"
+        else:
+            return left
+        
+        right = self._parse_operand()
+        if operator == "matches":
+            if right[0] != "literal" or not isinstance(right[1], str):
+                raise RuleSyntaxError("'matches' requires a string pattern")
+            try:
+                re.compile(right[1])
+            except re.error as e:
+                raise RuleSyntaxError(f"Invalid pattern {right[1]!r}: {e}")
+        
+        next_kind, next_value = self._peek()
+        if (next_kind == "op" and next_value in COMPARISON_OPERATORS) or \
+                (next_kind, next_value) in (("keyword", "in"), ("keyword", "matches")):
+            raise RuleSyntaxError("Chained comparisons are not supported, combine them with 'and'")
+        
+        return self._node("cmp", operator, left, right)
+    
+    def _parse_operand(self) -> Tuple:
+        node = self._parse_primary()
+        if self._peek() == ("op", "??"):
+            self._take()
+            fallback = self._parse_primary()
+            if fallback[0] not in ("literal", "list"):
+                raise RuleSyntaxError("'??' requires a literal default")
+            node = self._node("default", node, fallback)
+        return node
+    
+    def _parse_primary(self) -> Tuple:
+        kind, value = self._take()
+        
+        if kind == "literal":
+            return self._node("literal", value)
+        
+        if (kind, value) == ("op", "("):
+            node = self._parse_or()
+            self._expect("op", ")")
+            return node
+        
+        if (kind, value) == ("op", "["):
+            items = []
+            if self._peek() != ("op", "]"):
+                while True:
+                    item_kind, item_value = self._take()
+                    if item_kind != "literal":
+                        raise RuleSyntaxError("List items must be literals")
+                    items.append(item_value)
+                    if self._peek() != ("op", ","):
+                        break
+                    self._take()
+            self._expect("op", "]")
+            return self._node("list", tuple(items))
+        
+        if kind == "name":
+            segments = [value]
+            while True:
+                if self._peek() == ("op", "."):
+                    self._take()
+                    segment_kind, segment = self._take()
+                    if segment_kind not in ("name", "keyword"):
+                        raise RuleSyntaxError(f"Invalid path segment {segment!r}")
+                    segments.append(segment)
+                elif self._peek() == ("op", "["):
+                    self._take()
+                    segment_kind, segment = self._take()
+                    if segment_kind != "literal" or not isinstance(segment, (str, int)) or isinstance(segment, bool):
+                        raise RuleSyntaxError("Path index must be a string or integer")
+                    segments.append(segment)
+                    self._expect("op", "]")
+                else:
+                    break
+            return self._node("path", tuple(segments))
+        
+        raise RuleSyntaxError(f"Unexpected {value!r} in rule {self.source!r}")
+
+
+def parse_rule(source: str) -> Tuple:
+    return _Parser(source).parse()
+
+
+def rule_paths(node: Tuple) -> FrozenSet[Tuple]:
+    kind = node[0]
+    if kind == "path":
+        return frozenset([node[1]])
+    if kind in ("and", "or"):
+        return frozenset().union(*(rule_paths(child) for child in node[1]))
+    if kind in ("not", "default"):
+        return rule_paths(node[1])
+    if kind == "cmp":
+        return rule_paths(node[2]) | rule_paths(node[3])
+    return frozenset()
+
+
+def path_key(segments: Tuple) -> str:
+    return ".".join(str(segment) for segment in segments)
+
+
+def lookup_path(resource_data: Any, segments: Tuple) -> Any:
+    value = resource_data
+    for segment in segments:
+        if isinstance(value, dict):
+            value = value.get(segment)
+        elif isinstance(value, list) and isinstance(segment, int) and -len(value) <= segment < len(value):
+            value = value[segment]
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+def _ordered(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    def operator(left: Any, right: Any) -> bool:
+        try:
+            return compare(left, right)
+        except TypeError:
+            return False
+    return operator
+
+
+def _contains(item: Any, container: Any) -> bool:
+    try:
+        return container is not None and item in container
+    except TypeError:
+        return False
+
+
+OPERATORS = {
+    "==": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    "<": _ordered(lambda left, right: left < right),
+    "<=": _ordered(lambda left, right: left <= right),
+    ">": _ordered(lambda left, right: left > right),
+    ">=": _ordered(lambda left, right: left >= right),
+    "in": _contains,
+    "not in": lambda left, right: right is not None and not _contains(left, right),
+}
+
+
+def _compile_node(node: Tuple) -> Callable[[Dict[str, Any]], Any]:
+    kind = node[0]
+    
+    if kind in ("literal", "list"):
+        value = node[1]
+        return lambda resource_data: value
+    
+    if kind == "path":
+        segments = node[1]
+        if len(segments) == 1:
+            key = segments[0]
+            return lambda resource_data: resource_data.get(key)
+        return lambda resource_data: lookup_path(resource_data, segments)
+    
+    if kind == "default":
+        inner = _compile_node(node[1])
+        fallback = node[2][1]
+        
+        def evaluate_default(resource_data: Dict[str, Any]) -> Any:
+            value = inner(resource_data)
+            return fallback if value is None else value
+        return evaluate_default
+    
+    if kind == "not":
+        inner = _compile_node(node[1])
+        return lambda resource_data: not inner(resource_data)
+    
+    if kind == "and":
+        children = [_compile_node(child) for child in node[1]]
+        return lambda resource_data: all(child(resource_data) for child in children)
+    
+    if kind == "or":
+        children = [_compile_node(child) for child in node[1]]
+        return lambda resource_data: any(child(resource_data) for child in children)
+    
+    if kind == "cmp":
+        operator, left_node, right_node = node[1], node[2], node[3]
+        left = _compile_node(left_node)
+        
+        if operator == "matches":
+            pattern = re.compile(right_node[1])
+            return lambda resource_data: isinstance(value := left(resource_data), str) and pattern.search(value) is not None
+        
+        compare = OPERATORS[operator]
+        if right_node[0] in ("literal", "list"):
+            constant = right_node[1]
+            if right_node[0] == "list" and operator in ("in", "not in"):
+                try:
+                    constant = frozenset(constant)
+                except TypeError:
+                    pass
+            return lambda resource_data: compare(left(resource_data), constant)
+        
+        right = _compile_node(right_node)
+        return lambda resource_data: compare(left(resource_data), right(resource_data))
+    
+    raise RuleSyntaxError(f"Unknown node type {kind!r}")
+
+
+class CompiledRule:
+    def __init__(self, source: str, tree: Tuple):
+        self.source = source
+        self.tree = tree
+        self.paths = rule_paths(tree)
+        self.reads = frozenset(path_key(path) for path in self.paths)
+        self.keys = frozenset(path[0] for path in self.paths)
+        self._evaluate = _compile_node(tree)
+    
+    def __call__(self, resource_data: Dict[str, Any]) -> bool:
+        if not isinstance(resource_data, dict):
+            return False
+        return bool(self._evaluate(resource_data))
+
+
+def compile_rule(source: str) -> CompiledRule:
+    return CompiledRule(source, parse_rule(source))
+
+
+def compile_rule_or_legacy(source: str) -> CompiledRule:
+    try:
+        legacy = ("name", "resource_data") in tokenize(source)
+    except RuleSyntaxError:
+        legacy = False
+    if legacy:
+        return compile_rule(translate_python_rule(source))
+    
+    try:
+        return compile_rule(source)
+    except RuleSyntaxError as dsl_error:
+        try:
+            translated = translate_python_rule(source)
+        except RuleTranslationError:
+            raise dsl_error
+        return compile_rule(translated)
+
+
+def render(node: Tuple, parent_precedence: int = 0) -> str:
+    kind = node[0]
+    precedence = {"or": 1, "and": 2, "not": 3, "cmp": 4, "default": 5}.get(kind, 6)
+    
+    if kind == "literal":
+        text = _render_literal(node[1])
+    elif kind == "list":
+        text = "[" + ", ".join(_render_literal(item) for item in node[1]) + "]"
+    elif kind == "path":
+        text = _render_path(node[1])
+    elif kind == "default":
+        text = f"{render(node[1], 6)} ?? {render(node[2], 6)}"
+    elif kind == "not":
+        text = f"not {render(node[1], 3)}"
+    elif kind in ("and", "or"):
+        text = f" {kind} ".join(render(child, precedence + 1) for child in node[1])
+    elif kind == "cmp":
+        text = f"{render(node[2], 5)} {node[1]} {render(node[3], 5)}"
+    else:
+        raise RuleSyntaxError(f"Unknown node type {kind!r}")
+    
+    return f"({text})" if precedence < parent_precedence else text
+
+
+def _render_literal(value: Any) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return repr(value)
+    return str(value)
+
+
+def _render_path(segments: Tuple) -> str:
+    text = ""
+    for segment in segments:
+        if isinstance(segment, str) and IDENTIFIER_PATTERN.match(segment) and segment.lower() not in KEYWORDS:
+            text += f".{segment}" if text else segment
+        else:
+            text += f"[{_render_literal(segment)}]"
+    if not IDENTIFIER_PATTERN.match(text.split(".")[0].split("[")[0] or "["):
+        raise RuleTranslationError(f"Path must start with a plain key: {segments!r}")
+    return text
+
+
+LEGACY_COMPARISONS = {
+    ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=",
+    ast.In: "in", ast.NotIn: "not in", ast.Is: "==", ast.IsNot: "!=",
+}
+
+
+def translate_python_rule(rule: str) -> str:
+    try:
+        tree = ast.parse(rule.strip(), mode="eval")
+    except SyntaxError as e:
+        raise RuleTranslationError(f"Rule is neither valid DSL nor Python: {e}")
+    return render(_translate(tree.body))
+
+
+def _translate(node: ast.AST) -> Tuple:
+    if isinstance(node, ast.BoolOp):
+        kind = "and" if isinstance(node.op, ast.And) else "or"
+        return (kind, tuple(_translate(value) for value in node.values))
+    
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ("not", _translate(node.operand))
+    
+    if isinstance(node, ast.Compare):
+        comparisons = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            operator = LEGACY_COMPARISONS.get(type(op))
+            if operator is None:
+                raise RuleTranslationError(f"Unsupported operator {type(op).__name__}")
+            comparisons.append(("cmp", operator, _translate(left), _translate(right)))
+            left = right
+        return comparisons[0] if len(comparisons) == 1 else ("and", tuple(comparisons))
+    
+    if isinstance(node, (ast.Constant, ast.UnaryOp, ast.List, ast.Tuple, ast.Set)):
+        value = _literal(node)
+        return ("list", tuple(value)) if isinstance(value, list) else ("literal", value)
+    
+    segments, default = _translate_path(node)
+    if not segments:
+        raise RuleTranslationError("A rule cannot reference resource_data as a whole")
+    path = ("path", tuple(segments))
+    if default is None:
+        return path
+    return ("default", path, ("list", tuple(default)) if isinstance(default, list) else ("literal", default))
+
+
+def _translate_path(node: ast.AST) -> Tuple[List[Any], Any]:
+    if isinstance(node, ast.Name) and node.id == "resource_data":
+        return [], None
+    
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "get" \
+            and not node.keywords and 1 <= len(node.args) <= 2:
+        segments, _ = _translate_path(node.func.value)
+        segments.append(_key(node.args[0]))
+        default = _literal(node.args[1]) if len(node.args) == 2 else None
+        return segments, None if default == {} else default
+    
+    if isinstance(node, ast.Subscript):
+        segments, _ = _translate_path(node.value)
+        segments.append(_key(node.slice))
+        return segments, None
+    
+    raise RuleTranslationError(f"Unsupported expression: {ast.dump(node)[:80]}")
+
+
+def _key(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int)) and not isinstance(node.value, bool):
+        return node.value
+    raise RuleTranslationError("Keys must be string or integer constants")
+
+
+def _literal(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool, type(None))):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+            and isinstance(node.operand.value, (int, float)) and not isinstance(node.operand.value, bool):
+        return -node.operand.value
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [_literal(element) for element in node.elts]
+    if isinstance(node, ast.Dict) and not node.keys:
+        return {}
+    raise RuleTranslationError(f"Unsupported literal: {ast.dump(node)[:80]}")
@@ -0,0 +1,177 @@
+import re
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import numpy as np
+import logging
+
+from modules.rule_dsl import OPERATORS, lookup_path
+
+logger = logging.getLogger(__name__)
+
+ColumnFunction = Callable[["ColumnFrame"], Optional[np.ndarray]]
+
+
+class UnsupportedRule(Exception):
+    pass
+
+
+def _factor_key(value: Any) -> Any:
+    if isinstance(value, list):
+        return (list, tuple(value))
+    return value
+
+
+class ColumnFrame:
+    def __init__(self, resources: List[Dict[str, Any]]):
+        self.resources = resources
+        self.size = len(resources)
+        self._columns: Dict[Tuple, Optional[Tuple[np.ndarray, List[Any]]]] = {}
+    
+    def column(self, path: Tuple) -> Optional[Tuple[np.ndarray, List[Any]]]:
+        if path not in self._columns:
+            self._columns[path] = self._build_column(path)
+        return self._columns[path]
+    
+    def _build_column(self, path: Tuple) -> Optional[Tuple[np.ndarray, List[Any]]]:
+        if len(path) == 1:
+            key = path[0]
+            values = [resource_data.get(key) for resource_data in self.resources]
+        else:
+            values = [lookup_path(resource_data, path) for resource_data in self.resources]
+        
+        index: Dict[Any, int] = {}
+        try:
+            codes = [index.setdefault(value, len(index)) for value in values]
+            uniques = list(index)
+        except TypeError:
+            index.clear()
+            try:
+                codes = [index.setdefault(_factor_key(value), len(index)) for value in values]
+            except TypeError:
+                return None
+            first_seen = {}
+            for value, code in zip(values, codes):
+                first_seen.setdefault(code, value)
+            uniques = [first_seen[code] for code in range(len(index))]
+        
+        return np.fromiter(codes, dtype=np.int64, count=self.size), uniques
+
+
+def vectorize_rule(tree: Tuple) -> Optional[ColumnFunction]:
+    try:
+        return _vectorize(tree)
+    except UnsupportedRule:
+        return None
+
+
+def _vectorize(node: Tuple) -> ColumnFunction:
+    kind = node[0]
+    
+    if kind in ("literal", "list"):
+        value = bool(node[1])
+        return lambda frame: np.full(frame.size, value)
+    
+    if kind in ("and", "or"):
+        children = [_vectorize(child) for child in node[1]]
+        combine = np.logical_and.reduce if kind == "and" else np.logical_or.reduce
+        
+        def evaluate_boolean(frame: ColumnFrame) -> Optional[np.ndarray]:
+            verdicts = []
+            for child in children:
+                verdict = child(frame)
+                if verdict is None:
+                    return None
+                verdicts.append(verdict)
+            return combine(verdicts)
+        return evaluate_boolean
+    
+    if kind == "not":
+        inner = _vectorize(node[1])
+        
+        def evaluate_not(frame: ColumnFrame) -> Optional[np.ndarray]:
+            verdict = inner(frame)
+            return None if verdict is None else ~verdict
+        return evaluate_not
+    
+    if kind in ("path", "default"):
+        return _vectorize_values(node, None, lambda value, _: bool(value))
+    
+    if kind == "cmp":
+        operator, left, right = node[1], node[2], node[3]
+        if operator == "matches":
+            pattern = re.compile(right[1])
+            compare = lambda value, _: isinstance(value, str) and pattern.search(value) is not None
+            return _vectorize_values(left, None, compare)
+        
+        compare = OPERATORS[operator]
+        if right[0] in ("literal", "list"):
+            constant = right[1]
+            if left[0] in ("literal", "list"):
+                value = bool(compare(left[1], constant))
+                return lambda frame: np.full(frame.size, value)
+            return _vectorize_values(left, None, lambda value, _: compare(value, constant))
+        if left[0] in ("literal", "list"):
+            constant = left[1]
+            return _vectorize_values(right, None, lambda value, _: compare(constant, value))
+        return _vectorize_values(left, right, compare)
+    
+    raise UnsupportedRule(kind)
+
+
+def _value_source(node: Tuple) -> Tuple[Tuple, Callable[[Any], Any]]:
+    if node[0] == "path":
+        return node[1], lambda value: value
+    if node[0] == "default":
+        path, transform = _value_source(node[1])
+        fallback = node[2][1]
+        
+        def apply_default(value: Any) -> Any:
+            value = transform(value)
+            return fallback if value is None else value
+        return path, apply_default
+    raise UnsupportedRule(node[0])
+
+
+def _vectorize_values(
+    left: Tuple,
+    right: Optional[Tuple],
+    compare: Callable[[Any, Any], Any]
+) -> ColumnFunction:
+    left_path, left_transform = _value_source(left)
+    
+    if right is None:
+        def evaluate_column(frame: ColumnFrame) -> Optional[np.ndarray]:
+            column = frame.column(left_path)
+            if column is None:
+                return None
+            codes, uniques = column
+            table = np.fromiter(
+                (bool(compare(left_transform(value), None)) for value in uniques),
+                dtype=bool,
+                count=len(uniques)
+            )
+            return table[codes]
+        return evaluate_column
+    
+    right_path, right_transform = _value_source(right)
+    
+    def evaluate_columns(frame: ColumnFrame) -> Optional[np.ndarray]:
+        left_column = frame.column(left_path)
+        right_column = frame.column(right_path)
+        if left_column is None or right_column is None:
+            return None
+        left_codes, left_uniques = left_column
+        right_codes, right_uniques = right_column
+        pairs, codes = np.unique(left_codes * len(right_uniques) + right_codes, return_inverse=True)
+        table = np.fromiter(
+            (
+                bool(compare(
+                    left_transform(left_uniques[pair // len(right_uniques)]),
+                    right_transform(right_uniques[pair % len(right_uniques)])
+                ))
+                for pair in pairs.tolist()
+            ),
+            dtype=bool,
+            count=len(pairs)
+        )
+        return table[codes.reshape(-1)]
+    return evaluate_columns
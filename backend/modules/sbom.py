@@ -1,18 +1,32 @@
 import json
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.backends import default_backend
 import hashlib
+import heapq
 import logging
+import os
+import secrets
+
+from config import settings
+from modules.attestation import AttestationSigner, IN_TOTO_STATEMENT_TYPE, get_attestation_signer
+from modules.dependencies import DependencyAnalyzer
+from modules.vex import PURL_ECOSYSTEMS
+from utils.blob_store import BlobStore
 
 logger = logging.getLogger(__name__)
 
+PROVENANCE_PROPERTY = "securestack:source_sbom"
+
 
 class SBOMGenerator:
-    def __init__(self):
+    def __init__(
+        self,
+        analyzer: Optional[DependencyAnalyzer] = None,
+        signer: Optional[AttestationSigner] = None
+    ):
         self.supported_formats = ["cyclonedx", "spdx"]
+        self.analyzer = analyzer
+        self.signer = signer
     
     async def generate_sbom(
         self,
@@ -21,56 +35,134 @@ class SBOMGenerator:
         format_type: str = "cyclonedx",
         dependencies: List[Dict[str, Any]] = None,
         metadata: Dict[str, Any] = None,
-        include_attestation: bool = True
+        include_attestation: bool = True,
+        enrich_vulnerabilities: bool = False
     ) -> Dict[str, Any]:
         if format_type not in self.supported_formats:
             raise ValueError(f"Unsupported format: {format_type}. Supported: {self.supported_formats}")
         
+        dependencies, _ = self._unique_dependencies(dependencies or [])
+        vulnerability_results = None
+        if enrich_vulnerabilities:
+            vulnerability_results = await self._lookup_vulnerabilities(dependencies)
+        
         if format_type == "cyclonedx":
             sbom_content = self._generate_cyclonedx(
-                project_name, version, dependencies or [], metadata or {}
+                project_name, version, dependencies, metadata or {}, vulnerability_results
             )
         else:
             sbom_content = self._generate_spdx(
-                project_name, version, dependencies or [], metadata or {}
+                project_name, version, dependencies, metadata or {}, vulnerability_results
             )
         
+        content = json.dumps(sbom_content, indent=2)
+        
         attestation = None
         if include_attestation:
-            attestation = self._generate_attestation(sbom_content, project_name, version)
+            attestation = self._generate_attestation(content, project_name, version)
         
         return {
-            "content": json.dumps(sbom_content, indent=2),
+            "content": content,
             "attestation": attestation,
+            "content_hash": hashlib.sha256(content.encode()).hexdigest(),
+            "size_bytes": len(content.encode()),
+            "component_count": len(sbom_content.get("components") or sbom_content.get("packages") or []),
             "format": format_type,
             "project_name": project_name,
             "version": version
         }
     
+    async def _lookup_vulnerabilities(
+        self,
+        dependencies: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        if self.analyzer is None:
+            self.analyzer = DependencyAnalyzer()
+        
+        packages = [
+            {
+                "name": dep.get("name", ""),
+                "version": dep.get("version", ""),
+                "ecosystem": self._ecosystem(dep)
+            }
+            for dep in dependencies
+        ]
+        return await self.analyzer.analyze_packages(packages)
+    
+    def _purl(self, dep: Dict[str, Any]) -> str:
+        return dep.get("purl", f"pkg:npm/{dep.get('name', '')}@{dep.get('version', '')}")
+    
+    def _ecosystem(self, dep: Dict[str, Any]) -> str:
+        if dep.get("ecosystem"):
+            return dep["ecosystem"]
+        purl_type = self._purl(dep)[len("pkg:"):].split("/", 1)[0].lower()
+        return PURL_ECOSYSTEMS.get(purl_type, "npm")
+    
+    def _cyclonedx_vulnerabilities(
+        self,
+        components: List[Dict[str, Any]],
+        vulnerability_results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        
+        for component, result in zip(components, vulnerability_results):
+            for vuln in result.get("vulnerabilities", []):
+                vuln_id = vuln.get("id", "")
+                if not vuln_id:
+                    continue
+                
+                entry = entries.get(vuln_id)
+                if entry is None:
+                    entry = {
+                        "bom-ref": f"vuln-{vuln_id}",
+                        "id": vuln_id,
+                        "source": {"name": vuln.get("source", "")},
+                        "description": vuln.get("summary", ""),
+                        "affects": []
+                    }
+                    if vuln.get("severity"):
+                        entry["ratings"] = [{
+                            "score": vuln["severity"],
+                            "severity": self._cyclonedx_severity(vuln["severity"]),
+                            "source": {"name": vuln.get("source", "")}
+                        }]
+                    if vuln.get("published"):
+                        entry["published"] = vuln["published"]
+                    if vuln.get("modified"):
+                        entry["updated"] = vuln["modified"]
+                    entries[vuln_id] = entry
+                
+                affects = {"ref": component["bom-ref"]}
+                if affects not in entry["affects"]:
+                    entry["affects"].append(affects)
+        
+        return list(entries.values())
+    
+    def _cyclonedx_severity(self, score: float) -> str:
+        if score >= 9.0:
+            return "critical"
+        elif score >= 7.0:
+            return "high"
+        elif score >= 4.0:
+            return "medium"
+        elif score > 0:
+            return "low"
+        return "none"
+    
+    def _advisory_url(self, vuln: Dict[str, Any]) -> str:
+        if vuln.get("source") == "NVD":
+            return f"https://nvd.nist.gov/vuln/detail/{vuln.get('id', '')}"
+        return f"https://osv.dev/vulnerability/{vuln.get('id', '')}"
+    
     def _generate_cyclonedx(
         self,
         project_name: str,
         version: str,
         dependencies: List[Dict[str, Any]],
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        vulnerability_results: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
-        components = []
-        
-        for dep in dependencies:
-            component = {
-                "type": "library",
-                "name": dep.get("name", ""),
-                "version": dep.get("version", ""),
-                "purl": dep.get("purl", f"pkg:npm/{dep.get('name', '')}@{dep.get('version', '')}")
-            }
-            
-            if "license" in dep:
-                component["licenses"] = [{"license": {"id": dep["license"]}}]
-            
-            if "vulnerabilities" in dep:
-                component["vulnerabilities"] = dep["vulnerabilities"]
-            
-            components.append(component)
+        components = [self._cyclonedx_component(dep) for dep in dependencies]
         
         sbom = {
             "bomFormat": "CycloneDX",
@@ -95,39 +187,70 @@ class SBOMGenerator:
             "components": components
         }
         
+        if vulnerability_results is not None:
+            sbom["vulnerabilities"] = self._cyclonedx_vulnerabilities(components, vulnerability_results)
+        
         if metadata:
             sbom["metadata"].update(metadata)
         
         return sbom
     
+    def _unique_dependencies(
+        self,
+        dependencies: List[Dict[str, Any]],
+        vulnerability_results: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
+        positions: Dict[str, int] = {}
+        unique = []
+        results = []
+        for index, dep in enumerate(dependencies):
+            result = vulnerability_results[index] if vulnerability_results is not None else {}
+            position = positions.get(self._purl(dep))
+            if position is None:
+                positions[self._purl(dep)] = len(unique)
+                unique.append(dep)
+                results.append({**result, "vulnerabilities": list(result.get("vulnerabilities", []))})
+                continue
+            
+            merged = results[position]["vulnerabilities"]
+            seen = {vuln.get("id") for vuln in merged}
+            merged.extend(vuln for vuln in result.get("vulnerabilities", []) if vuln.get("id") not in seen)
+        
+        return unique, results if vulnerability_results is not None else None
+    
+    def _cyclonedx_component(self, dep: Dict[str, Any]) -> Dict[str, Any]:
+        purl = self._purl(dep)
+        component = {
+            "type": "library",
+            "bom-ref": purl,
+            "name": dep.get("name", ""),
+            "version": dep.get("version", ""),
+            "purl": purl
+        }
+        
+        if "license" in dep:
+            component["licenses"] = [{"license": {"id": dep["license"]}}]
+        
+        if "vulnerabilities" in dep:
+            component["vulnerabilities"] = dep["vulnerabilities"]
+        
+        return component
+    
     def _generate_spdx(
         self,
         project_name: str,
         version: str,
         dependencies: List[Dict[str, Any]],
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        vulnerability_results: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
-        packages = []
-        
-        for dep in dependencies:
-            package = {
-                "SPDXID": f"SPDXRef-Package-{dep.get('name', '').replace('/', '-')}",
-                "name": dep.get("name", ""),
-                "versionInfo": dep.get("version", ""),
-                "downloadLocation": dep.get("downloadLocation", "NOASSERTION"),
-                "filesAnalyzed": False,
-                "licenseConcluded": dep.get("license", "NOASSERTION"),
-                "licenseDeclared": dep.get("license", "NOASSERTION"),
-                "copyrightText": "NOASSERTION",
-                "externalRefs": [
-                    {
-                        "referenceCategory": "PACKAGE-MANAGER",
-                        "referenceType": "purl",
-                        "referenceLocator": dep.get("purl", f"pkg:npm/{dep.get('name', '')}@{dep.get('version', '')}")
-                    }
-                ]
-            }
-            packages.append(package)
+        packages = [
+            self._spdx_package(
+                dep,
+                vulnerability_results[index].get("vulnerabilities", []) if vulnerability_results is not None else None
+            )
+            for index, dep in enumerate(dependencies)
+        ]
         
         spdx = {
             "spdxVersion": "SPDX-2.3",
@@ -154,18 +277,242 @@ class SBOMGenerator:
         
         return spdx
     
+    def _spdx_package(
+        self,
+        dep: Dict[str, Any],
+        vulnerabilities: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        package = {
+            "SPDXID": f"SPDXRef-Package-{dep.get('name', '').replace('/', '-')}",
+            "name": dep.get("name", ""),
+            "versionInfo": dep.get("version", ""),
+            "downloadLocation": dep.get("downloadLocation", "NOASSERTION"),
+            "filesAnalyzed": False,
+            "licenseConcluded": dep.get("license", "NOASSERTION"),
+            "licenseDeclared": dep.get("license", "NOASSERTION"),
+            "copyrightText": "NOASSERTION",
+            "externalRefs": [
+                {
+                    "referenceCategory": "PACKAGE-MANAGER",
+                    "referenceType": "purl",
+                    "referenceLocator": self._purl(dep)
+                }
+            ]
+        }
+        
+        for vuln in vulnerabilities or []:
+            package["externalRefs"].append({
+                "referenceCategory": "SECURITY",
+                "referenceType": "advisory",
+                "referenceLocator": self._advisory_url(vuln),
+                "comment": vuln.get("id", "")
+            })
+        
+        return package
+    
+    def convert_sbom(
+        self,
+        content: str,
+        target_format: str,
+        project_name: str,
+        version: str
+    ) -> Iterator[str]:
+        if target_format not in self.supported_formats:
+            raise ValueError(f"Unsupported format: {target_format}. Supported: {self.supported_formats}")
+        
+        document = json.loads(content)
+        source_format = "cyclonedx" if "bomFormat" in document else "spdx"
+        if source_format == target_format:
+            raise ValueError(f"SBOM is already in {target_format} format")
+        
+        if source_format == "cyclonedx":
+            dependencies, vulnerability_results = self._dependencies_from_cyclonedx(document)
+        else:
+            dependencies, vulnerability_results = self._dependencies_from_spdx(document)
+        
+        dependencies, vulnerability_results = self._unique_dependencies(dependencies, vulnerability_results)
+        return self._iter_sbom(project_name, version, target_format, dependencies, vulnerability_results)
+    
+    def _dependencies_from_cyclonedx(self, document: Dict[str, Any]):
+        vulnerabilities_by_ref: Dict[str, List[Dict[str, Any]]] = {}
+        for vuln in document.get("vulnerabilities", []):
+            ratings = vuln.get("ratings") or [{}]
+            entry = {
+                "id": vuln.get("id", ""),
+                "summary": vuln.get("description", ""),
+                "severity": ratings[0].get("score", 0.0),
+                "source": vuln.get("source", {}).get("name", "")
+            }
+            for affected in vuln.get("affects", []):
+                vulnerabilities_by_ref.setdefault(affected.get("ref"), []).append(entry)
+        
+        dependencies = []
+        vulnerability_results = []
+        for component in document.get("components", []):
+            dep = {
+                "name": component.get("name", ""),
+                "version": component.get("version", "")
+            }
+            if component.get("purl"):
+                dep["purl"] = component["purl"]
+            
+            licenses = component.get("licenses") or []
+            if licenses:
+                license_info = licenses[0].get("license", {})
+                license_value = licenses[0].get("expression") or license_info.get("id") or license_info.get("name")
+                if license_value:
+                    dep["license"] = license_value
+            
+            if "vulnerabilities" in component:
+                dep["vulnerabilities"] = component["vulnerabilities"]
+            
+            dependencies.append(dep)
+            vulnerability_results.append({
+                "vulnerabilities": vulnerabilities_by_ref.get(component.get("bom-ref", component.get("purl")), [])
+            })
+        
+        return dependencies, vulnerability_results if "vulnerabilities" in document else None
+    
+    def _dependencies_from_spdx(self, document: Dict[str, Any]):
+        dependencies = []
+        vulnerability_results = []
+        has_advisories = False
+        
+        for package in document.get("packages", []):
+            dep = {
+                "name": package.get("name", ""),
+                "version": package.get("versionInfo", "")
+            }
+            
+            for field in ("licenseDeclared", "licenseConcluded"):
+                if package.get(field) not in (None, "NOASSERTION", "NONE"):
+                    dep["license"] = package[field]
+                    break
+            
+            if package.get("downloadLocation") not in (None, "NOASSERTION"):
+                dep["downloadLocation"] = package["downloadLocation"]
+            
+            vulnerabilities = []
+            for ref in package.get("externalRefs", []):
+                locator = ref.get("referenceLocator", "")
+                if ref.get("referenceType") == "purl":
+                    dep["purl"] = locator
+                elif ref.get("referenceCategory") == "SECURITY" and ref.get("referenceType") == "advisory":
+                    vulnerabilities.append({
+                        "id": ref.get("comment") or locator.rstrip("/").rsplit("/", 1)[-1],
+                        "source": "NVD" if "nvd.nist.gov" in locator else "OSV"
+                    })
+            
+            has_advisories = has_advisories or bool(vulnerabilities)
+            dependencies.append(dep)
+            vulnerability_results.append({"vulnerabilities": vulnerabilities})
+        
+        return dependencies, vulnerability_results if has_advisories else None
+    
+    def _iter_sbom(
+        self,
+        project_name: str,
+        version: str,
+        format_type: str,
+        dependencies: List[Dict[str, Any]],
+        vulnerability_results: Optional[List[Dict[str, Any]]],
+        chunk_size: int = 65536
+    ) -> Iterator[str]:
+        if format_type == "cyclonedx":
+            skeleton = self._generate_cyclonedx(project_name, version, [], {})
+            items_key = "components"
+            items = (self._cyclonedx_component(dep) for dep in dependencies)
+            if vulnerability_results is not None:
+                skeleton["vulnerabilities"] = self._cyclonedx_vulnerabilities(
+                    [{"bom-ref": self._purl(dep)} for dep in dependencies], vulnerability_results
+                )
+        else:
+            skeleton = self._generate_spdx(project_name, version, [], {})
+            items_key = "packages"
+            items = (
+                self._spdx_package(
+                    dep,
+                    vulnerability_results[index]["vulnerabilities"] if vulnerability_results is not None else None
+                )
+                for index, dep in enumerate(dependencies)
+            )
+        
+        return self.iter_document(skeleton, items_key, items, chunk_size)
+    
+    def iter_document(
+        self,
+        skeleton: Dict[str, Any],
+        items_key: str,
+        items: Iterator[Dict[str, Any]],
+        chunk_size: int = 65536
+    ) -> Iterator[str]:
+        return self.iter_sections(skeleton, [(items_key, items)], chunk_size)
+    
+    def iter_sections(
+        self,
+        skeleton: Dict[str, Any],
+        sections: List[Tuple[str, Iterator[Dict[str, Any]]]],
+        chunk_size: int = 65536
+    ) -> Iterator[str]:
+        placeholders = {key: f"__securestack_items_{index}__" for index, (key, _) in enumerate(sections)}
+        tail = json.dumps({**skeleton, **placeholders})
+        sections = sorted(sections, key=lambda section: tail.index(json.dumps(placeholders[section[0]])))
+        
+        buffer = []
+        buffered = 0
+        for key, items in sections:
+            head, tail = tail.split(json.dumps(placeholders[key]), 1)
+            buffer.extend([head, "["])
+            buffered += len(head) + 1
+            for index, item in enumerate(items):
+                encoded = ("," if index else "") + json.dumps(item)
+                buffer.append(encoded)
+                buffered += len(encoded)
+                if buffered >= chunk_size:
+                    yield "".join(buffer)
+                    buffer = []
+                    buffered = 0
+            buffer.append("]")
+            buffered += 1
+        
+        buffer.append(tail)
+        yield "".join(buffer)
+    
     def _generate_attestation(
         self,
-        sbom_content: Dict[str, Any],
+        content: str,
         project_name: str,
         version: str
     ) -> str:
-        content_str = json.dumps(sbom_content, sort_keys=True)
-        content_hash = hashlib.sha256(content_str.encode()).hexdigest()
+        return self.generate_attestations([
+            {"content": content, "project_name": project_name, "version": version}
+        ])[0]
+    
+    def generate_attestations(
+        self,
+        documents: List[Dict[str, Any]],
+        key_id: Optional[str] = None
+    ) -> List[str]:
+        if self.signer is None:
+            self.signer = get_attestation_signer()
         
-        attestation = {
-            "type": "https://securestack.dev/attestation/v1",
-            "predicateType": "https://securestack.dev/sbom/v1",
+        statements = [
+            self._attestation_statement(doc["content"], doc["project_name"], doc["version"])
+            for doc in documents
+        ]
+        return [json.dumps(envelope, indent=2) for envelope in self.signer.sign_many(statements, key_id)]
+    
+    def _attestation_statement(
+        self,
+        content: str,
+        project_name: str,
+        version: str
+    ) -> Dict[str, Any]:
+        sbom_content = json.loads(content)
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        
+        return {
+            "_type": IN_TOTO_STATEMENT_TYPE,
             "subject": [
                 {
                     "name": f"{project_name}:{version}",
@@ -174,6 +521,7 @@ class SBOMGenerator:
                     }
                 }
             ],
+            "predicateType": "https://securestack.dev/sbom/v1",
             "predicate": {
                 "sbom": {
                     "format": "cyclonedx" if "bomFormat" in sbom_content else "spdx",
@@ -183,11 +531,204 @@ class SBOMGenerator:
                 }
             }
         }
-        
-        return json.dumps(attestation, indent=2)
     
     def _generate_uuid(self) -> str:
         import uuid
         return str(uuid.uuid4())
 
 
+class SBOMMerger:
+    def __init__(
+        self,
+        blob_store: Optional[BlobStore] = None,
+        generator: Optional[SBOMGenerator] = None
+    ):
+        self.blob_store = blob_store or BlobStore()
+        self.generator = generator or SBOMGenerator()
+    
+    def component_stream_key(self, content_hash: str) -> str:
+        return f"sbom-components/{content_hash}.ndjson"
+    
+    def vulnerabilities_key(self, content_hash: str) -> str:
+        return f"sbom-components/{content_hash}.vulnerabilities.ndjson"
+    
+    def has_component_stream(self, content_hash: str) -> bool:
+        return (
+            self.blob_store.exists(self.component_stream_key(content_hash))
+            and self.blob_store.exists(self.vulnerabilities_key(content_hash))
+        )
+    
+    def build_component_stream(self, content_hash: str, content: str):
+        document = json.loads(content)
+        
+        if "bomFormat" in document:
+            components = document.get("components", [])
+            vulnerabilities = document.get("vulnerabilities", [])
+        else:
+            dependencies, vulnerability_results = self.generator._dependencies_from_spdx(document)
+            components = [self.generator._cyclonedx_component(dep) for dep in dependencies]
+            vulnerabilities = (
+                self.generator._cyclonedx_vulnerabilities(components, vulnerability_results)
+                if vulnerability_results is not None else []
+            )
+        
+        keyed = sorted(
+            ((self._merge_key(component), component) for component in components),
+            key=lambda item: item[0]
+        )
+        self._write_keyed(self.component_stream_key(content_hash), keyed)
+        
+        ref_keys = {
+            component.get("bom-ref") or component.get("purl"): merge_key
+            for merge_key, component in keyed
+        }
+        self._write_keyed(
+            self.vulnerabilities_key(content_hash),
+            sorted(
+                ((vuln["id"], vuln) for vuln in self._rekey_vulnerabilities(vulnerabilities, ref_keys)),
+                key=lambda item: item[0]
+            )
+        )
+    
+    def _write_keyed(self, key: str, keyed: List[Tuple[str, Dict[str, Any]]]):
+        with self.blob_store.writer(key) as f:
+            for merge_key, item in keyed:
+                f.write(json.dumps([merge_key, item]).encode())
+                f.write(b"\n")
+    
+    def _rekey_vulnerabilities(
+        self,
+        vulnerabilities: List[Dict[str, Any]],
+        ref_keys: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        rekeyed = []
+        for vuln in vulnerabilities:
+            affects = [
+                {**affected, "ref": ref_keys[affected.get("ref")]}
+                for affected in vuln.get("affects", [])
+                if affected.get("ref") in ref_keys
+            ]
+            if vuln.get("id") and affects:
+                rekeyed.append({**vuln, "affects": affects})
+        return rekeyed
+    
+    def _merge_key(self, component: Dict[str, Any]) -> str:
+        return component.get("purl") or f"{component.get('name', '')}@{component.get('version', '')}"
+    
+    def _iter_keyed(self, key: str, sbom_id: int) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+        with open(self.blob_store.path(key), "r") as f:
+            for line in f:
+                merge_key, item = json.loads(line)
+                yield merge_key, sbom_id, item
+    
+    def _iter_run(self, path: str) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+        with open(path, "r") as f:
+            for line in f:
+                merge_key, sbom_id, item = json.loads(line)
+                yield merge_key, sbom_id, item
+    
+    def _merge_streams(self, streams: List[Iterator[Tuple[str, int, Dict[str, Any]]]]):
+        return heapq.merge(*streams, key=lambda item: (item[0], item[1]))
+    
+    def _write_run(self, streams: List[Iterator[Tuple[str, int, Dict[str, Any]]]]) -> str:
+        key = f"sbom-merge-runs/{secrets.token_hex(16)}.ndjson"
+        with self.blob_store.writer(key) as f:
+            for record in self._merge_streams(streams):
+                f.write(json.dumps(list(record)).encode())
+                f.write(b"\n")
+        return self.blob_store.path(key)
+    
+    def _bounded_merge(self, streams: List[Iterator[Tuple[str, int, Dict[str, Any]]]]) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+        fan_in = max(settings.SBOM_MERGE_MAX_OPEN_STREAMS, 2)
+        runs: List[str] = []
+        
+        try:
+            while len(streams) > fan_in:
+                next_streams = []
+                for start in range(0, len(streams), fan_in):
+                    group = streams[start:start + fan_in]
+                    if len(group) == 1:
+                        next_streams.append(group[0])
+                        continue
+                    path = self._write_run(group)
+                    runs.append(path)
+                    next_streams.append(self._iter_run(path))
+                streams = next_streams
+            
+            yield from self._merge_streams(streams)
+        finally:
+            for path in runs:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+    
+    def iter_merged_components(self, sources: List[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+        streams = [
+            self._iter_keyed(self.component_stream_key(content_hash), sbom_id)
+            for sbom_id, content_hash in sources
+        ]
+        current_key = None
+        current_component = None
+        current_sources: List[int] = []
+        
+        for merge_key, sbom_id, component in self._bounded_merge(streams):
+            if merge_key != current_key:
+                if current_component is not None:
+                    yield self._with_provenance(current_key, current_component, current_sources)
+                current_key = merge_key
+                current_component = component
+                current_sources = [sbom_id]
+            elif sbom_id != current_sources[-1]:
+                current_sources.append(sbom_id)
+        
+        if current_component is not None:
+            yield self._with_provenance(current_key, current_component, current_sources)
+    
+    def iter_merged_vulnerabilities(self, sources: List[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+        streams = [
+            self._iter_keyed(self.vulnerabilities_key(content_hash), sbom_id)
+            for sbom_id, content_hash in sources
+        ]
+        current = None
+        seen_affects = set()
+        
+        for vuln_id, _, vuln in self._bounded_merge(streams):
+            if current is None or vuln_id != current["id"]:
+                if current is not None:
+                    yield current
+                current = {**vuln, "affects": []}
+                seen_affects = set()
+            for affected in vuln["affects"]:
+                affected_key = json.dumps(affected, sort_keys=True)
+                if affected_key not in seen_affects:
+                    seen_affects.add(affected_key)
+                    current["affects"].append(affected)
+        
+        if current is not None:
+            yield current
+    
+    def _with_provenance(self, merge_key: str, component: Dict[str, Any], sources: List[int]) -> Dict[str, Any]:
+        properties = [
+            prop for prop in component.get("properties", [])
+            if prop.get("name") != PROVENANCE_PROPERTY
+        ]
+        properties.extend({"name": PROVENANCE_PROPERTY, "value": str(sbom_id)} for sbom_id in sources)
+        return {**component, "bom-ref": merge_key, "properties": properties}
+    
+    def iter_merge(
+        self,
+        sources: List[Tuple[int, str]],
+        project_name: str,
+        version: str
+    ) -> Iterator[str]:
+        skeleton = self.generator._generate_cyclonedx(
+            project_name,
+            version,
+            [],
+            {"properties": [{"name": PROVENANCE_PROPERTY, "value": str(sbom_id)} for sbom_id, _ in sources]}
+        )
+        return self.generator.iter_sections(skeleton, [
+            ("components", self.iter_merged_components(sources)),
+            ("vulnerabilities", self.iter_merged_vulnerabilities(sources))
+        ])
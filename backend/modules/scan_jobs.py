@@ -0,0 +1,315 @@
+import asyncio
+import json
+import secrets
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, Optional
+from sqlalchemy.orm import Session
+import logging
+
+from config import settings
+from database import SessionLocal, APISecurityTest, ContainerScan, InfrastructureScan, ScanJob
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+CREDENTIAL_HEADERS = {"authorization", "proxy-authorization", "cookie"}
+
+
+class JobReporter:
+    def __init__(self, db: Session, job: ScanJob):
+        self.db = db
+        self.job = job
+    
+    def update(
+        self,
+        progress: Optional[float] = None,
+        stage: Optional[str] = None,
+        partial: Optional[Dict[str, Any]] = None
+    ):
+        if progress is not None:
+            self.job.progress = round(min(max(progress, 0.0), 100.0), 1)
+        if stage is not None:
+            self.job.stage = stage
+        if partial:
+            self.job.partial_results = {**(self.job.partial_results or {}), **partial}
+        self.job.sequence = (self.job.sequence or 0) + 1
+        self.db.commit()
+    
+    def finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self.job.status = status
+        self.job.result = result
+        self.job.error = error
+        self.job.completed_at = datetime.utcnow()
+        if status == "completed":
+            self.job.progress = 100.0
+        self.update(stage=status)
+
+
+async def _run_api_security(db: Session, job: ScanJob, reporter: JobReporter) -> Dict[str, Any]:
+    from modules.api_security import APISecurityTester
+    
+    params = dict(job.params)
+    test_types = params["test_types"]
+    finished = []
+    
+    def on_result(name: str, result: Dict[str, Any]):
+        finished.append(name)
+        reporter.update(
+            progress=len(finished) / max(len(test_types), 1) * 100,
+            stage=f"{name} finished",
+            partial={name: result}
+        )
+    
+    reporter.update(stage="running " + ", ".join(test_types))
+    results = await APISecurityTester().run_tests(**params, on_result=on_result)
+    overall_status = "passed" if all(r.get("passed", False) for r in results.values()) else "failed"
+    
+    db_test = APISecurityTest(
+        endpoint=params["endpoint"],
+        method=params["method"],
+        test_type=",".join(test_types),
+        status=overall_status,
+        results=results,
+        user_id=job.user_id,
+        project_id=job.project_id
+    )
+    db.add(db_test)
+    db.commit()
+    db.refresh(db_test)
+    job.result_id = db_test.id
+    
+    return {
+        "test_id": db_test.id,
+        "endpoint": db_test.endpoint,
+        "method": db_test.method,
+        "status": db_test.status,
+        "results": db_test.results,
+        "created_at": db_test.created_at.isoformat()
+    }
+
+
+async def _run_container(db: Session, job: ScanJob, reporter: JobReporter) -> Dict[str, Any]:
+    from modules.container_scanner import ContainerScanner
+    
+    params = job.params
+    reporter.update(stage=f"scanning {params['image_name']}:{params['image_tag']}")
+    result = await ContainerScanner().scan_image(
+        image_name=params["image_name"],
+        image_tag=params["image_tag"]
+    )
+    
+    scan = ContainerScan(
+        image_name=params["image_name"],
+        image_tag=params["image_tag"],
+        digest=result.get("digest"),
+        vulnerabilities=result.get("vulnerabilities", []),
+        risk_score=result.get("risk_score", 0.0),
+        user_id=job.user_id,
+        project_id=job.project_id
+    )
+    db.add(scan)
+    db.commit()
+    db.refresh(scan)
+    job.result_id = scan.id
+    
+    return {
+        "id": scan.id,
+        "image_name": scan.image_name,
+        "image_tag": scan.image_tag,
+        "risk_score": scan.risk_score,
+        "vulnerability_count": len(scan.vulnerabilities) if scan.vulnerabilities else 0,
+        "scan_status": result.get("status"),
+        "created_at": scan.created_at.isoformat()
+    }
+
+
+async def _run_infrastructure(db: Session, job: ScanJob, reporter: JobReporter) -> Dict[str, Any]:
+    from modules.infrastructure_scanner import InfrastructureScanner
+    
+    params = job.params
+    reporter.update(stage=f"scanning {params['scan_type']} {params['target']}")
+    result = await InfrastructureScanner().scan(
+        scan_type=params["scan_type"],
+        target=params["target"],
+        config=params.get("config") or {}
+    )
+    
+    scan = InfrastructureScan(
+        scan_type=params["scan_type"],
+        target=params["target"],
+        findings=result.get("findings", []),
+        risk_score=result.get("risk_score", 0.0),
+        user_id=job.user_id,
+        project_id=job.project_id
+    )
+    db.add(scan)
+    db.commit()
+    db.refresh(scan)
+    job.result_id = scan.id
+    
+    return {
+        "id": scan.id,
+        "scan_type": scan.scan_type,
+        "target": scan.target,
+        "risk_score": scan.risk_score,
+        "findings_count": len(scan.findings) if scan.findings else 0,
+        "created_at": scan.created_at.isoformat()
+    }
+
+
+JOB_RUNNERS = {
+    "api_security": _run_api_security,
+    "container": _run_container,
+    "infrastructure": _run_infrastructure
+}
+
+
+def create_job(
+    db: Session,
+    job_type: str,
+    params: Dict[str, Any],
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None
+) -> ScanJob:
+    if job_type not in JOB_RUNNERS:
+        raise ValueError(f"Unsupported job type '{job_type}'. Supported: {', '.join(JOB_RUNNERS)}")
+    
+    if isinstance(params.get("headers"), dict):
+        params = {
+            **params,
+            "headers": {name: value for name, value in params["headers"].items() if name.lower() not in CREDENTIAL_HEADERS}
+        }
+    
+    job = ScanJob(
+        id=secrets.token_hex(16),
+        job_type=job_type,
+        status="queued",
+        params=params,
+        progress=0.0,
+        stage="queued",
+        sequence=1,
+        user_id=user_id,
+        project_id=project_id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def dispatch_job(db: Session, job: ScanJob):
+    from celery_app import celery_app, run_scan_job
+    
+    try:
+        with celery_app.connection_for_write() as connection:
+            connection.ensure_connection(max_retries=1, interval_start=0.2)
+            run_scan_job.apply_async((job.id,), connection=connection, retry=False)
+    except Exception as e:
+        logger.error(f"Scan job {job.id} could not be queued: {e}")
+        JobReporter(db, job).finish("failed", error=f"Job queue unavailable: {e}")
+        raise
+
+
+def run_job(db: Session, job_id: str) -> Dict[str, Any]:
+    job = db.query(ScanJob).filter(ScanJob.id == job_id).first()
+    if job is None:
+        raise LookupError(f"Scan job {job_id} not found")
+    if job.status in TERMINAL_STATUSES:
+        return {"status": "skipped", "job_id": job_id}
+    
+    reporter = JobReporter(db, job)
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    reporter.update(progress=0.0, stage="started")
+    
+    try:
+        result = asyncio.run(JOB_RUNNERS[job.job_type](db, job, reporter))
+    except Exception as e:
+        logger.error(f"Scan job {job_id} ({job.job_type}) failed: {e}")
+        db.rollback()
+        reporter.finish("failed", error=str(e))
+        raise
+    
+    reporter.finish("completed", result=result)
+    return {"status": "completed", "job_id": job_id, "result_id": job.result_id}
+
+
+def job_status(job: ScanJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "progress": job.progress,
+        "stage": job.stage,
+        "sequence": job.sequence,
+        "partial_results": job.partial_results or {},
+        "result": job.result,
+        "result_id": job.result_id,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None
+    }
+
+
+def job_reference(job: ScanJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "status_url": f"/api/v1/jobs/{job.id}",
+        "events_url": f"/api/v1/jobs/{job.id}/events"
+    }
+
+
+def _event(name: str, sequence: Optional[int], data: Dict[str, Any]) -> str:
+    prefix = f"id: {sequence}\n" if sequence is not None else ""
+    return f"{prefix}event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def job_events(job_id: str, after: int = 0) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    started = last_sent = loop.time()
+    sent_partials = set()
+    db = SessionLocal()
+    try:
+        while True:
+            job = db.query(ScanJob).filter(ScanJob.id == job_id).populate_existing().first()
+            status = job_status(job) if job is not None else None
+            db.rollback()
+            
+            if status is None:
+                yield _event("error", None, {"detail": "Job not found"})
+                return
+            
+            if status["sequence"] > after:
+                after = status["sequence"]
+                last_sent = loop.time()
+                if status["status"] in TERMINAL_STATUSES:
+                    yield _event(status["status"], after, status)
+                    return
+                partial = {
+                    name: result for name, result in status["partial_results"].items()
+                    if name not in sent_partials
+                }
+                sent_partials.update(partial)
+                yield _event("progress", after, {
+                    "job_id": job_id,
+                    "status": status["status"],
+                    "progress": status["progress"],
+                    "stage": status["stage"],
+                    "partial_results": partial
+                })
+            elif status["status"] in TERMINAL_STATUSES:
+                return
+            elif loop.time() - last_sent >= settings.JOB_EVENT_HEARTBEAT_SECONDS:
+                last_sent = loop.time()
+                yield ": keepalive\n\n"
+            
+            if loop.time() - started >= settings.JOB_EVENT_STREAM_MAX_SECONDS:
+                yield _event("timeout", None, {"detail": "Event stream closed, poll the job status or reconnect"})
+                return
+            await asyncio.sleep(settings.JOB_EVENT_POLL_SECONDS)
+    finally:
+        db.close()
@@ -0,0 +1,161 @@
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+import logging
+
+from config import settings
+from database import ComplianceScanState, Project, ScheduledScan
+from modules.compliance import get_compliance_engine
+from modules.compliance_batch import ComplianceBatchRun
+from modules.inventory_sources import open_inventory_source
+from modules.policy_templates import check_template_access, get_template_registry
+from utils.notifications import create_notifications, team_member_ids
+
+logger = logging.getLogger(__name__)
+
+
+class ComplianceTransitionTracker:
+    def __init__(self, db: Session, scan_id: int, limit: Optional[int] = None):
+        self.db = db
+        self.scan_id = scan_id
+        self.limit = limit if limit is not None else settings.COMPLIANCE_NOTIFICATION_LIMIT
+        self.transitions: List[Tuple[str, str, str, List[str]]] = []
+        self.regressions = 0
+        self.recoveries = 0
+        self.new_resources = 0
+        self.new_failures = 0
+    
+    def record(self, results: List[Dict[str, Any]]):
+        latest = {result["resource_id"]: result for result in results}
+        existing = {
+            row.resource_id: row
+            for row in self.db.query(ComplianceScanState.id, ComplianceScanState.resource_id, ComplianceScanState.status)
+            .filter(
+                ComplianceScanState.scan_id == self.scan_id,
+                ComplianceScanState.resource_id.in_(latest)
+            )
+            .all()
+        }
+        
+        now = datetime.utcnow()
+        inserts, updates = [], []
+        for resource_id, result in latest.items():
+            status = result["status"]
+            previous = existing.get(resource_id)
+            
+            if previous is None:
+                inserts.append({"scan_id": self.scan_id, "resource_id": resource_id, "status": status, "updated_at": now})
+                self.new_resources += 1
+                self.new_failures += status == "failed"
+                continue
+            if previous.status == status:
+                continue
+            
+            updates.append({"id": previous.id, "status": status, "updated_at": now})
+            if status == "failed":
+                self.regressions += 1
+            else:
+                self.recoveries += 1
+            if len(self.transitions) < self.limit:
+                self.transitions.append((resource_id, previous.status, status, result["failed_policies"]))
+        
+        if inserts:
+            self.db.bulk_insert_mappings(ComplianceScanState, inserts)
+        if updates:
+            self.db.bulk_update_mappings(ComplianceScanState, updates)
+    
+    def summary(self) -> Dict[str, int]:
+        return {
+            "regressions": self.regressions,
+            "recoveries": self.recoveries,
+            "new_resources": self.new_resources,
+            "new_failures": self.new_failures
+        }
+    
+    def notifications(self, scan: ScheduledScan, framework: str) -> List[Dict[str, str]]:
+        notifications = []
+        for resource_id, previous, status, failed_policies in self.transitions:
+            if status == "failed":
+                notifications.append({
+                    "title": f"Compliance regression in {scan.name}",
+                    "message": f"{resource_id} changed from {previous} to failed under {framework}: {', '.join(failed_policies)}",
+                    "type": "warning"
+                })
+            else:
+                notifications.append({
+                    "title": f"Compliance restored in {scan.name}",
+                    "message": f"{resource_id} changed from {previous} to passed under {framework}",
+                    "type": "success"
+                })
+        
+        remaining = self.regressions + self.recoveries - len(self.transitions)
+        if remaining > 0:
+            notifications.append({
+                "title": f"Compliance changes in {scan.name}",
+                "message": f"{remaining} more resources changed state ({self.regressions} regressions, {self.recoveries} recoveries in total)",
+                "type": "warning" if self.regressions else "info"
+            })
+        return notifications
+
+
+def scan_recipients(db: Session, scan: ScheduledScan) -> List[int]:
+    recipients = [scan.user_id] if scan.user_id else []
+    if scan.project_id:
+        project = db.query(Project).filter(Project.id == scan.project_id).first()
+        if project and project.team_id:
+            recipients.extend(user_id for user_id in team_member_ids(db, project.team_id) if user_id not in recipients)
+    return recipients
+
+
+def run_scheduled_compliance(db: Session, scan: ScheduledScan) -> Dict[str, Any]:
+    config = scan.config or {}
+    engine = get_compliance_engine()
+    policy_name = config.get("policy_name")
+    
+    if config.get("template_id") is not None:
+        check_template_access(db, int(config["template_id"]), scan.user_id)
+        template = get_template_registry().get(db, int(config["template_id"]))
+        if template.is_license:
+            raise ValueError(f"Policy template {template.id} is a license template")
+        framework, policies = template.framework, template.select(policy_name)
+    elif config.get("framework"):
+        framework = config["framework"]
+        policies = engine.get_policy_set(framework, policy_name)
+    else:
+        raise ValueError("Scheduled compliance scans require 'framework' or 'template_id' in their config")
+    
+    source = open_inventory_source(config.get("source"))
+    tracker = ComplianceTransitionTracker(db, scan.id)
+    batch = ComplianceBatchRun(
+        db,
+        framework,
+        policies,
+        policy_name=policy_name,
+        resource_type=config.get("resource_type", "resource"),
+        user_id=scan.user_id,
+        project_id=scan.project_id,
+        scheduled=True,
+        engine=engine,
+        mode=config.get("mode", "auto"),
+        result_callback=tracker.record
+    )
+    
+    try:
+        batch.consume(source.records(batch.add_error))
+        summary = batch.finish()
+    except Exception as e:
+        batch.abort(str(e))
+        raise
+    
+    summary["transitions"] = tracker.summary()
+    
+    notifications = tracker.notifications(scan, framework)
+    if notifications:
+        create_notifications(db, (
+            {**notification, "user_id": user_id}
+            for user_id in scan_recipients(db, scan)
+            for notification in notifications
+        ))
+    
+    logger.info(f"Scheduled compliance scan {scan.id}: {tracker.regressions} regressions, {tracker.recoveries} recoveries")
+    return summary
@@ -0,0 +1,221 @@
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from urllib.parse import unquote
+import logging
+
+from config import settings
+from database import SessionLocal, VEXSuppression
+
+logger = logging.getLogger(__name__)
+
+PURL_ECOSYSTEMS = {
+    "npm": "npm",
+    "pypi": "PyPI",
+    "maven": "Maven",
+    "golang": "Go",
+    "cargo": "crates.io",
+    "gem": "RubyGems",
+    "nuget": "NuGet",
+    "composer": "Packagist",
+}
+PURL_TYPES = {ecosystem.lower(): purl_type for purl_type, ecosystem in PURL_ECOSYSTEMS.items()}
+
+SUPPRESSING_STATES = {"not_affected", "false_positive"}
+CYCLONEDX_STATES = {"resolved", "resolved_with_pedigree", "exploitable", "in_triage", "false_positive", "not_affected"}
+OPENVEX_STATES = {"not_affected", "affected", "fixed", "under_investigation"}
+
+
+def normalize_purl(purl: str) -> str:
+    purl = unquote(purl.split("#", 1)[0].split("?", 1)[0].strip()).lower()
+    if purl.startswith("pkg:pypi/"):
+        name, at, version = purl[len("pkg:pypi/"):].partition("@")
+        purl = f"pkg:pypi/{name.replace('_', '-')}{at}{version}"
+    return purl
+
+
+def versionless_purl(purl: str) -> str:
+    prefix, _, name = purl.rpartition("/")
+    if "@" in name:
+        name = name.split("@", 1)[0]
+    return f"{prefix}/{name}" if prefix else name
+
+
+def package_purl(package_name: str, version: str, ecosystem: str) -> str:
+    purl_type = PURL_TYPES.get(ecosystem.lower(), ecosystem.lower())
+    name = package_name.replace(":", "/") if purl_type == "maven" else package_name
+    return normalize_purl(f"pkg:{purl_type}/{name}@{version}")
+
+
+def parse_vex_document(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if "statements" in document:
+        return _parse_openvex(document)
+    if "vulnerabilities" in document:
+        return _parse_cyclonedx_vex(document)
+    raise ValueError("Unrecognized VEX document: expected OpenVEX statements or CycloneDX vulnerabilities")
+
+
+def _parse_openvex(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    entries = []
+    
+    for statement in document.get("statements") or []:
+        status = statement.get("status", "")
+        if status not in OPENVEX_STATES:
+            continue
+        
+        vulnerability = statement.get("vulnerability", {})
+        if isinstance(vulnerability, str):
+            vuln_ids = [vulnerability]
+        else:
+            vuln_ids = [vulnerability.get("name") or vulnerability.get("@id", "")] + list(vulnerability.get("aliases") or [])
+        
+        purls = []
+        for product in statement.get("products") or []:
+            if isinstance(product, str):
+                purls.append(product)
+                continue
+            subcomponents = product.get("subcomponents") or []
+            if subcomponents:
+                purls.extend(sub if isinstance(sub, str) else sub.get("@id", "") for sub in subcomponents)
+            else:
+                purls.append(product.get("@id", ""))
+        
+        for vuln_id in vuln_ids:
+            for purl in purls:
+                if vuln_id and purl.startswith("pkg:"):
+                    entries.append({
+                        "vuln_id": vuln_id.upper(),
+                        "purl": normalize_purl(purl),
+                        "status": status,
+                        "justification": statement.get("justification"),
+                        "detail": statement.get("impact_statement") or statement.get("status_notes")
+                    })
+    
+    return entries
+
+
+def _parse_cyclonedx_vex(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    refs: Dict[str, str] = {}
+    stack = list(document.get("components") or [])
+    metadata_component = document.get("metadata", {}).get("component")
+    if metadata_component:
+        stack.append(metadata_component)
+    while stack:
+        component = stack.pop()
+        if component.get("bom-ref") and component.get("purl"):
+            refs[component["bom-ref"]] = component["purl"]
+        stack.extend(component.get("components") or [])
+    
+    entries = []
+    
+    for vulnerability in document.get("vulnerabilities") or []:
+        analysis = vulnerability.get("analysis") or {}
+        state = analysis.get("state", "")
+        if state not in CYCLONEDX_STATES:
+            continue
+        
+        justification = analysis.get("justification")
+        vuln_ids = [vulnerability.get("id", "")] + [
+            reference.get("id", "") for reference in vulnerability.get("references") or []
+        ]
+        
+        for affect in vulnerability.get("affects") or []:
+            ref = affect.get("ref", "")
+            if ref.startswith("urn:cdx:") and "#" in ref:
+                ref = unquote(ref.split("#", 1)[1])
+            purl = ref if ref.startswith("pkg:") else refs.get(ref, "")
+            if not purl:
+                continue
+            
+            for vuln_id in vuln_ids:
+                if vuln_id:
+                    entries.append({
+                        "vuln_id": vuln_id.upper(),
+                        "purl": normalize_purl(purl),
+                        "status": state,
+                        "justification": justification,
+                        "detail": analysis.get("detail")
+                    })
+    
+    return entries
+
+
+class VEXIndex:
+    def __init__(self, refresh_interval: Optional[int] = None):
+        self.refresh_interval = settings.VEX_REFRESH_SECONDS if refresh_interval is None else refresh_interval
+        self._suppressions: Set[Tuple[str, str]] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+    
+    def refresh(self):
+        with self._lock:
+            self._reload()
+    
+    def _reload(self):
+        db = SessionLocal()
+        try:
+            rows = db.query(VEXSuppression.vuln_id, VEXSuppression.purl).all()
+        except Exception as e:
+            logger.error(f"Failed to load VEX suppressions: {e}")
+            self._loaded_at = time.monotonic()
+            return
+        finally:
+            db.close()
+        
+        self._suppressions = {(vuln_id, purl) for vuln_id, purl in rows}
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(self._suppressions)} VEX suppressions")
+    
+    def _ensure_fresh(self):
+        if time.monotonic() - self._loaded_at < self.refresh_interval and self._loaded_at:
+            return
+        with self._lock:
+            if time.monotonic() - self._loaded_at >= self.refresh_interval or not self._loaded_at:
+                self._reload()
+    
+    def update(self, added: Iterable[Tuple[str, str]], removed: Iterable[Tuple[str, str]] = ()):
+        with self._lock:
+            suppressions = set(self._suppressions)
+            suppressions.difference_update(removed)
+            suppressions.update(added)
+            self._suppressions = suppressions
+    
+    def is_suppressed(self, vuln_id: str, purl: str) -> bool:
+        self._ensure_fresh()
+        return self._is_suppressed(self._suppressions, vuln_id, purl)
+    
+    def _is_suppressed(self, suppressions: Set[Tuple[str, str]], vuln_id: str, purl: str) -> bool:
+        if not suppressions or not vuln_id or not purl:
+            return False
+        vuln_id = vuln_id.upper()
+        return (vuln_id, purl) in suppressions or (vuln_id, versionless_purl(purl)) in suppressions
+    
+    def filter(
+        self,
+        vulnerabilities: List[Dict[str, Any]],
+        purl: Optional[str] = None,
+        id_field: str = "id"
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        self._ensure_fresh()
+        suppressions = self._suppressions
+        if not suppressions:
+            return vulnerabilities, 0
+        
+        kept = [
+            vuln for vuln in vulnerabilities
+            if not self._is_suppressed(suppressions, vuln.get(id_field, ""), purl or vuln.get("purl", ""))
+        ]
+        return kept, len(vulnerabilities) - len(kept)
+
+
+_index: Optional[VEXIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vex_index() -> VEXIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = VEXIndex()
+    return _index
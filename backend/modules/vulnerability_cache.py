@@ -1,7 +1,7 @@
 import redis
 import json
 import hashlib
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import timedelta
 import logging
 
@@ -39,6 +39,20 @@ class VulnerabilityCache:
         
         return None
     
+    def get_many(self, keys: List[Tuple[str, str, str]]) -> List[Optional[Dict[str, Any]]]:
+        cache_keys = [self._get_cache_key(*key) for key in keys]
+        if not cache_keys:
+            return []
+        
+        if self.redis_client:
+            try:
+                return [json.loads(cached) if cached else None for cached in self.redis_client.mget(cache_keys)]
+            except Exception as e:
+                logger.error(f"Cache get_many error: {e}")
+                return [None] * len(cache_keys)
+        
+        return [self.memory_cache.get(cache_key) for cache_key in cache_keys]
+    
     def set(
         self,
         package_name: str,
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
@@ -7,8 +8,13 @@ import asyncio
 import json
 import time
 
-from database import get_db, APISecurityTest
-from modules.api_security import APISecurityTester
+from database import get_db, APISecurityTest, FuzzCampaign
+from modules.api_security import APISecurityTester, validate_slo
+from modules.fuzz_campaigns import campaign_progress, create_campaign, dispatch_shards
+from modules.fuzzing import FuzzingEngine
+from modules.load_generator import LoadProfile
+from modules.openapi_scanner import OpenAPIError, OpenAPIScanner, OpenAPISpec, load_openapi_document, select_operations
+from routers.jobs import queue_job
 
 router = APIRouter()
 
@@ -21,6 +27,44 @@ class APITestRequest(BaseModel):
     test_types: List[str] = ["contract", "fuzzing", "rate_limit"]
     contract_schema: Optional[Dict[str, Any]] = None
     rate_limit_threshold: Optional[int] = 100
+    load_profile: Optional[Dict[str, Any]] = None
+    find_rate_limit: bool = False
+    contract_samples: int = 1
+    contract_concurrency: int = 1
+    contract_slo: Optional[Dict[str, float]] = None
+
+
+class FuzzRequest(BaseModel):
+    endpoint: str
+    method: str = "POST"
+    headers: Optional[Dict[str, str]] = None
+    body: Optional[Dict[str, Any]] = None
+    contract_schema: Optional[Dict[str, Any]] = None
+    max_cases: Optional[int] = None
+
+
+class FuzzCampaignRequest(BaseModel):
+    endpoint: str
+    method: str = "POST"
+    headers: Optional[Dict[str, str]] = None
+    body: Optional[Dict[str, Any]] = None
+    contract_schema: Optional[Dict[str, Any]] = None
+    corpus: Optional[List[Any]] = None
+    max_cases: Optional[int] = None
+    shard_size: Optional[int] = None
+    rate_limit_rps: Optional[int] = None
+
+
+class OpenAPIScanRequest(BaseModel):
+    source: Dict[str, Any]
+    base_url: Optional[str] = None
+    headers: Optional[Dict[str, str]] = None
+    checks: List[str] = ["contract", "fuzzing", "owasp"]
+    include: Optional[List[str]] = None
+    max_operations: Optional[int] = None
+    host_connections: Optional[int] = None
+    host_qps: Optional[float] = None
+    fuzz_cases: Optional[int] = None
 
 
 class APITestResponse(BaseModel):
@@ -32,46 +76,140 @@ class APITestResponse(BaseModel):
     created_at: str
 
 
-@router.post("/api-security/test", response_model=APITestResponse)
+@router.post("/api-security/test", status_code=202)
 async def test_api_security(
     request: APITestRequest,
     db: Session = Depends(get_db)
 ):
+    if request.load_profile:
+        try:
+            LoadProfile.from_config(request.load_profile)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        tester = APISecurityTester()
-        results = await tester.run_tests(
+        validate_slo(request.contract_slo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    params = request.model_dump()
+    params["headers"] = request.headers or {}
+    return queue_job(db, "api_security", params)
+
+
+@router.post("/api-security/fuzz")
+async def stream_fuzzing(request: FuzzRequest):
+    tester = APISecurityTester()
+    cases = tester.fuzz_cases(request.method, request.body, request.contract_schema, request.max_cases)
+    
+    async def events():
+        async with tester.client_scope() as client:
+            engine = FuzzingEngine(client, request.endpoint, request.method, request.headers)
+            async for finding in engine.stream(cases):
+                yield json.dumps({"event": "finding", "finding": finding}) + "\n"
+            summary = engine.summary()
+            summary.pop("issues")
+            yield json.dumps({"event": "summary", **summary}) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _dispatch_campaign(db: Session, campaign: FuzzCampaign):
+    try:
+        dispatch_shards(db, campaign)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        campaign.status = "paused"
+        db.commit()
+        raise HTTPException(status_code=503, detail=f"Fuzz campaign {campaign.id} could not be queued, resume it once workers are available: {str(e)}")
+
+
+@router.post("/api-security/campaigns")
+async def start_fuzz_campaign(
+    request: FuzzCampaignRequest,
+    db: Session = Depends(get_db)
+):
+    try:
+        campaign = create_campaign(
+            db,
             endpoint=request.endpoint,
             method=request.method,
-            headers=request.headers or {},
+            headers=request.headers,
             body=request.body,
-            test_types=request.test_types,
             contract_schema=request.contract_schema,
-            rate_limit_threshold=request.rate_limit_threshold
+            corpus=request.corpus,
+            max_cases=request.max_cases,
+            shard_size=request.shard_size,
+            rate_limit_rps=request.rate_limit_rps
         )
-        
-        overall_status = "passed" if all(r.get("passed", False) for r in results.values()) else "failed"
-        
-        db_test = APISecurityTest(
-            endpoint=request.endpoint,
-            method=request.method,
-            test_type=",".join(request.test_types),
-            status=overall_status,
-            results=results
-        )
-        db.add(db_test)
-        db.commit()
-        db.refresh(db_test)
-        
-        return APITestResponse(
-            test_id=db_test.id,
-            endpoint=db_test.endpoint,
-            method=db_test.method,
-            status=db_test.status,
-            results=db_test.results,
-            created_at=db_test.created_at.isoformat()
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"API security test failed: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    _dispatch_campaign(db, campaign)
+    return campaign_progress(db, campaign)
+
+
+@router.get("/api-security/campaigns/{campaign_id}")
+async def get_fuzz_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    campaign = db.query(FuzzCampaign).filter(FuzzCampaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Fuzz campaign not found")
+    return campaign_progress(db, campaign)
+
+
+@router.post("/api-security/campaigns/{campaign_id}/resume")
+async def resume_fuzz_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    campaign = db.query(FuzzCampaign).filter(FuzzCampaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Fuzz campaign not found")
+    
+    _dispatch_campaign(db, campaign)
+    return campaign_progress(db, campaign)
+
+
+@router.post("/api-security/openapi-scan", response_model=APITestResponse)
+async def scan_openapi(
+    request: OpenAPIScanRequest,
+    db: Session = Depends(get_db)
+):
+    try:
+        document, spec_url = await load_openapi_document(request.source)
+        spec = OpenAPISpec(document, request.base_url, spec_url)
+        operations = select_operations(spec, request.include, request.max_operations)
+    except OpenAPIError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    scanner = OpenAPIScanner(
+        spec,
+        headers=request.headers,
+        checks=request.checks,
+        host_connections=request.host_connections,
+        host_qps=request.host_qps,
+        fuzz_cases=request.fuzz_cases
+    )
+    results = await scanner.scan(operations)
+    
+    db_test = APISecurityTest(
+        endpoint=spec.base_url,
+        method="*",
+        test_type="openapi_scan:" + ",".join(scanner.checks),
+        status="passed" if results["passed"] else "failed",
+        results=results
+    )
+    db.add(db_test)
+    db.commit()
+    db.refresh(db_test)
+    
+    return APITestResponse(
+        test_id=db_test.id,
+        endpoint=db_test.endpoint,
+        method=db_test.method,
+        status=db_test.status,
+        results=db_test.results,
+        created_at=db_test.created_at.isoformat()
+    )
 
 
 @router.get("/api-security/tests")
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from datetime import datetime
+import json
 
-from database import get_db, ComplianceCheck
-from modules.compliance import ComplianceEngine
+from database import get_db, ComplianceCheck, ComplianceRollup, ComplianceResourceState, ComplianceRun, SBOMDocument, User
+from auth import get_optional_user
+from modules.compliance import content_hash, get_compliance_engine, normalize_framework
+from modules.compliance_batch import ComplianceBatchRun, run_detail_key
+from modules.compliance_state import ComplianceStateTracker
+from modules.policy_templates import CompiledTemplate, TemplateAccessError, check_template_access, get_template_registry
+from utils.blob_store import BlobStore
+from utils.evidence import load_evidence, store_evidence
 
 router = APIRouter()
 
@@ -16,6 +24,22 @@ class ComplianceCheckRequest(BaseModel):
     resource_type: str
     resource_data: Dict[str, Any]
     custom_policy: Optional[str] = None
+    template_id: Optional[int] = None
+    resource_id: Optional[str] = None
+
+
+class LicenseCheckRequest(BaseModel):
+    sbom_id: int
+    policy_name: Optional[str] = None
+    custom_policy: Optional[Dict[str, Any]] = None
+    template_id: Optional[int] = None
+
+
+class ResourcePatchRequest(BaseModel):
+    patch: Dict[str, Any]
+    frameworks: Optional[List[str]] = None
+    resource_type: Optional[str] = None
+    project_id: Optional[int] = None
 
 
 class ComplianceCheckResponse(BaseModel):
@@ -25,46 +49,355 @@ class ComplianceCheckResponse(BaseModel):
     status: str
     details: Dict[str, Any]
     created_at: str
+    last_checked_at: Optional[str] = None
+    reused: bool = False
 
 
 @router.post("/compliance/check", response_model=ComplianceCheckResponse)
 async def run_compliance_check(
     request: ComplianceCheckRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
 ):
+    template = template_policies = None
+    framework = request.framework
+    if request.template_id is not None:
+        template = _resolve_template(db, request.template_id, current_user)
+        framework = template.framework
+        try:
+            template_policies = template.select(request.policy_name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        engine = ComplianceEngine()
+        engine = get_compliance_engine()
+        
+        evidence_hash = fingerprint = None
+        if normalize_framework(framework) != "license":
+            try:
+                policies = template_policies or engine.resolve_policies(framework, request.policy_name, request.custom_policy)
+                evidence_hash = content_hash(request.resource_data)
+                fingerprint = engine.fingerprint(framework, engine.policy_set_version(policies), evidence_hash)
+            except ValueError:
+                evidence_hash = fingerprint = None
+        
+        if fingerprint:
+            previous = (
+                db.query(ComplianceCheck)
+                .filter(
+                    ComplianceCheck.fingerprint == fingerprint,
+                    ComplianceCheck.run_id.is_(None),
+                    ComplianceCheck.resource_id == request.resource_id if request.resource_id is not None
+                    else ComplianceCheck.resource_id.is_(None)
+                )
+                .order_by(ComplianceCheck.id.desc())
+                .first()
+            )
+            if previous:
+                previous.last_checked_at = datetime.utcnow()
+                db.commit()
+                return _check_response(previous, reused=True)
+        
         result = await engine.check_compliance(
-            framework=request.framework,
+            framework=framework,
             policy_name=request.policy_name,
             resource_type=request.resource_type,
             resource_data=request.resource_data,
-            custom_policy=request.custom_policy
+            custom_policy=None if template else request.custom_policy,
+            policies=template_policies
         )
+        if template:
+            result["template"] = {"id": template.id, "version": template.version}
+        
+        evidence = result.pop("evidence", {})
+        if fingerprint and result.get("status") != "error":
+            store_evidence(db, {evidence_hash: request.resource_data})
+            evidence = {"checked_at": evidence.get("checked_at")}
+        else:
+            evidence_hash = fingerprint = None
         
         db_check = ComplianceCheck(
-            framework=request.framework,
+            framework=framework,
             policy_name=result.get("policy_name", request.policy_name or "default"),
             status=result.get("status", "unknown"),
             details=result,
-            evidence=result.get("evidence", {})
+            evidence=evidence,
+            evidence_hash=evidence_hash,
+            fingerprint=fingerprint,
+            resource_id=request.resource_id
         )
         db.add(db_check)
         db.commit()
         db.refresh(db_check)
         
-        return ComplianceCheckResponse(
-            check_id=db_check.id,
-            framework=db_check.framework,
-            policy_name=db_check.policy_name,
-            status=db_check.status,
-            details=db_check.details,
-            created_at=db_check.created_at.isoformat()
-        )
+        return _check_response(db_check)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Compliance check failed: {str(e)}")
 
 
+def _resolve_template(db: Session, template_id: int, current_user: Optional[User], license: bool = False) -> CompiledTemplate:
+    if current_user is None:
+        raise HTTPException(status_code=401, detail="Authentication is required to use a policy template", headers={"WWW-Authenticate": "Bearer"})
+    
+    try:
+        check_template_access(db, template_id, current_user.id)
+        template = get_template_registry().get(db, template_id)
+    except TemplateAccessError:
+        raise HTTPException(status_code=403, detail="Access denied")
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Policy template {template_id} is invalid: {str(e)}")
+    
+    if template.is_license != license:
+        expected = "license-check" if template.is_license else "compliance checks"
+        raise HTTPException(status_code=400, detail=f"Policy template {template_id} ({template.framework}) can only be used with {expected}")
+    return template
+
+
+def _check_response(check: ComplianceCheck, reused: bool = False) -> ComplianceCheckResponse:
+    return ComplianceCheckResponse(
+        check_id=check.id,
+        framework=check.framework,
+        policy_name=check.policy_name,
+        status=check.status,
+        details=check.details,
+        created_at=check.created_at.isoformat(),
+        last_checked_at=check.last_checked_at.isoformat() if check.last_checked_at else None,
+        reused=reused
+    )
+
+
+@router.post("/compliance/check-batch")
+async def run_compliance_batch(
+    request: Request,
+    framework: Optional[str] = None,
+    policy_name: Optional[str] = None,
+    template_id: Optional[int] = None,
+    resource_type: str = "resource",
+    include_details: bool = False,
+    store_results: bool = True,
+    project_id: Optional[int] = None,
+    mode: str = "auto",
+    reuse: bool = True,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    if mode not in ("auto", "row", "columnar"):
+        raise HTTPException(status_code=400, detail="mode must be one of: auto, row, columnar")
+    
+    if framework is None and template_id is None:
+        raise HTTPException(status_code=400, detail="Either framework or template_id is required")
+    
+    engine = get_compliance_engine()
+    try:
+        if template_id is not None:
+            template = _resolve_template(db, template_id, current_user)
+            framework = template.framework
+            policies = template.select(policy_name)
+        else:
+            policies = engine.get_policy_set(framework, policy_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    batch = ComplianceBatchRun(
+        db,
+        framework,
+        policies,
+        policy_name=policy_name,
+        resource_type=resource_type,
+        store_results=store_results,
+        user_id=current_user.id if current_user else None,
+        project_id=project_id,
+        engine=engine,
+        mode=mode,
+        reuse=reuse
+    )
+    
+    try:
+        if include_details:
+            key = run_detail_key(batch.run_id)
+            with BlobStore().writer(key) as detail_stream:
+                batch.detail_stream = detail_stream
+                await batch.consume_ndjson(request.stream())
+                batch.flush()
+            return batch.finish(detail_key=key)
+        
+        await batch.consume_ndjson(request.stream())
+        return batch.finish()
+    except ValueError as e:
+        batch.abort(str(e))
+        raise HTTPException(status_code=400, detail=f"Batch compliance check failed: {str(e)}")
+    except Exception as e:
+        batch.abort(str(e))
+        raise HTTPException(status_code=500, detail=f"Batch compliance check failed: {str(e)}")
+
+
+def _get_run(db: Session, run_id: int, current_user: Optional[User]) -> ComplianceRun:
+    run = db.query(ComplianceRun).filter(ComplianceRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Compliance run not found")
+    if run.user_id is not None and (current_user is None or run.user_id != current_user.id):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return run
+
+
+@router.get("/compliance/runs/{run_id}")
+async def get_compliance_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    run = _get_run(db, run_id, current_user)
+    
+    return {
+        "id": run.id,
+        "framework": run.framework,
+        "policy_name": run.policy_name,
+        "status": run.status,
+        "resource_count": run.resource_count,
+        "passed_count": run.passed_count,
+        "failed_count": run.failed_count,
+        "summary": run.summary,
+        "has_details": run.detail_key is not None,
+        "scheduled": run.scheduled,
+        "created_at": run.created_at.isoformat(),
+        "completed_at": run.completed_at.isoformat() if run.completed_at else None
+    }
+
+
+@router.get("/compliance/runs/{run_id}/details")
+async def download_compliance_run_details(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    run = _get_run(db, run_id, current_user)
+    
+    blob_store = BlobStore()
+    if not run.detail_key or not blob_store.exists(run.detail_key):
+        raise HTTPException(status_code=404, detail="No per-resource details were recorded for this run")
+    
+    return StreamingResponse(
+        blob_store.iter_chunks(run.detail_key),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename=compliance-run-{run.id}.ndjson"}
+    )
+
+
+@router.patch("/compliance/resources/{resource_id}")
+async def patch_compliance_resource(
+    resource_id: str,
+    request: ResourcePatchRequest,
+    db: Session = Depends(get_db)
+):
+    tracker = ComplianceStateTracker(db)
+    try:
+        return tracker.apply_patch(
+            resource_id,
+            request.patch,
+            frameworks=request.frameworks,
+            resource_type=request.resource_type,
+            project_id=request.project_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/compliance/resources/{resource_id}")
+async def get_compliance_resource(resource_id: str, db: Session = Depends(get_db)):
+    states = db.query(ComplianceResourceState).filter(ComplianceResourceState.resource_id == resource_id).all()
+    if not states:
+        raise HTTPException(status_code=404, detail="Compliance resource not found")
+    
+    return {
+        "resource_id": resource_id,
+        "frameworks": {
+            state.framework: {
+                "status": state.status,
+                "verdicts": state.verdicts,
+                "resource_type": state.resource_type,
+                "resource_data": state.resource_data,
+                "updated_at": state.updated_at.isoformat()
+            }
+            for state in states
+        }
+    }
+
+
+@router.delete("/compliance/resources/{resource_id}")
+async def delete_compliance_resource(resource_id: str, db: Session = Depends(get_db)):
+    removed = ComplianceStateTracker(db).remove_resource(resource_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="Compliance resource not found")
+    
+    return {"status": "success", "message": f"Removed {removed} framework states"}
+
+
+@router.get("/compliance/rollups")
+async def list_compliance_rollups(db: Session = Depends(get_db)):
+    return {
+        "rollups": [
+            {
+                "framework": rollup.framework,
+                "resource_count": rollup.resource_count,
+                "passed_count": rollup.passed_count,
+                "failed_count": rollup.failed_count,
+                "pass_rate": round(rollup.passed_count / rollup.resource_count, 4) if rollup.resource_count else None,
+                "policies": rollup.policy_counts,
+                "updated_at": rollup.updated_at.isoformat() if rollup.updated_at else None
+            }
+            for rollup in db.query(ComplianceRollup).order_by(ComplianceRollup.framework).all()
+        ]
+    }
+
+
+@router.post("/compliance/license-check", response_model=ComplianceCheckResponse)
+async def run_license_check(
+    request: LicenseCheckRequest,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    sbom = (
+        db.query(SBOMDocument)
+        .options(undefer(SBOMDocument.content))
+        .filter(SBOMDocument.id == request.sbom_id)
+        .first()
+    )
+    if not sbom:
+        raise HTTPException(status_code=404, detail="SBOM document not found")
+    
+    template = _resolve_template(db, request.template_id, current_user, license=True) if request.template_id is not None else None
+    
+    engine = get_compliance_engine()
+    result = engine.check_licenses(
+        json.loads(sbom.content),
+        policy_name=request.policy_name,
+        custom_policy=request.custom_policy,
+        compiled_policy=template.license_policy if template else None
+    )
+    if result.get("status") == "error":
+        raise HTTPException(status_code=400, detail=result.get("message"))
+    
+    result["evidence"]["sbom_id"] = sbom.id
+    if template:
+        result["template"] = {"id": template.id, "version": template.version}
+    
+    db_check = ComplianceCheck(
+        framework="license",
+        policy_name=result.get("policy_name", "default"),
+        status=result.get("status", "unknown"),
+        details=result,
+        evidence=result.get("evidence", {}),
+        project_id=sbom.project_id
+    )
+    db.add(db_check)
+    db.commit()
+    db.refresh(db_check)
+    
+    return _check_response(db_check)
+
+
 @router.get("/compliance/checks")
 async def list_checks(
     framework: Optional[str] = None,
@@ -104,14 +437,21 @@ async def get_check(check_id: int, db: Session = Depends(get_db)):
     if not check:
         raise HTTPException(status_code=404, detail="Compliance check not found")
     
+    evidence = check.evidence
+    if check.evidence_hash:
+        evidence = {**(evidence or {}), "resource_data": load_evidence(db, check.evidence_hash)}
+    
     return {
         "id": check.id,
         "framework": check.framework,
         "policy_name": check.policy_name,
         "status": check.status,
         "details": check.details,
-        "evidence": check.evidence,
-        "created_at": check.created_at.isoformat()
+        "evidence": evidence,
+        "fingerprint": check.fingerprint,
+        "resource_id": check.resource_id,
+        "created_at": check.created_at.isoformat(),
+        "last_checked_at": check.last_checked_at.isoformat() if check.last_checked_at else None
     }
 
 
@@ -133,6 +473,11 @@ async def list_frameworks():
                 "name": "GDPR",
                 "description": "General Data Protection Regulation",
                 "policies": ["data_encryption", "access_control", "data_retention", "privacy_by_design"]
+            },
+            {
+                "name": "License",
+                "description": "Open source license policy evaluation over SBOM components",
+                "policies": ["default", "permissive_only"]
             }
         ]
     }
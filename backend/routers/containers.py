@@ -5,7 +5,7 @@ from typing import List, Optional
 
 from database import get_db, ContainerScan, User
 from auth import get_current_active_user
-from modules.container_scanner import ContainerScanner
+from routers.jobs import queue_job
 
 router = APIRouter()
 
@@ -23,44 +23,24 @@ class ContainerScanResponse(BaseModel):
     risk_score: float
     vulnerability_count: int
     created_at: str
-
+    
     class Config:
         from_attributes = True
 
 
-@router.post("/containers/scan", response_model=ContainerScanResponse)
+@router.post("/containers/scan", status_code=202)
 async def scan_container(
     scan_data: ContainerScanRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    scanner = ContainerScanner()
-    result = await scanner.scan_image(
-        image_name=scan_data.image_name,
-        image_tag=scan_data.image_tag
-    )
-    
-    scan = ContainerScan(
-        image_name=scan_data.image_name,
-        image_tag=scan_data.image_tag,
-        digest=result.get("digest"),
-        vulnerabilities=result.get("vulnerabilities", []),
-        risk_score=result.get("risk_score", 0.0),
+    return queue_job(
+        db,
+        "container",
+        {"image_name": scan_data.image_name, "image_tag": scan_data.image_tag},
         user_id=current_user.id,
         project_id=scan_data.project_id
     )
-    db.add(scan)
-    db.commit()
-    db.refresh(scan)
-    
-    return ContainerScanResponse(
-        id=scan.id,
-        image_name=scan.image_name,
-        image_tag=scan.image_tag,
-        risk_score=scan.risk_score,
-        vulnerability_count=len(scan.vulnerabilities) if scan.vulnerabilities else 0,
-        created_at=scan.created_at.isoformat()
-    )
 
 
 @router.get("/containers/scans", response_model=List[ContainerScanResponse])
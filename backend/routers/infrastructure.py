@@ -6,6 +6,7 @@ from typing import List, Optional, Dict, Any
 from database import get_db, InfrastructureScan, User
 from auth import get_current_active_user
 from modules.infrastructure_scanner import InfrastructureScanner
+from routers.jobs import queue_job
 
 router = APIRouter()
 
@@ -24,44 +25,28 @@ class InfrastructureScanResponse(BaseModel):
     risk_score: float
     findings_count: int
     created_at: str
-
+    
     class Config:
         from_attributes = True
 
 
-@router.post("/infrastructure/scan", response_model=InfrastructureScanResponse)
+@router.post("/infrastructure/scan", status_code=202)
 async def scan_infrastructure(
     scan_data: InfrastructureScanRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    scanner = InfrastructureScanner()
-    result = await scanner.scan(
-        scan_type=scan_data.scan_type,
-        target=scan_data.target,
-        config=scan_data.config or {}
-    )
+    supported_types = InfrastructureScanner().supported_types
+    if scan_data.scan_type not in supported_types:
+        raise HTTPException(status_code=400, detail=f"Unsupported scan type: {scan_data.scan_type}. Supported: {', '.join(supported_types)}")
     
-    scan = InfrastructureScan(
-        scan_type=scan_data.scan_type,
-        target=scan_data.target,
-        findings=result.get("findings", []),
-        risk_score=result.get("risk_score", 0.0),
+    return queue_job(
+        db,
+        "infrastructure",
+        {"scan_type": scan_data.scan_type, "target": scan_data.target, "config": scan_data.config or {}},
         user_id=current_user.id,
         project_id=scan_data.project_id
     )
-    db.add(scan)
-    db.commit()
-    db.refresh(scan)
-    
-    return InfrastructureScanResponse(
-        id=scan.id,
-        scan_type=scan.scan_type,
-        target=scan.target,
-        risk_score=scan.risk_score,
-        findings_count=len(scan.findings) if scan.findings else 0,
-        created_at=scan.created_at.isoformat()
-    )
 
 
 @router.get("/infrastructure/scans", response_model=List[InfrastructureScanResponse])
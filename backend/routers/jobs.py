@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional, Dict, Any
+
+from database import get_db, ScanJob, User
+from auth import get_current_active_user, get_optional_user
+from modules.scan_jobs import create_job, dispatch_job, job_events, job_reference, job_status
+
+router = APIRouter()
+
+
+def queue_job(
+    db: Session,
+    job_type: str,
+    params: Dict[str, Any],
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None
+) -> Dict[str, Any]:
+    job = create_job(db, job_type, params, user_id=user_id, project_id=project_id)
+    try:
+        dispatch_job(db, job)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Scan job {job.id} could not be queued, no workers are reachable: {str(e)}")
+    return job_reference(job)
+
+
+@router.get("/jobs")
+async def list_jobs(
+    job_type: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    query = db.query(ScanJob).filter(ScanJob.user_id == current_user.id)
+    if job_type:
+        query = query.filter(ScanJob.job_type == job_type)
+    if status:
+        query = query.filter(ScanJob.status == status)
+    
+    jobs = query.order_by(ScanJob.created_at.desc()).offset(offset).limit(limit).all()
+    return {
+        "jobs": [
+            {
+                "job_id": job.id,
+                "job_type": job.job_type,
+                "status": job.status,
+                "progress": job.progress,
+                "stage": job.stage,
+                "created_at": job.created_at.isoformat()
+            }
+            for job in jobs
+        ],
+        "total": query.count()
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    job = db.query(ScanJob).filter(ScanJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.user_id is not None and (current_user is None or current_user.id != job.user_id):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return job_status(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db)
+):
+    if not db.query(ScanJob.id).filter(ScanJob.id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return StreamingResponse(
+        job_events(job_id, after=last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+from datetime import datetime
 
 from database import get_db, PolicyTemplate, User
 from auth import get_current_active_user
+from modules.policy_templates import get_template_registry
 
 router = APIRouter()
 
@@ -17,14 +19,22 @@ class PolicyTemplateCreate(BaseModel):
     is_public: bool = False
 
 
+class PolicyTemplateUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    policy_content: Optional[Dict[str, Any]] = None
+    is_public: Optional[bool] = None
+
+
 class PolicyTemplateResponse(BaseModel):
     id: int
     name: str
     framework: str
     description: Optional[str]
+    version: int
     is_public: bool
     created_at: str
-
+    
     class Config:
         from_attributes = True
 
@@ -35,6 +45,10 @@ async def create_policy_template(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    errors = get_template_registry().validate(template_data.framework, template_data.policy_content)
+    if errors:
+        raise HTTPException(status_code=400, detail={"message": "Invalid policy content", "errors": errors})
+    
     template = PolicyTemplate(
         name=template_data.name,
         framework=template_data.framework,
@@ -47,11 +61,58 @@ async def create_policy_template(
     db.commit()
     db.refresh(template)
     
+    return _template_response(template)
+
+
+@router.put("/policy-templates/{template_id}", response_model=PolicyTemplateResponse)
+async def update_policy_template(
+    template_id: int,
+    template_data: PolicyTemplateUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    template = (
+        db.query(PolicyTemplate)
+        .filter(PolicyTemplate.id == template_id)
+        .with_for_update()
+        .first()
+    )
+    if not template:
+        raise HTTPException(status_code=404, detail="Policy template not found")
+    
+    if template.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    registry = get_template_registry()
+    if template_data.policy_content is not None:
+        errors = registry.validate(template.framework, template_data.policy_content)
+        if errors:
+            raise HTTPException(status_code=400, detail={"message": "Invalid policy content", "errors": errors})
+        template.policy_content = template_data.policy_content
+    if template_data.name is not None:
+        template.name = template_data.name
+    if template_data.description is not None:
+        template.description = template_data.description
+    if template_data.is_public is not None:
+        template.is_public = template_data.is_public
+    
+    template.version = (template.version or 1) + 1
+    template.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(template)
+    
+    registry.publish_invalidation(template.id, template.version)
+    
+    return _template_response(template)
+
+
+def _template_response(template: PolicyTemplate) -> PolicyTemplateResponse:
     return PolicyTemplateResponse(
         id=template.id,
         name=template.name,
         framework=template.framework,
         description=template.description,
+        version=template.version,
         is_public=template.is_public,
         created_at=template.created_at.isoformat()
     )
@@ -78,7 +139,7 @@ async def list_policy_templates(
         query = query.filter(PolicyTemplate.framework == framework)
     
     templates = query.all()
-    return templates
+    return [_template_response(template) for template in templates]
 
 
 @router.get("/policy-templates/{template_id}")
@@ -100,7 +161,9 @@ async def get_policy_template(
         "framework": template.framework,
         "description": template.description,
         "policy_content": template.policy_content,
+        "version": template.version,
         "is_public": template.is_public,
-        "created_at": template.created_at.isoformat()
+        "created_at": template.created_at.isoformat(),
+        "updated_at": template.updated_at.isoformat() if template.updated_at else None
     }
 
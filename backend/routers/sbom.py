@@ -1,10 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Optional, List, Dict, Any, Union
+from sqlalchemy.orm import Session, undefer, undefer_group
+import hashlib
+import json
 
+from config import settings
 from database import get_db, SBOMDocument
-from modules.sbom import SBOMGenerator
+from modules.attestation import get_attestation_signer
+from modules.sbom import SBOMGenerator, SBOMMerger
+from utils.blob_store import BlobStore
 
 router = APIRouter()
 
@@ -16,6 +22,7 @@ class SBOMGenerateRequest(BaseModel):
     dependencies: List[Dict[str, Any]]
     metadata: Optional[Dict[str, Any]] = None
     include_attestation: bool = True
+    enrich_vulnerabilities: bool = False
 
 
 class SBOMGenerateResponse(BaseModel):
@@ -26,6 +33,22 @@ class SBOMGenerateResponse(BaseModel):
     created_at: str
 
 
+class SBOMMergeRequest(BaseModel):
+    sbom_ids: List[int]
+    project_name: str
+    version: str
+
+
+class AttestationSignRequest(BaseModel):
+    sbom_ids: List[int]
+    key_id: Optional[str] = None
+
+
+class AttestationVerifyRequest(BaseModel):
+    sbom_id: Optional[int] = None
+    envelope: Optional[Union[Dict[str, Any], str]] = None
+
+
 @router.post("/sbom/generate", response_model=SBOMGenerateResponse)
 async def generate_sbom(
     request: SBOMGenerateRequest,
@@ -39,7 +62,8 @@ async def generate_sbom(
             format_type=request.format,
             dependencies=request.dependencies,
             metadata=request.metadata or {},
-            include_attestation=request.include_attestation
+            include_attestation=request.include_attestation,
+            enrich_vulnerabilities=request.enrich_vulnerabilities
         )
         
         db_sbom = SBOMDocument(
@@ -47,7 +71,11 @@ async def generate_sbom(
             version=request.version,
             format=request.format,
             content=sbom_data.get("content", ""),
-            attestation=sbom_data.get("attestation", "")
+            attestation=sbom_data.get("attestation", ""),
+            content_hash=sbom_data.get("content_hash"),
+            size_bytes=sbom_data.get("size_bytes"),
+            component_count=sbom_data.get("component_count"),
+            has_attestation=bool(sbom_data.get("attestation"))
         )
         db.add(db_sbom)
         db.commit()
@@ -64,6 +92,31 @@ async def generate_sbom(
         raise HTTPException(status_code=500, detail=f"SBOM generation failed: {str(e)}")
 
 
+SBOM_METADATA_COLUMNS = (
+    SBOMDocument.id,
+    SBOMDocument.project_name,
+    SBOMDocument.version,
+    SBOMDocument.format,
+    SBOMDocument.size_bytes,
+    SBOMDocument.component_count,
+    SBOMDocument.has_attestation,
+    SBOMDocument.created_at
+)
+
+
+def _sbom_metadata(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "project_name": row.project_name,
+        "version": row.version,
+        "format": row.format,
+        "size_bytes": row.size_bytes,
+        "component_count": row.component_count,
+        "has_attestation": bool(row.has_attestation),
+        "created_at": row.created_at.isoformat()
+    }
+
+
 @router.get("/sbom/documents")
 async def list_sboms(
     project_name: Optional[str] = None,
@@ -71,7 +124,7 @@ async def list_sboms(
     offset: int = 0,
     db: Session = Depends(get_db)
 ):
-    query = db.query(SBOMDocument)
+    query = db.query(*SBOM_METADATA_COLUMNS)
     
     if project_name:
         query = query.filter(SBOMDocument.project_name == project_name)
@@ -80,24 +133,28 @@ async def list_sboms(
     total = query.count()
     
     return {
-        "sboms": [
-            {
-                "id": sbom.id,
-                "project_name": sbom.project_name,
-                "version": sbom.version,
-                "format": sbom.format,
-                "has_attestation": bool(sbom.attestation),
-                "created_at": sbom.created_at.isoformat()
-            }
-            for sbom in sboms
-        ],
+        "sboms": [_sbom_metadata(sbom) for sbom in sboms],
         "total": total
     }
 
 
+@router.get("/sbom/documents/{sbom_id}/metadata")
+async def get_sbom_metadata(sbom_id: int, db: Session = Depends(get_db)):
+    sbom = db.query(*SBOM_METADATA_COLUMNS).filter(SBOMDocument.id == sbom_id).first()
+    if not sbom:
+        raise HTTPException(status_code=404, detail="SBOM document not found")
+    
+    return _sbom_metadata(sbom)
+
+
 @router.get("/sbom/documents/{sbom_id}")
 async def get_sbom(sbom_id: int, db: Session = Depends(get_db)):
-    sbom = db.query(SBOMDocument).filter(SBOMDocument.id == sbom_id).first()
+    sbom = (
+        db.query(SBOMDocument)
+        .options(undefer_group("blobs"))
+        .filter(SBOMDocument.id == sbom_id)
+        .first()
+    )
     if not sbom:
         raise HTTPException(status_code=404, detail="SBOM document not found")
     
@@ -106,28 +163,238 @@ async def get_sbom(sbom_id: int, db: Session = Depends(get_db)):
         "project_name": sbom.project_name,
         "version": sbom.version,
         "format": sbom.format,
+        "size_bytes": sbom.size_bytes,
+        "component_count": sbom.component_count,
         "content": sbom.content,
         "attestation": sbom.attestation,
         "created_at": sbom.created_at.isoformat()
     }
 
 
+def _media_type(format_type: str) -> str:
+    return "text/spdx" if format_type == "spdx" else "application/json"
+
+
+def _load_content(db: Session, sbom_id: int) -> str:
+    return db.query(SBOMDocument.content).filter(SBOMDocument.id == sbom_id).scalar()
+
+
+def _ensure_content_hash(db: Session, sbom) -> tuple:
+    if sbom.content_hash:
+        return sbom.content_hash, None
+    
+    content = _load_content(db, sbom.id)
+    content_hash = hashlib.sha256(content.encode()).hexdigest()
+    db.query(SBOMDocument).filter(SBOMDocument.id == sbom.id).update({"content_hash": content_hash})
+    db.commit()
+    return content_hash, content
+
+
+@router.get("/sbom/documents/{sbom_id}/convert")
+async def convert_sbom(
+    sbom_id: int,
+    target_format: str,
+    db: Session = Depends(get_db)
+):
+    sbom = db.query(
+        SBOMDocument.id,
+        SBOMDocument.project_name,
+        SBOMDocument.version,
+        SBOMDocument.format,
+        SBOMDocument.content_hash
+    ).filter(SBOMDocument.id == sbom_id).first()
+    if not sbom:
+        raise HTTPException(status_code=404, detail="SBOM document not found")
+    
+    if target_format == sbom.format:
+        raise HTTPException(status_code=400, detail=f"SBOM is already in {target_format} format")
+    
+    headers = {
+        "Content-Disposition": f"attachment; filename={sbom.project_name}-{sbom.version}.{target_format}.json"
+    }
+    
+    content_hash, content = _ensure_content_hash(db, sbom)
+    
+    blob_store = BlobStore()
+    cache_key = f"sbom-conversions/{content_hash}.{target_format}.json"
+    if blob_store.exists(cache_key):
+        return StreamingResponse(
+            blob_store.iter_chunks(cache_key),
+            media_type=_media_type(target_format),
+            headers={**headers, "X-Cache": "HIT"}
+        )
+    
+    if content is None:
+        content = _load_content(db, sbom_id)
+    
+    try:
+        chunks = SBOMGenerator().convert_sbom(content, target_format, sbom.project_name, sbom.version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def stream_and_cache():
+        with blob_store.writer(cache_key) as f:
+            for chunk in chunks:
+                data = chunk.encode()
+                f.write(data)
+                yield data
+    
+    return StreamingResponse(
+        stream_and_cache(),
+        media_type=_media_type(target_format),
+        headers={**headers, "X-Cache": "MISS"}
+    )
+
+
+@router.post("/sbom/merge")
+async def merge_sboms(
+    request: SBOMMergeRequest,
+    db: Session = Depends(get_db)
+):
+    sbom_ids = list(dict.fromkeys(request.sbom_ids))
+    if not sbom_ids:
+        raise HTTPException(status_code=400, detail="At least one SBOM is required")
+    if len(sbom_ids) > settings.SBOM_MERGE_MAX_INPUTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.SBOM_MERGE_MAX_INPUTS} SBOMs can be merged per request"
+        )
+    
+    rows = db.query(SBOMDocument.id, SBOMDocument.content_hash).filter(SBOMDocument.id.in_(sbom_ids)).all()
+    rows_by_id = {row.id: row for row in rows}
+    missing = [sbom_id for sbom_id in sbom_ids if sbom_id not in rows_by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"SBOM documents not found: {missing}")
+    
+    merger = SBOMMerger()
+    sources = []
+    for sbom_id in sbom_ids:
+        content_hash, content = _ensure_content_hash(db, rows_by_id[sbom_id])
+        if not merger.has_component_stream(content_hash):
+            try:
+                merger.build_component_stream(content_hash, content or _load_content(db, sbom_id))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"SBOM {sbom_id} is not valid JSON: {e}")
+        sources.append((sbom_id, content_hash))
+    
+    return StreamingResponse(
+        merger.iter_merge(sources, request.project_name, request.version),
+        media_type="application/json",
+        headers={
+            "Content-Disposition": f"attachment; filename={request.project_name}-{request.version}.cyclonedx.json"
+        }
+    )
+
+
 @router.get("/sbom/documents/{sbom_id}/download")
 async def download_sbom(sbom_id: int, db: Session = Depends(get_db)):
-    sbom = db.query(SBOMDocument).filter(SBOMDocument.id == sbom_id).first()
+    sbom = (
+        db.query(SBOMDocument)
+        .options(undefer(SBOMDocument.content))
+        .filter(SBOMDocument.id == sbom_id)
+        .first()
+    )
     if not sbom:
         raise HTTPException(status_code=404, detail="SBOM document not found")
     
-    content_type = "application/json"
-    if sbom.format == "spdx":
-        content_type = "text/spdx"
-    
     return Response(
         content=sbom.content,
-        media_type=content_type,
+        media_type=_media_type(sbom.format),
         headers={
             "Content-Disposition": f"attachment; filename={sbom.project_name}-{sbom.version}.{sbom.format}.json"
         }
     )
 
 
+@router.post("/sbom/attestations/sign")
+async def sign_sboms(
+    request: AttestationSignRequest,
+    db: Session = Depends(get_db)
+):
+    sbom_ids = list(dict.fromkeys(request.sbom_ids))
+    if len(sbom_ids) > settings.ATTESTATION_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.ATTESTATION_BATCH_LIMIT} SBOMs can be signed per request"
+        )
+    
+    sboms = (
+        db.query(SBOMDocument)
+        .options(undefer(SBOMDocument.content))
+        .filter(SBOMDocument.id.in_(sbom_ids))
+        .all()
+    )
+    found = {sbom.id for sbom in sboms}
+    missing = [sbom_id for sbom_id in sbom_ids if sbom_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"SBOM documents not found: {missing}")
+    
+    try:
+        generator = SBOMGenerator()
+        attestations = generator.generate_attestations(
+            [
+                {"content": sbom.content, "project_name": sbom.project_name, "version": sbom.version}
+                for sbom in sboms
+            ],
+            key_id=request.key_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for sbom, attestation in zip(sboms, attestations):
+        sbom.attestation = attestation
+        sbom.has_attestation = True
+    db.commit()
+    
+    return {
+        "signed": len(sboms),
+        "key_id": request.key_id or get_attestation_signer().default_key_id,
+        "sbom_ids": [sbom.id for sbom in sboms]
+    }
+
+
+@router.post("/sbom/attestations/verify")
+async def verify_attestation(
+    request: AttestationVerifyRequest,
+    db: Session = Depends(get_db)
+):
+    if request.sbom_id is None and request.envelope is None:
+        raise HTTPException(status_code=400, detail="Provide an sbom_id, an envelope, or both")
+    
+    sbom = None
+    if request.sbom_id is not None:
+        sbom = (
+            db.query(SBOMDocument)
+            .options(undefer_group("blobs"))
+            .filter(SBOMDocument.id == request.sbom_id)
+            .first()
+        )
+        if not sbom:
+            raise HTTPException(status_code=404, detail="SBOM document not found")
+    
+    envelope = request.envelope if request.envelope is not None else sbom.attestation
+    if not envelope:
+        raise HTTPException(status_code=404, detail="SBOM document has no attestation")
+    
+    if isinstance(envelope, str):
+        try:
+            envelope = json.loads(envelope)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Envelope is not valid JSON")
+    
+    result = get_attestation_signer().verify(envelope)
+    
+    if sbom is not None:
+        content_hash = hashlib.sha256(sbom.content.encode()).hexdigest()
+        subjects = (result.get("statement") or {}).get("subject", [])
+        result["digest_match"] = any(
+            subject.get("digest", {}).get("sha256") == content_hash for subject in subjects
+        )
+        result["verified"] = result["verified"] and result["digest_match"]
+    
+    return result
+
+
+@router.get("/sbom/attestations/keys")
+async def list_attestation_keys():
+    return {"keys": get_attestation_signer().export_public_keys()}
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from pydantic import BaseModel
 import json
 
@@ -24,8 +24,9 @@ async def compare_sboms(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    sbom1 = db.query(SBOMDocument).filter(SBOMDocument.id == sbom_id1).first()
-    sbom2 = db.query(SBOMDocument).filter(SBOMDocument.id == sbom_id2).first()
+    query = db.query(SBOMDocument).options(undefer(SBOMDocument.content))
+    sbom1 = query.filter(SBOMDocument.id == sbom_id1).first()
+    sbom2 = query.filter(SBOMDocument.id == sbom_id2).first()
     
     if not sbom1 or not sbom2:
         raise HTTPException(status_code=404, detail="SBOM not found")
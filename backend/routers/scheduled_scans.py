@@ -7,6 +7,7 @@ import croniter
 
 from database import get_db, ScheduledScan, User
 from auth import get_current_active_user
+from modules.policy_templates import TemplateAccessError, check_template_access
 
 router = APIRouter()
 
@@ -27,7 +28,7 @@ class ScheduledScanResponse(BaseModel):
     enabled: bool
     next_run: Optional[str]
     created_at: str
-
+    
     class Config:
         from_attributes = True
 
@@ -43,6 +44,14 @@ async def create_scheduled_scan(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid cron schedule format")
     
+    if scan_data.scan_type == "compliance" and scan_data.config.get("template_id") is not None:
+        try:
+            check_template_access(db, int(scan_data.config["template_id"]), current_user.id)
+        except TemplateAccessError:
+            raise HTTPException(status_code=403, detail="Access denied")
+        except (LookupError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid template_id: {str(e)}")
+    
     from datetime import datetime
     cron = croniter.croniter(scan_data.schedule, datetime.utcnow())
     next_run = cron.get_next(datetime)
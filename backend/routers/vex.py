@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+from database import get_db, VEXSuppression, User
+from auth import get_current_active_user
+from modules.vex import SUPPRESSING_STATES, get_vex_index, normalize_purl, parse_vex_document
+
+router = APIRouter()
+
+
+class VEXImportRequest(BaseModel):
+    document: Dict[str, Any]
+    source: Optional[str] = None
+
+
+@router.post("/vex/import")
+async def import_vex(
+    request: VEXImportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    try:
+        entries = parse_vex_document(request.document)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    statements = {(entry["vuln_id"], entry["purl"]): entry for entry in entries}
+    vuln_ids = {vuln_id for vuln_id, _ in statements}
+    existing = {
+        (row.vuln_id, row.purl): row
+        for row in db.query(VEXSuppression).filter(VEXSuppression.vuln_id.in_(vuln_ids)).all()
+    } if vuln_ids else {}
+    
+    source = request.source or request.document.get("@id") or request.document.get("serialNumber")
+    added, removed = [], []
+    counts = {"imported": 0, "updated": 0, "revoked": 0, "ignored": 0}
+    
+    for key, entry in statements.items():
+        row = existing.get(key)
+        
+        if entry["status"] not in SUPPRESSING_STATES:
+            if row is not None:
+                db.delete(row)
+                removed.append(key)
+                counts["revoked"] += 1
+            else:
+                counts["ignored"] += 1
+            continue
+        
+        if row is None:
+            db.add(VEXSuppression(
+                vuln_id=entry["vuln_id"],
+                purl=entry["purl"],
+                status=entry["status"],
+                justification=entry["justification"],
+                detail=entry["detail"],
+                source=source,
+                created_by=current_user.id
+            ))
+            counts["imported"] += 1
+        else:
+            row.status = entry["status"]
+            row.justification = entry["justification"]
+            row.detail = entry["detail"]
+            row.source = source
+            row.updated_at = datetime.utcnow()
+            counts["updated"] += 1
+        added.append(key)
+    
+    db.commit()
+    get_vex_index().update(added, removed)
+    
+    return {
+        "status": "success",
+        "statements": len(entries),
+        **counts
+    }
+
+
+@router.get("/vex/suppressions")
+async def list_vex_suppressions(
+    vuln_id: Optional[str] = None,
+    purl: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    query = db.query(VEXSuppression)
+    
+    if vuln_id:
+        query = query.filter(VEXSuppression.vuln_id == vuln_id.upper())
+    if purl:
+        query = query.filter(VEXSuppression.purl == normalize_purl(purl))
+    
+    suppressions = query.order_by(VEXSuppression.id.desc()).offset(skip).limit(limit).all()
+    
+    return [
+        {
+            "id": suppression.id,
+            "vuln_id": suppression.vuln_id,
+            "purl": suppression.purl,
+            "status": suppression.status,
+            "justification": suppression.justification,
+            "detail": suppression.detail,
+            "source": suppression.source,
+            "created_at": suppression.created_at.isoformat()
+        }
+        for suppression in suppressions
+    ]
+
+
+@router.delete("/vex/suppressions/{suppression_id}")
+async def delete_vex_suppression(
+    suppression_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    suppression = db.query(VEXSuppression).filter(VEXSuppression.id == suppression_id).first()
+    if not suppression:
+        raise HTTPException(status_code=404, detail="VEX suppression not found")
+    
+    key = (suppression.vuln_id, suppression.purl)
+    db.delete(suppression)
+    db.commit()
+    get_vex_index().update([], [key])
+    
+    return {"status": "success", "message": "VEX suppression deleted"}
@@ -0,0 +1,56 @@
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from config import settings
+
+BLOB_KEY_PATTERN = re.compile(r"^[A-Za-z0-9._-]+(/[A-Za-z0-9._-]+)*$")
+
+
+class BlobStore:
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.BLOB_STORE_PATH
+        os.makedirs(self.root, exist_ok=True)
+    
+    def path(self, key: str) -> str:
+        if not BLOB_KEY_PATTERN.match(key) or ".." in key.split("/"):
+            raise ValueError(f"Invalid blob key: {key}")
+        return os.path.join(self.root, *key.split("/"))
+    
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+    
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def put(self, key: str, data: bytes):
+        with self.writer(key) as f:
+            f.write(data)
+    
+    def iter_chunks(self, key: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(temp_path, target)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
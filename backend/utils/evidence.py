@@ -0,0 +1,37 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database import EvidenceBlob
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def store_evidence(db: Session, blobs: Dict[str, Any]):
+    if not blobs:
+        return
+    
+    for attempt in range(2):
+        existing = {
+            row.hash for row in db.query(EvidenceBlob.hash).filter(EvidenceBlob.hash.in_(list(blobs))).all()
+        }
+        now = datetime.utcnow()
+        missing = [
+            {"hash": content_hash, "content": content, "created_at": now}
+            for content_hash, content in blobs.items()
+            if content_hash not in existing
+        ]
+        if not missing:
+            return
+        
+        try:
+            db.bulk_insert_mappings(EvidenceBlob, missing)
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+
+
+def load_evidence(db: Session, content_hash: str) -> Optional[Any]:
+    blob = db.query(EvidenceBlob).filter(EvidenceBlob.hash == content_hash).first()
+    return blob.content if blob else None
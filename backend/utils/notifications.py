@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from database import Notification, User
-from typing import Optional
+from typing import Dict, Any, Iterable, List, Optional
+from datetime import datetime
 
 
 def create_notification(
@@ -21,6 +22,33 @@ def create_notification(
     return notification
 
 
+def create_notifications(db: Session, notifications: Iterable[Dict[str, Any]]) -> int:
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "user_id": notification["user_id"],
+            "title": notification["title"],
+            "message": notification["message"],
+            "type": notification.get("type", "info"),
+            "read": False,
+            "created_at": created_at
+        }
+        for notification in notifications
+    ]
+    if rows:
+        db.bulk_insert_mappings(Notification, rows)
+        db.commit()
+    return len(rows)
+
+
+def team_member_ids(db: Session, team_id: int) -> List[int]:
+    from database import Team
+    team = db.query(Team).filter(Team.id == team_id).first()
+    if not team:
+        return []
+    return [user.id for user in team.members]
+
+
 def notify_team(
     db: Session,
     team_id: int,
@@ -28,11 +56,8 @@ def notify_team(
     message: str,
     notification_type: str = "info"
 ):
-    from database import Team
-    team = db.query(Team).filter(Team.id == team_id).first()
-    if not team:
-        return
-    
-    for user in team.members:
-        create_notification(db, user.id, title, message, notification_type)
+    create_notifications(db, (
+        {"user_id": user_id, "title": title, "message": message, "type": notification_type}
+        for user_id in team_member_ids(db, team_id)
+    ))
 
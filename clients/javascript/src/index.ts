@@ -13,6 +13,8 @@ export interface APITestOptions {
   testTypes?: string[];
   contractSchema?: Record<string, any>;
   rateLimitThreshold?: number;
+  wait?: boolean;
+  timeoutMs?: number;
 }
 
 export interface ComplianceCheckOptions {
@@ -63,9 +65,35 @@ export class SecureStackClient {
       contract_schema: options.contractSchema,
       rate_limit_threshold: options.rateLimitThreshold,
     });
+    if (options.wait === false) {
+      return response.data;
+    }
+    const job = await this.waitForJob(response.data.job_id, options.timeoutMs);
+    return job.result;
+  }
+
+  async getJob(jobId: string): Promise<any> {
+    const response = await this.client.get(`/jobs/${jobId}`);
     return response.data;
   }
 
+  async waitForJob(jobId: string, timeoutMs = 600000, pollIntervalMs = 1000): Promise<any> {
+    const deadline = Date.now() + timeoutMs;
+    while (true) {
+      const job = await this.getJob(jobId);
+      if (job.status === 'completed') {
+        return job;
+      }
+      if (job.status === 'failed') {
+        throw new Error(`Job ${jobId} failed: ${job.error}`);
+      }
+      if (Date.now() >= deadline) {
+        throw new Error(`Job ${jobId} still ${job.status} after ${timeoutMs}ms`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+    }
+  }
+
   async getApiTests(limit = 50, offset = 0): Promise<any> {
     const response = await this.client.get('/api-security/tests', {
       params: { limit, offset },
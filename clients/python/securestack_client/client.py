@@ -1,3 +1,4 @@
+import time
 import requests
 from typing import Dict, Any, List, Optional
 import json
@@ -22,7 +23,9 @@ class SecureStackClient:
         body: Optional[Dict[str, Any]] = None,
         test_types: Optional[List[str]] = None,
         contract_schema: Optional[Dict[str, Any]] = None,
-        rate_limit_threshold: Optional[int] = 100
+        rate_limit_threshold: Optional[int] = 100,
+        wait: bool = True,
+        timeout: float = 600.0
     ) -> Dict[str, Any]:
         if test_types is None:
             test_types = ["contract", "fuzzing", "rate_limit"]
@@ -44,8 +47,28 @@ class SecureStackClient:
         
         response = self.session.post(f"{self.base_url}/api-security/test", json=payload)
         response.raise_for_status()
+        job = response.json()
+        if not wait:
+            return job
+        return self.wait_for_job(job["job_id"], timeout=timeout)["result"]
+    
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}")
+        response.raise_for_status()
         return response.json()
     
+    def wait_for_job(self, job_id: str, timeout: float = 600.0, poll_interval: float = 1.0) -> Dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get_job(job_id)
+            if job["status"] == "completed":
+                return job
+            if job["status"] == "failed":
+                raise RuntimeError(f"Job {job_id} failed: {job.get('error')}")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} still {job['status']} after {timeout}s")
+            time.sleep(poll_interval)
+    
     def get_api_tests(self, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
         response = self.session.get(
             f"{self.base_url}/api-security/tests",
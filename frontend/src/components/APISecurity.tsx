@@ -1,6 +1,6 @@
 import { useState } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import api from '../services/api'
+import api, { waitForJob } from '../services/api'
 
 export default function APISecurity() {
   const [endpoint, setEndpoint] = useState('')
@@ -18,9 +18,10 @@ export default function APISecurity() {
   const testMutation = useMutation({
     mutationFn: async (data: any) => {
       const res = await api.post('/api-security/test', data)
-      return res.data
+      const job = await waitForJob(res.data.job_id)
+      return job.result
     },
-    onSuccess: () => {
+    onSettled: () => {
       queryClient.invalidateQueries({ queryKey: ['api-tests'] })
     }
   })
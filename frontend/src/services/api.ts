@@ -9,5 +9,22 @@ const api = axios.create({
   },
 })
 
+export async function waitForJob(jobId: string, timeoutMs = 600000, pollIntervalMs = 1000) {
+  const deadline = Date.now() + timeoutMs
+  while (true) {
+    const res = await api.get(`/jobs/${jobId}`)
+    if (res.data.status === 'completed') {
+      return res.data
+    }
+    if (res.data.status === 'failed') {
+      throw new Error(`Job ${jobId} failed: ${res.data.error}`)
+    }
+    if (Date.now() >= deadline) {
+      throw new Error(`Job ${jobId} still ${res.data.status} after ${timeoutMs}ms`)
+    }
+    await new Promise((resolve) => setTimeout(resolve, pollIntervalMs))
+  }
+}
+
 export default api
 